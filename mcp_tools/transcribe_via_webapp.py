@@ -6,11 +6,138 @@ Claude Desktop에서 호출되어 로컬 웹앱으로 STT 작업 위임
 
 import sys
 import json
+import hashlib
 import requests
 import time
 import os
 from pathlib import Path
 
+def print_progress(progress, message):
+    """진행률 막대 출력"""
+    progress_bar = "█" * int(progress // 5) + "░" * (20 - int(progress // 5))
+    print(f"[{progress_bar}] {progress}% - {message}")
+
+def wait_for_task_events(task_id, deadline, quiet_mode):
+    """
+    SSE(/api/events)로 작업이 끝날 때까지 상태 수신
+    
+    Returns:
+        dict: 최종 상태 (completed/error/not_found, 시간 초과 시 status='timeout')
+        None: 이벤트 스트림을 사용할 수 없는 경우 (폴링으로 전환)
+    """
+    last_progress = -1
+    try:
+        with requests.get(
+            f'http://localhost:5000/api/events/{task_id}',
+            stream=True,
+            timeout=(5, 60)  # 서버가 15초마다 keep-alive를 보내므로 60초 동안 조용하면 끊긴 것으로 판단
+        ) as response:
+            if response.status_code != 200:
+                return None
+            response.encoding = 'utf-8'
+            
+            event_name = 'message'
+            for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+                if time.time() > deadline:
+                    return {'status': 'timeout'}
+                if line.startswith('event:'):
+                    event_name = line[len('event:'):].strip()
+                elif line.startswith('data:') and event_name in ('status', 'progress'):
+                    status_data = json.loads(line[len('data:'):].strip())
+                    progress = status_data.get('progress', 0)
+                    if progress != last_progress and not quiet_mode:
+                        print_progress(progress, status_data.get('message', ''))
+                        last_progress = progress
+                    if status_data.get('status') in ('completed', 'error', 'not_found'):
+                        return status_data
+                elif not line:
+                    event_name = 'message'
+    except Exception as e:
+        if not quiet_mode:
+            print(f"⚠️ 이벤트 스트림 오류, 폴링으로 전환: {e}")
+    return None
+
+def upload_file_in_chunks(file_path, file_size, quiet_mode, max_retries=5):
+    """
+    분할 업로드 API로 파일 전송
+    
+    조각마다 SHA-256을 함께 보내 서버에서 검증하고, 전송이 실패하면
+    서버가 실제로 받은 위치를 조회해 그 위치부터 이어서 업로드한다.
+    
+    Returns:
+        str: 업로드 URL (/api/upload/<upload_id>)
+    """
+    # 전체 파일 해시 (서버에서 완료 시 검증)
+    file_digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_digest.update(block)
+    
+    init_response = requests.post(
+        'http://localhost:5000/api/upload/init',
+        json={
+            'filename': os.path.basename(file_path),
+            'size': file_size,
+            'sha256': file_digest.hexdigest()
+        },
+        timeout=30
+    )
+    init_data = init_response.json()
+    if not init_data.get('success'):
+        raise Exception(init_data.get('error', f'업로드 시작 실패 (HTTP {init_response.status_code})'))
+    
+    upload_url = init_data['upload_url']
+    chunk_size = init_data['chunk_size']
+    offset = 0
+    failures = 0
+    last_percent = -1
+    
+    with open(file_path, 'rb') as f:
+        while offset < file_size:
+            try:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                response = requests.put(
+                    f'http://localhost:5000{upload_url}',
+                    params={'offset': offset},
+                    data=chunk,
+                    headers={
+                        'Content-Type': 'application/octet-stream',
+                        'X-Chunk-SHA256': hashlib.sha256(chunk).hexdigest()
+                    },
+                    timeout=120
+                )
+                chunk_result = response.json()
+                if response.status_code not in (200, 409):
+                    raise Exception(chunk_result.get('error', f'HTTP {response.status_code}'))
+                
+                # 409(위치 불일치)면 서버가 알려준 위치부터 다시 전송
+                offset = chunk_result['received']
+                failures = 0
+                
+                percent = int(offset * 100 / file_size)
+                if not quiet_mode and percent // 10 != last_percent // 10:
+                    print(f"   📤 {percent}% ({offset / (1024 * 1024):.1f}MB)")
+                    last_percent = percent
+                    
+            except Exception as e:
+                failures += 1
+                if failures > max_retries:
+                    raise Exception(f"조각 업로드 실패 ({max_retries}회 재시도): {e}")
+                if not quiet_mode:
+                    print(f"⚠️ 조각 업로드 오류, 재시도 ({failures}/{max_retries}): {e}")
+                time.sleep(2 * failures)
+                
+                # 서버가 받은 위치 확인 후 이어서 업로드
+                try:
+                    status = requests.get(f'http://localhost:5000{upload_url}', timeout=10).json()
+                    if status.get('success'):
+                        offset = status['received']
+                except Exception:
+                    pass
+    
+    return upload_url
+
 def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
     """
     웹앱을 통한 음성파일 STT 처리
@@ -54,12 +181,6 @@ def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
     file_size = os.path.getsize(file_path)
     file_size_mb = file_size / (1024 * 1024)
     
-    if file_size_mb > 500:
-        return {
-            "success": False, 
-            "error": f"파일 크기가 너무 큽니다: {file_size_mb:.1f}MB (최대 500MB)"
-        }
-    
     if not quiet_mode:
         print(f"📁 파일 정보: {os.path.basename(file_path)} ({file_size_mb:.1f}MB)")
     
@@ -68,20 +189,28 @@ def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
         if not quiet_mode:
             print("📤 파일 업로드 중...")
         
-        with open(file_path, 'rb') as f:
-            files = {'audio': (os.path.basename(file_path), f, 'audio/mpeg')}
-            data = {
-                'model': model,
-                'formats': ','.join(formats)
-            }
-            
+        # 조각 단위로 업로드 (연결이 끊기면 서버가 받은 위치부터 이어서 전송)
+        upload_url = upload_file_in_chunks(file_path, file_size, quiet_mode)
+        
+        max_upload_attempts = 5
+        for attempt in range(1, max_upload_attempts + 1):
             response = requests.post(
-                'http://localhost:5000/api/transcribe',
-                files=files,
-                data=data,
+                f'http://localhost:5000{upload_url}/complete',
+                data={
+                    'model': model,
+                    'formats': ','.join(formats)
+                },
                 timeout=60
             )
             
+            # 대기열이 가득 찬 경우 Retry-After 만큼 기다렸다가 재시도 (업로드한 파일은 서버에 유지됨)
+            if response.status_code != 429 or attempt == max_upload_attempts:
+                break
+            retry_after = int(response.headers.get('Retry-After', '10'))
+            if not quiet_mode:
+                print(f"⏳ 대기열이 가득 찼습니다. {retry_after}초 후 재시도 ({attempt}/{max_upload_attempts})")
+            time.sleep(retry_after)
+            
         if response.status_code != 200:
             return {
                 "success": False, 
@@ -103,7 +232,7 @@ def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
     except Exception as e:
         return {"success": False, "error": f"업로드 중 오류: {str(e)}"}
     
-    # 4. 진행상황 폴링
+    # 4. 진행상황 수신 (SSE, 실패 시 폴링)
     if not quiet_mode:
         print("\n🔄 STT 처리 진행상황:")
         print("=" * 50)
@@ -112,58 +241,76 @@ def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
     start_time = time.time()
     last_progress = -1
     
-    while time.time() - start_time < max_wait_time:
-        try:
-            status_response = requests.get(
-                f'http://localhost:5000/api/status/{task_id}',
-                timeout=10
-            )
+    # SSE 스트림으로 상태를 실시간 수신 (스트림을 쓸 수 없으면 2초 폴링으로 전환)
+    final_status = wait_for_task_events(task_id, start_time + max_wait_time, quiet_mode)
+    if final_status is not None:
+        if final_status.get('status') == 'completed':
+            if not quiet_mode:
+                print("✅ STT 처리 완료!")
+        elif final_status.get('status') == 'timeout':
+            return {
+                "success": False, 
+                "error": f"STT 처리 시간 초과 ({max_wait_time//60}분)"
+            }
+        else:
+            return {
+                "success": False, 
+                "error": f"STT 처리 실패: {final_status.get('message', '')}"
+            }
+    else:
+        while time.time() - start_time < max_wait_time:
+            try:
+                status_response = requests.get(
+                    f'http://localhost:5000/api/status/{task_id}',
+                    timeout=10
+                )
             
-            if status_response.status_code == 200:
-                status_data = status_response.json()
+                if status_response.status_code == 200:
+                    status_data = status_response.json()
                 
-                progress = status_data.get('progress', 0)
-                message = status_data.get('message', '')
-                status = status_data.get('status', 'unknown')
+                    progress = status_data.get('progress', 0)
+                    message = status_data.get('message', '')
+                    status = status_data.get('status', 'unknown')
                 
-                # 진행률이 변경되었을 때만 출력
-                if progress != last_progress and not quiet_mode:
-                    progress_bar = "█" * int(progress // 5) + "░" * (20 - int(progress // 5))
-                    print(f"[{progress_bar}] {progress}% - {message}")
-                    last_progress = progress
+                    # 진행률이 변경되었을 때만 출력
+                    if progress != last_progress and not quiet_mode:
+                        print_progress(progress, message)
+                        last_progress = progress
                 
-                if status == 'completed':
-                    if not quiet_mode:
-                        print("✅ STT 처리 완료!")
-                    break
-                elif status == 'error':
-                    return {
-                        "success": False, 
-                        "error": f"STT 처리 실패: {message}"
-                    }
+                    if status == 'completed':
+                        if not quiet_mode:
+                            print("✅ STT 처리 완료!")
+                        break
+                    elif status == 'error':
+                        return {
+                            "success": False, 
+                            "error": f"STT 처리 실패: {message}"
+                        }
                     
-            else:
-                if not quiet_mode:
-                    print(f"⚠️ 상태 확인 실패 (HTTP {status_response.status_code})")
+                else:
+                    if not quiet_mode:
+                        print(f"⚠️ 상태 확인 실패 (HTTP {status_response.status_code})")
                 
-        except Exception as e:
-            if not quiet_mode:
-                print(f"⚠️ 상태 확인 중 오류: {e}")
+            except Exception as e:
+                if not quiet_mode:
+                    print(f"⚠️ 상태 확인 중 오류: {e}")
             
-        time.sleep(2)
-    else:
-        return {
-            "success": False, 
-            "error": f"STT 처리 시간 초과 ({max_wait_time//60}분)"
-        }
+            time.sleep(2)
+        else:
+            return {
+                "success": False, 
+                "error": f"STT 처리 시간 초과 ({max_wait_time//60}분)"
+            }
     
     # 5. 결과 가져오기
     try:
         if not quiet_mode:
             print("\n📥 결과 가져오는 중...")
         
+        # 본문은 결과 API에 함께 받아 파일을 따로 내려받지 않음
         result_response = requests.get(
             f'http://localhost:5000/api/result/{task_id}',
+            params={'include_text': 1},
             timeout=30
         )
         
@@ -175,55 +322,30 @@ def transcribe_audio_via_webapp(file_path, model="small", formats=["txt"]):
             
         result_data = result_response.json()
         
-        # 텍스트 내용 추출 (실제 파일 다운로드 방식)
         text_content = ""
         selected_format = ""
-        selected_filename = ""
         
-        if result_data.get('previews'):
-            format_priority = ['TXT (순수 텍스트)', 'JSON (타임스탬프 포함)', 'VTT (웹 자막)', 'SRT (영상 자막)', 'TSV (표 형식)']
-            
-            # 우선순위에 따라 파일 선택
-            for fmt in format_priority:
-                for preview in result_data['previews']:
-                    if preview['format'] == fmt:
-                        selected_filename = preview['filename']
-                        selected_format = fmt
-                        break
-                if selected_filename:
+        transcript = result_data.get('transcript')
+        if transcript is not None:
+            text_content = transcript['text']
+            selected_format = 'TXT (순수 텍스트)'
+            # limit 없이 요청하므로 보통 한 번에 끝나지만, 서버가 나눠 보내면 이어서 받음
+            while transcript.get('next_offset') is not None:
+                page_response = requests.get(
+                    f'http://localhost:5000/api/text/{task_id}',
+                    params={'offset': transcript['next_offset']},
+                    timeout=30
+                )
+                if page_response.status_code != 200:
                     break
-            
-            if not selected_filename and result_data['previews']:
-                # 우선순위에 없는 형식이어도 첫 번째 preview 사용
-                selected_filename = result_data['previews'][0]['filename']
-                selected_format = result_data['previews'][0]['format']
-            
-            # 실제 파일 다운로드해서 전체 텍스트 추출
-            if selected_filename:
-                download_url = f"http://localhost:5000/download/{task_id}/{selected_filename}"
-                try:
-                    download_response = requests.get(download_url, timeout=30)
-                    if download_response.status_code == 200:
-                        # UTF-8 인코딩 에러 무시하여 완전한 텍스트 추출
-                        text_content = download_response.content.decode('utf-8', errors='ignore')
-                        if not quiet_mode:
-                            print(f"📥 전체 파일 다운로드 완료: {selected_filename}")
-                    else:
-                        # 다운로드 실패 시 미리보기라도 사용
-                        for preview in result_data['previews']:
-                            if preview['filename'] == selected_filename:
-                                text_content = preview['content']
-                                if not quiet_mode:
-                                    print(f"⚠️ 파일 다운로드 실패, 미리보기 사용: {download_response.status_code}")
-                                break
-                except Exception as e:
-                    # 다운로드 오류 시 미리보기라도 사용
-                    for preview in result_data['previews']:
-                        if preview['filename'] == selected_filename:
-                            text_content = preview['content']
-                            if not quiet_mode:
-                                print(f"⚠️ 다운로드 오류, 미리보기 사용: {str(e)}")
-                            break
+                transcript = page_response.json()
+                text_content += transcript['text']
+        elif result_data.get('previews'):
+            # 본문을 받지 못한 경우 첫 번째 미리보기라도 사용
+            text_content = result_data['previews'][0]['content']
+            selected_format = result_data['previews'][0]['format']
+            if not quiet_mode:
+                print("⚠️ 결과 본문을 받지 못해 미리보기를 사용합니다.")
         
         # 결과 요약 출력
         if not quiet_mode:
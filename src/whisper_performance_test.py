@@ -3,14 +3,19 @@
 """
 Whisper 모델 성능 비교 스크립트
 다양한 모델과 파일 길이로 처리 시간 및 정확도 측정
+CPU에서는 int8 동적 양자화 엔진도 함께 측정해 fp32 결과 대비 문자 오류율(CER)을 비교
 """
 
 import os
+import sys
 import time
-import subprocess
 import json
 from datetime import datetime
 
+# 웹앱과 같은 모델 로딩 경로(whisper_engine)를 측정하도록 webapp 폴더의 모듈 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'webapp'))
+import whisper_engine
+
 def get_audio_file_info(filename):
     """오디오 파일 정보 조회"""
     if not os.path.exists(filename):
@@ -24,66 +29,72 @@ def get_audio_file_info(filename):
         "size_mb": round(file_size / (1024 * 1024), 2)
     }
 
-def run_whisper_test(audio_file, model_name, device="cuda"):
-    """Whisper 모델 테스트 실행 및 시간 측정"""
-    
-    print(f"\n🔄 테스트 중: {model_name} 모델로 {audio_file} 처리")
-    
-    # 명령어 구성
-    cmd = [
-        "whisper", 
-        audio_file,
-        "--language", "Korean",
-        "--device", device,
-        "--model", model_name,
-        "--output_format", "txt"
-    ]
+def detect_device():
+    """사용할 장치 자동 선택 (GPU가 없으면 CPU)"""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def character_error_rate(reference, hypothesis):
+    """문자 오류율 (공백 제외 편집 거리 / 기준 길이)"""
+    reference = "".join(reference.split())
+    hypothesis = "".join(hypothesis.split())
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char)))
+        previous = current
+    return previous[-1] / len(reference)
+
+def run_whisper_test(audio_file, model_name, device="auto", engine="fp32"):
+    """Whisper 모델 테스트 실행 및 시간 측정
+
+    모델 로딩 시간은 제외하고 음성 인식 시간만 측정 (웹앱은 모델을 상주시켜 재사용)
+    engine: fp32, fp16(GPU), int8(CPU 동적 양자화)
+    """
+    if device == "auto":
+        device = detect_device()
+    
+    print(f"\n🔄 테스트 중: {model_name} 모델({device}, {engine})로 {audio_file} 처리")
     
     try:
+        import whisper
+        
+        model = whisper_engine.load_model(model_name, device, engine)
+        
+        audio = whisper.load_audio(audio_file)
+        audio_duration = len(audio) / whisper.audio.SAMPLE_RATE
+        
         # 시작 시간 기록
         start_time = time.time()
         
         # Whisper 실행
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            timeout=600  # 최대 10분 대기
-        )
+        result = model.transcribe(audio, language="Korean", verbose=None, **whisper_engine.transcribe_options(engine))
         
         # 종료 시간 기록
         end_time = time.time()
         processing_time = end_time - start_time
         
-        # 결과 파일명 (Whisper가 자동으로 생성)
-        base_name = os.path.splitext(audio_file)[0]
-        output_file = f"{base_name}.txt"
-        
-        # 출력 파일 확인
-        output_text = ""
-        if os.path.exists(output_file):
-            with open(output_file, 'r', encoding='utf-8') as f:
-                output_text = f.read().strip()
+        output_text = result["text"].strip()
         
         return {
-            "success": result.returncode == 0,
+            "success": True,
+            "device": device,
+            "engine": engine,
             "processing_time": round(processing_time, 2),
+            "audio_duration": round(audio_duration, 2),
+            "realtime_factor": round(processing_time / audio_duration, 3) if audio_duration else None,
             "output_text": output_text,
-            "text_length": len(output_text),
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "output_file": output_file
+            "text_length": len(output_text)
         }
         
-    except subprocess.TimeoutExpired:
-        return {
-            "success": False,
-            "error": "타임아웃 (10분 초과)",
-            "processing_time": 600
-        }
     except Exception as e:
         return {
             "success": False,
+            "device": device,
+            "engine": engine,
             "error": str(e),
             "processing_time": 0
         }
@@ -94,6 +105,12 @@ def main():
     print("🎯 Whisper 모델 성능 비교 테스트")
     print("=" * 60)
     
+    # 장치 자동 선택 (인자로 지정 가능: python whisper_performance_test.py cpu)
+    device = sys.argv[1] if len(sys.argv) > 1 else detect_device()
+    # CPU는 fp32(기준)와 int8을 함께 측정, GPU는 fp16
+    engines = ["fp32", "int8"] if device == "cpu" else ["fp16"]
+    print(f"🖥️ 장치: {device}, 엔진: {', '.join(engines)}")
+    
     # 테스트할 파일들
     test_files = [
         "test_meeting_korean.mp3",      # 기존 (54초)
@@ -146,14 +163,28 @@ def main():
         }
         
         for model in models:
-            result = run_whisper_test(audio_file, model)
-            file_results["model_results"][model] = result
-            
-            if result["success"]:
-                print(f"✅ {model:15s}: {result['processing_time']:6.2f}초, 출력 {result['text_length']:4d}자")
-            else:
-                error_msg = result.get("error", "알 수 없는 오류")
-                print(f"❌ {model:15s}: 실패 - {error_msg}")
+            for engine in engines:
+                result = run_whisper_test(audio_file, model, device, engine)
+                
+                # int8 정확도: 같은 모델 fp32 출력 대비 문자 오류율
+                baseline = file_results["model_results"].get(f"{model}/fp32")
+                if engine == "int8" and result["success"] and baseline and baseline["success"]:
+                    result["cer_vs_fp32"] = round(character_error_rate(baseline["output_text"], result["output_text"]), 4)
+                    result["speedup_vs_fp32"] = round(baseline["processing_time"] / max(result["processing_time"], 1e-6), 2)
+                
+                label = f"{model}/{engine}"
+                file_results["model_results"][label] = result
+                
+                if result["success"]:
+                    extra = ""
+                    if "cer_vs_fp32" in result:
+                        extra = f", fp32 대비 {result['speedup_vs_fp32']:.2f}배속, CER {result['cer_vs_fp32'] * 100:.1f}%"
+                    rtf = f"{result['realtime_factor']:.3f}" if result['realtime_factor'] is not None else "n/a"
+                    print(f"✅ {label:20s}: {result['processing_time']:6.2f}초 (RTF {rtf}), "
+                          f"출력 {result['text_length']:4d}자{extra}")
+                else:
+                    error_msg = result.get("error", "알 수 없는 오류")
+                    print(f"❌ {label:20s}: 실패 - {error_msg}")
         
         all_results.append(file_results)
     
@@ -163,16 +194,20 @@ def main():
     print("=" * 60)
     
     # 표 형태로 결과 출력
-    print(f"{'파일명':<25s} {'모델':<15s} {'시간(초)':<8s} {'텍스트길이':<10s}")
-    print("-" * 65)
+    print(f"{'파일명':<25s} {'모델/엔진':<20s} {'시간(초)':<8s} {'RTF':<7s} {'텍스트길이':<10s} {'CER(fp32 대비)':<10s}")
+    print("-" * 90)
     
     for file_result in all_results:
         filename = file_result["audio_file"]
         for model, result in file_result["model_results"].items():
             if result["success"]:
-                print(f"{filename:<25s} {model:<15s} {result['processing_time']:<8.2f} {result['text_length']:<10d}")
+                cer = f"{result['cer_vs_fp32'] * 100:.1f}%" if "cer_vs_fp32" in result else "-"
+                # 오디오 길이를 알 수 없으면 RTF가 None
+                rtf = f"{result['realtime_factor']:.3f}" if result['realtime_factor'] is not None else "n/a"
+                print(f"{filename:<25s} {model:<20s} {result['processing_time']:<8.2f} {rtf:<7s} "
+                      f"{result['text_length']:<10d} {cer:<10s}")
             else:
-                print(f"{filename:<25s} {model:<15s} {'실패':<8s} {'-':<10s}")
+                print(f"{filename:<25s} {model:<20s} {'실패':<8s} {'-':<7s} {'-':<10s} {'-':<10s}")
     
     # JSON 파일로 상세 결과 저장
     results_filename = f"whisper_performance_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -199,7 +234,7 @@ def main():
     sorted_speeds = sorted(avg_speeds.items(), key=lambda x: x[1])
     
     for i, (model, avg_time) in enumerate(sorted_speeds, 1):
-        print(f"{i}. {model:<15s}: {avg_time:.2f}초 평균")
+        print(f"{i}. {model:<20s}: {avg_time:.2f}초 평균")
 
 if __name__ == "__main__":
     main()
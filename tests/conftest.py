@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+테스트 공통 설정
+webapp 모듈은 패키지가 아니므로 import 경로에 추가하고,
+app 모듈은 모델/장치 없이 HTTP 전용(frontend) 모드로 임시 HOME 아래에서 import 한다.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'webapp'))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app 모듈 (작업 DB와 업로드/결과 폴더는 임시 폴더에 생성, torch/whisper는 import 하지 않음)"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('HOME', str(tmp_path_factory.mktemp('home')))
+        patch.setenv('WHISPER_ROLE', 'frontend')
+        import app
+    return app
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    """Flask 테스트 클라이언트
+
+    모델 서버 요청은 이 프로세스에서 처리하고, 스케줄러는 워커 없이 대기열만 동작하는 새 인스턴스로 바꾼다
+    (일반 대기열 2개, 묶음 대기열 4개). 작업이 실행되지 않으므로 완료된 작업은 테스트에서 직접 만든다.
+    """
+    monkeypatch.setattr(app_module, 'model_server_client', None)
+    monkeypatch.setattr(app_module, 'WHISPER_DEVICES', ['cpu'])
+    monkeypatch.setitem(app_module.DEVICE_ENGINES, 'cpu', 'int8')
+    scheduler = app_module.JobScheduler([], 1, max_queue_size=2, bulk_queue_size=4)
+    monkeypatch.setattr(app_module, 'scheduler', scheduler)
+    for method in ('queue_position', 'queue_positions', 'retry_after'):
+        monkeypatch.setitem(app_module.MODEL_SERVER_METHODS, method, getattr(scheduler, method))
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+def write_wav(path, seconds, sample_rate=16000):
+    """무음 16bit mono WAV 파일"""
+    import wave
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b'\0\0' * int(seconds * sample_rate))
+
+
+def make_completed_task(app, task_id, files, segments=None):
+    """결과 파일과 완료 상태를 직접 만든 작업 (files: {파일명: 내용})"""
+    output_dir = os.path.join(app.DATA_OUTPUT_PATH, task_id)
+    os.makedirs(output_dir, exist_ok=True)
+    for filename, content in files.items():
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(content)
+    if segments is not None:
+        app.write_transcript_index({'segments': segments, 'text': ''.join(s['text'] for s in segments)}, output_dir)
+    result_files = app.get_result_files(task_id)
+    app.update_task_status(task_id, 'completed', 100, '완료', files=result_files,
+                           previews=app.build_previews(result_files))
+    return output_dir
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""batch_decode: 윈도우 분할, 타임스탬프 토큰 -> 세그먼트 변환, 폴백 세그먼트 보정"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+import batch_decode
+
+SR = batch_decode.SAMPLE_RATE
+TIMESTAMP_BEGIN = 1000
+EOT = 999
+
+
+def speech_with_pauses(seconds, pause_every, pause_seconds=0.5):
+    """pause_every초마다 무음이 끼어 있는 잡음 신호"""
+    audio = np.random.default_rng(0).normal(0, 0.1, int(seconds * SR)).astype(np.float32)
+    for t in np.arange(pause_every, seconds, pause_every):
+        audio[int(t * SR):int((t + pause_seconds) * SR)] = 0
+    return audio
+
+
+def ts(seconds):
+    """시각 -> 타임스탬프 토큰"""
+    return TIMESTAMP_BEGIN + int(round(seconds / batch_decode.TIME_PRECISION))
+
+
+# 텍스트 토큰 0~25 -> 'a'~'z'
+tokenizer = SimpleNamespace(timestamp_begin=TIMESTAMP_BEGIN, eot=EOT,
+                            decode=lambda tokens: ''.join(chr(ord('a') + token) for token in tokens))
+
+
+def decoding_result(tokens, **fields):
+    values = dict(temperature=0.0, avg_logprob=-0.3, compression_ratio=1.2, no_speech_prob=0.01)
+    values.update(fields)
+    return SimpleNamespace(tokens=tokens, **values)
+
+
+def test_split_windows_covers_audio_without_gaps():
+    audio = speech_with_pauses(100, 20)
+    windows = batch_decode.split_windows(audio)
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert end == start
+    assert all(end - start <= 30 * SR for start, end in windows)
+
+
+def test_split_windows_cuts_inside_silence():
+    audio = speech_with_pauses(60, 22)
+    windows = batch_decode.split_windows(audio)
+    assert len(windows) == 3
+    for _, end in windows[:-1]:
+        assert not audio[end - SR // 100:end + SR // 100].any()
+
+
+def test_split_windows_short_and_empty_audio():
+    assert batch_decode.split_windows(np.zeros(5 * SR, dtype=np.float32)) == [(0, 5 * SR)]
+    assert batch_decode.split_windows(np.zeros(0, dtype=np.float32)) == []
+
+
+def test_window_segments_from_timestamp_pairs():
+    tokens = [ts(0), 0, 1, ts(1.0), ts(1.0), 2, ts(2.5)]
+    segments = batch_decode.window_segments(tokenizer, decoding_result(tokens), 10.0, 24.0)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(10.0, 11.0, 'ab'), (11.0, 12.5, 'c')]
+    assert all(s['seek'] == 1000 for s in segments)
+    assert segments[0]['tokens'] == [ts(0), 0, 1, ts(1.0)]
+
+
+def test_window_segments_unclosed_last_segment_runs_to_window_end():
+    tokens = [ts(0), 0, ts(1.0), ts(1.0), 1, 2]
+    segments = batch_decode.window_segments(tokenizer, decoding_result(tokens), 0.0, 5.0)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(0.0, 1.0, 'a'), (1.0, 5.0, 'bc')]
+
+
+def test_window_segments_single_timestamp_uses_it_as_duration():
+    tokens = [ts(0), 0, 1, ts(2.0)]
+    segments = batch_decode.window_segments(tokenizer, decoding_result(tokens), 3.0, 24.0)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(3.0, 5.0, 'ab')]
+
+
+def test_window_segments_drops_empty_text_and_clamps_to_window():
+    tokens = [ts(0), ts(0.5), ts(0.5), 0, ts(8.0)]
+    segments = batch_decode.window_segments(tokenizer, decoding_result(tokens), 0.0, 6.0)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(0.5, 6.0, 'a')]
+
+
+def test_shift_segments_clamps_fallback_segments_to_window():
+    # 20초 오디오의 5~23.985초 윈도우를 transcribe()로 다시 인식한 결과 (윈도우 기준 시각)
+    segments = [
+        {'start': 3.56, 'end': 19.38, 'seek': 0, 'text': 'a'},
+        {'start': 15.0, 'end': 21.1, 'seek': 0, 'text': 'b'},
+        {'start': 19.0, 'end': 20.0, 'seek': 0, 'text': 'c'},  # 윈도우 끝 이후 시작 -> 버림
+    ]
+    shifted = batch_decode.shift_segments(segments, 5.0, 23.985)
+    assert [(s['start'], s['end'], s['text']) for s in shifted] == [(8.56, 23.985, 'a'), (20.0, 23.985, 'b')]
+    assert all(s['seek'] == 500 for s in shifted)
+
+
+def test_fallback_follows_transcribe_quality_rules():
+    assert batch_decode.needs_fallback(decoding_result([], compression_ratio=3.0))
+    assert batch_decode.needs_fallback(decoding_result([], avg_logprob=-1.5))
+    assert not batch_decode.needs_fallback(decoding_result([]))
+    # 음성이 없을 가능성이 높으면 transcribe()처럼 다시 시도하지 않음
+    assert not batch_decode.needs_fallback(decoding_result([], avg_logprob=-1.5, no_speech_prob=0.9))
+    assert batch_decode.is_silence(decoding_result([], avg_logprob=-1.5, no_speech_prob=0.9))
+    assert not batch_decode.is_silence(decoding_result([], avg_logprob=-0.5, no_speech_prob=0.9))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""묶음 제출: 별도 대기열 순서, 일반 요청 합류 시 승격, 묶음 구성, /api/batch"""
+
+import io
+
+import pytest
+
+from conftest import write_wav
+
+
+@pytest.fixture
+def scheduler(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'SCHEDULER_AGING', 1.0)
+    monkeypatch.setattr(app_module, 'FAIR_SHARE_WEIGHT', 1.0)
+    return app_module.JobScheduler([], 1, max_queue_size=10, batch_max_size=3, bulk_queue_size=10)
+
+
+def job(task_id, duration, cache_key=None, batchable=False, model='tiny'):
+    return {'task_id': task_id, 'model': model, 'audio_duration': duration, 'client': None,
+            'cache_key': cache_key, 'batchable': batchable}
+
+
+def dispatch(scheduler):
+    """워커처럼 다음 작업과 함께 묶을 작업을 꺼냄"""
+    with scheduler._cond:
+        batch = [scheduler._next_job_locked('cpu')]
+        if batch[0]['batchable']:
+            scheduler._take_batch_locked(batch)
+    return [queued['task_id'] for queued in batch]
+
+
+def test_bulk_jobs_wait_behind_normal_queue(scheduler):
+    bulk = [job('bulk-long', 900), job('bulk-short', 10)]
+    assert scheduler.submit_bulk(bulk)
+    normal = job('normal', 600)
+    scheduler.submit(normal)
+    positions = scheduler.queue_positions(['normal', 'bulk-long', 'bulk-short'])
+    assert sorted(positions, key=positions.get) == ['normal', 'bulk-long', 'bulk-short']
+    assert [dispatch(scheduler) for _ in range(3)] == [['normal'], ['bulk-long'], ['bulk-short']]
+
+
+def test_interactive_request_promotes_waiting_bulk_leader(scheduler):
+    scheduler.submit_bulk([job('bulk-1', 60), job('bulk-2', 60, cache_key='same-file')])
+    follower = job('interactive', 60, cache_key='same-file')
+    assert scheduler.submit(follower)
+    assert follower['attached_to'] == 'bulk-2'
+    # 일반 대기열로 올라간 leader가 다른 묶음 작업보다 먼저 처리됨
+    assert scheduler.stats()['queued'] == 1 and scheduler.stats()['bulk_queued'] == 1
+    assert scheduler.queue_position('interactive') == 1
+    assert dispatch(scheduler) == ['bulk-2']
+
+
+def test_bulk_request_joining_bulk_leader_stays_in_bulk_queue(scheduler):
+    scheduler.submit_bulk([job('bulk-1', 60, cache_key='same-file')])
+    scheduler.submit_bulk([job('bulk-2', 60, cache_key='same-file')])
+    assert scheduler.stats()['queued'] == 0 and scheduler.stats()['bulk_queued'] == 1
+
+
+def test_batch_companions_come_from_same_queue_in_score_order(scheduler):
+    scheduler.submit_bulk([job('bulk-short', 5, batchable=True)])
+    for task_id, duration in (('n-60', 60), ('n-30', 30), ('n-10', 10), ('n-20', 20)):
+        scheduler.submit(job(task_id, duration, batchable=True))
+    scheduler.submit(job('n-other-model', 1, batchable=True, model='base'))
+    # 일반 작업 묶음에는 묶음 제출 작업을 섞지 않고, 같은 점수 순서(짧은 것 먼저)로 채움
+    assert dispatch(scheduler) == ['n-other-model']
+    assert dispatch(scheduler) == ['n-10', 'n-20', 'n-30']
+    assert dispatch(scheduler) == ['n-60']
+    assert dispatch(scheduler) == ['bulk-short']
+
+
+def wav_file(tmp_path, name, seconds=1):
+    path = tmp_path / name
+    write_wav(path, seconds)
+    return (io.BytesIO(path.read_bytes()), name)
+
+
+def test_api_batch_queues_items_and_reports_status(client, tmp_path):
+    response = client.post('/api/batch', data={
+        'model': 'tiny', 'formats': 'txt',
+        'audio': [wav_file(tmp_path, 'a.wav'), wav_file(tmp_path, 'b.wav', 2), (io.BytesIO(b'x'), 'notes.pdf')]
+    }, content_type='multipart/form-data')
+    body = response.get_json()
+    assert response.status_code == 200 and body['success']
+    assert (body['total'], body['queued'], body['cached']) == (2, 2, 0)
+    assert body['skipped'][0]['source'] == 'notes.pdf'
+
+    status = client.get(body['status_url']).get_json()
+    assert status['counts']['queued'] == 2 and not status['done']
+    # 긴 항목부터 등록
+    assert [(item['filename'], item['queue_position']) for item in status['items']] == [('a.wav', 2), ('b.wav', 1)]
+    assert client.get(body['download_url']).status_code == 409
+
+
+def test_api_batch_rejects_when_bulk_queue_is_full(client, tmp_path):
+    # 같은 내용이면 하나의 작업에 합류하므로 길이를 달리함
+    files = [wav_file(tmp_path, f'{index}.wav', index + 1) for index in range(5)]
+    response = client.post('/api/batch', data={'model': 'tiny', 'formats': 'txt', 'audio': files},
+                           content_type='multipart/form-data')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_api_batch_validation(client):
+    assert client.post('/api/batch', json={'model': 'huge', 'paths': ['a.wav']}).status_code == 400
+    assert client.post('/api/batch', json={'model': 'tiny'}).status_code == 400
+    assert client.get('/api/batch/batch_unknown').status_code == 404
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""ChunkedUploadStore: 조각 위치 검사(건너뜀/재전송/겹침)와 누적 해시"""
+
+import hashlib
+
+import pytest
+
+
+@pytest.fixture
+def upload(app_module):
+    store = app_module.chunked_uploads
+    created = store.create('meeting.wav', 10)
+    yield store, created['upload_id']
+    store.discard(created['upload_id'])
+
+
+def test_chunks_must_continue_from_received_offset(upload):
+    store, upload_id = upload
+    assert store.write_chunk(upload_id, 0, b'abcd') == 4
+    with pytest.raises(ValueError):
+        store.write_chunk(upload_id, 6, b'gh')  # 4~6 바이트를 건너뜀
+    assert store.get(upload_id)['received'] == 4
+
+
+def test_resent_and_overlapping_chunks_are_trimmed(upload):
+    store, upload_id = upload
+    store.write_chunk(upload_id, 0, b'abcd')
+    assert store.write_chunk(upload_id, 0, b'ab') == 4  # 이미 받은 범위 재전송
+    assert store.write_chunk(upload_id, 2, b'cdefgh') == 8  # 앞 2바이트가 겹침
+    with pytest.raises(ValueError):
+        store.write_chunk(upload_id, 8, b'ijk')  # 선언한 크기를 넘음
+    assert store.write_chunk(upload_id, 8, b'ij') == 10
+    with open(store.get(upload_id)['path'], 'rb') as f:
+        assert f.read() == b'abcdefghij'
+    assert store.checksum(upload_id) == hashlib.sha256(b'abcdefghij').hexdigest()
+
+
+def test_write_to_discarded_upload_returns_none(upload):
+    store, upload_id = upload
+    store.discard(upload_id)
+    assert store.write_chunk(upload_id, 0, b'abcd') is None
+
+
+def test_chunk_route_returns_404_when_upload_disappears(app_module, client, monkeypatch):
+    created = app_module.chunked_uploads.create('gone.wav', 4)
+    upload_id = created['upload_id']
+    write_chunk = app_module.chunked_uploads.write_chunk
+
+    def discard_first(upload_id, offset, data):
+        # 조각을 받는 사이 업로드가 정리된 경우
+        app_module.chunked_uploads.discard(upload_id)
+        return write_chunk(upload_id, offset, data)
+
+    monkeypatch.setattr(app_module.chunked_uploads, 'write_chunk', discard_first)
+    response = client.put(f'/api/upload/{upload_id}?offset=0', data=b'abcd')
+    assert response.status_code == 404 and response.get_json()['success'] is False
+    assert client.put('/api/upload/no-such-upload?offset=0', data=b'abcd').status_code == 404
+
+
+def test_chunk_route_reports_offset_conflict(client):
+    upload_id = client.post('/api/upload/init', json={'filename': 'meeting.wav', 'size': 8}).get_json()['upload_id']
+    assert client.put(f'/api/upload/{upload_id}?offset=0', data=b'abcd').get_json()['received'] == 4
+    response = client.put(f'/api/upload/{upload_id}?offset=6', data=b'gh')
+    assert response.status_code == 409 and response.get_json()['received'] == 4
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""JobScheduler single-flight: 같은 캐시 키의 작업은 대기열 자리를 쓰지 않고 진행 중인 작업에 합류"""
+
+import pytest
+
+
+@pytest.fixture
+def scheduler(app_module):
+    # 장치가 없으므로 워커 스레드 없이 대기열만 동작
+    return app_module.JobScheduler([], 1, max_queue_size=2, bulk_queue_size=10)
+
+
+def job(task_id, cache_key):
+    return {'task_id': task_id, 'model': 'tiny', 'audio_duration': 10, 'client': None,
+            'cache_key': cache_key, 'batchable': False}
+
+
+def test_queue_limit_rejects_but_identical_job_joins(scheduler):
+    assert scheduler.submit(job('first', 'k1'))
+    assert scheduler.submit(job('second', 'k2'))
+    assert not scheduler.submit(job('third', 'k3'))
+    follower = job('same', 'k1')
+    assert scheduler.submit(follower)
+    assert follower['attached_to'] == 'first'
+    assert scheduler.queue_positions(['same', 'first'])['same'] == scheduler.queue_position('first')
+    assert scheduler.retry_after() > 0
+
+
+def test_follower_inherits_leader_status(app_module, scheduler):
+    scheduler.submit(job('c-leader', 'k-status'))
+    app_module.update_task_status('c-leader', 'processing', 40, '분석 중...', stage='transcribe')
+    scheduler.submit(job('c-follower', 'k-status'))
+    status = app_module.get_task_status('c-follower')
+    assert (status['status'], status['progress'], status['stage']) == ('processing', 40, 'transcribe')
+    assert status['attached_to'] == 'c-leader'
+
+
+def test_follower_status_is_written_before_it_is_visible_to_leader(app_module, scheduler, monkeypatch):
+    """합류한 작업이 followers에 보인 뒤 상태를 쓰면 그 사이 끝난 leader의 완료 상태를 덮어쓸 수 있음"""
+    leader = job('c-race-leader', 'k-race')
+    scheduler.submit(leader)
+    update_task_status = app_module.update_task_status
+    visible_at_write = []
+
+    def record(task_id, *args, **kwargs):
+        if task_id == 'c-race-follower':
+            visible_at_write.append(any(f['task_id'] == task_id for f in leader['followers']))
+        return update_task_status(task_id, *args, **kwargs)
+
+    monkeypatch.setattr(app_module, 'update_task_status', record)
+    scheduler.submit(job('c-race-follower', 'k-race'))
+    assert visible_at_write == [False]
+    # leader 종료 후에는 같은 키로 새 작업이 시작됨
+    assert [f['task_id'] for f in scheduler.release_followers(leader)] == ['c-race-follower']
+    assert scheduler.submit(job('c-race-next', 'k-race'))
+    assert scheduler.queue_position('c-race-next') is not None
+
+
+def test_bulk_jobs_join_each_other_and_inflight_jobs(scheduler):
+    scheduler.submit(job('c-running', 'k-a'))
+    bulk = [job('c-bulk-1', 'k-a'), job('c-bulk-2', 'k-b'), job('c-bulk-3', 'k-b')]
+    assert scheduler.submit_bulk(bulk)
+    assert [j.get('attached_to') for j in bulk] == ['c-running', None, 'c-bulk-2']
+    assert scheduler.stats()['bulk_queued'] == 1
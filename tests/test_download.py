@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""개별 결과 파일 다운로드: ETag/304, Range, br/gzip 압축본, 오류 응답"""
+
+import gzip
+
+import pytest
+
+from conftest import make_completed_task
+
+LONG_TEXT = '가나다라마바사아자차카타파하\n' * 200
+
+
+@pytest.fixture
+def task(app_module):
+    make_completed_task(app_module, 'download-task', {'result.txt': LONG_TEXT, 'short.srt': '1\n'})
+    return 'download-task'
+
+
+def test_etag_and_not_modified(client, task):
+    response = client.get(f'/download/{task}/result.txt', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200 and response.data.decode('utf-8') == LONG_TEXT
+    etag = response.headers['ETag']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    again = client.get(f'/download/{task}/result.txt', headers={'If-None-Match': etag, 'Accept-Encoding': 'identity'})
+    assert again.status_code == 304
+
+
+def test_range_request_resumes_download(client, task):
+    response = client.get(f'/download/{task}/result.txt', headers={'Range': 'bytes=10-19', 'Accept-Encoding': 'identity'})
+    assert response.status_code == 206
+    assert response.data == LONG_TEXT.encode('utf-8')[10:20]
+
+
+def test_gzip_variant_has_its_own_etag(client, task):
+    plain = client.get(f'/download/{task}/result.txt', headers={'Accept-Encoding': 'identity'})
+    response = client.get(f'/download/{task}/result.txt', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).decode('utf-8') == LONG_TEXT
+    assert response.headers['ETag'] != plain.headers['ETag']
+
+
+def test_brotli_variant_is_preferred(client, task):
+    brotli = pytest.importorskip('brotli')
+    response = client.get(f'/download/{task}/result.txt', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).decode('utf-8') == LONG_TEXT
+
+
+def test_small_files_are_sent_uncompressed(client, task):
+    response = client.get(f'/download/{task}/short.srt', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200 and 'Content-Encoding' not in response.headers
+
+
+def test_missing_or_hidden_file_returns_json_error(client, task):
+    response = client.get(f'/download/{task}/missing.txt')
+    assert response.status_code == 404 and response.get_json()['success'] is False
+    assert client.get('/download/no-such-task/result.txt').get_json()['success'] is False
+    assert client.get(f'/download/{task}/.compressed').status_code == 400
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""/api/events SSE 스트림과 단일 작업 진행률 (whisper transcribe() 진행바 연결)"""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+
+
+def parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        for message in text.split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in message.splitlines() if not line.startswith(':'))
+            if 'event' in lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_finished_task_sends_status_and_closes(app_module, client):
+    app_module.update_task_status('sse-done', 'completed', 100, '완료')
+    response = client.get('/api/events/sse-done')
+    assert response.mimetype == 'text/event-stream'
+    assert [(event, data['status']) for event, data in parse_events([response.data])] == [('status', 'completed')]
+
+
+def test_stream_pushes_progress_segments_and_final_status(app_module, client):
+    app_module.update_task_status('sse-live', 'processing', 10, '분석 중...')
+    response = client.get('/api/events/sse-live', buffered=False)
+    chunks = response.response
+    first = parse_events([next(chunks)])  # 이 시점에 구독이 시작됨
+    app_module.update_task_status('sse-live', 'processing', 50, '분석 중...')
+    app_module.publish_segments({'task_id': 'sse-live'}, [{'id': 0, 'start': 0.0, 'end': 1.234, 'text': '안녕'}])
+    app_module.update_task_status('sse-live', 'completed', 100, '완료')
+    events = first + parse_events(chunks)
+    assert [(event, data.get('status'), data.get('progress')) for event, data in events] == [
+        ('status', 'processing', 10),
+        ('progress', 'processing', 50),
+        ('segment', None, None),
+        ('status', 'completed', 100),
+    ]
+    assert events[2][1] == {'id': 0, 'start': 0.0, 'end': 1.23, 'text': '안녕'}
+    response.close()
+
+
+def test_unknown_task_reports_not_found(client):
+    events = parse_events([client.get('/api/events/no-such-task').data])
+    assert events[0][1]['status'] == 'not_found'
+
+
+def tiny_whisper():
+    torch = pytest.importorskip('torch')
+    whisper_model = pytest.importorskip('whisper.model')
+    torch.manual_seed(0)
+    dims = whisper_model.ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2,
+                                         n_audio_layer=1, n_vocab=51865, n_text_ctx=448, n_text_state=64,
+                                         n_text_head=2, n_text_layer=1)
+    model = whisper_model.Whisper(dims)
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.02)
+    return model
+
+
+def test_transcribe_with_progress_matches_transcribe(app_module):
+    """임의 가중치의 작은 모델로 진행 콜백 결과가 model.transcribe()와 같은지, whisper 모듈은 그대로인지 확인"""
+    model = tiny_whisper()
+    audio = np.random.default_rng(0).normal(0, 0.1, 45 * 16000).astype(np.float32)
+    options = dict(language='ko', fp16=False, temperature=0.0, sample_len=20)
+    updates = []
+    result = app_module.transcribe_with_progress(model, audio, lambda *update: updates.append(update), **options)
+    assert result == model.transcribe(audio, verbose=None, **options)
+    assert updates and all(total == 4500 for _, total in updates)
+    assert [frames for frames, _ in updates] == sorted(frames for frames, _ in updates)
+    assert sys.modules['whisper.transcribe'].tqdm.__name__ == 'tqdm'
+
+
+def test_decode_progress_is_reported_in_audio_seconds(app_module, monkeypatch):
+    reports = []
+    monkeypatch.setattr(app_module, 'update_job_status', lambda job, status, progress, message, **extra:
+                        reports.append((progress, extra.get('processed_seconds'))))
+    progress = app_module.TaskProgress({'task_id': 'progress-task', 'model': 'tiny'})
+    progress.audio_duration = 60.0
+    progress.enter('transcribe')
+    progress.on_decode(3000, 6000)
+    start, end, _ = app_module.TASK_STAGES['transcribe']
+    assert reports[-1] == (round(start + (end - start) / 2, 1), 30.0)
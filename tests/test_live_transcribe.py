@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""live_transcribe: LocalAgreement-2 확정 규칙과 슬라이딩 윈도우 버퍼, /ws/stream 세션 자리 반납"""
+
+import numpy as np
+import pytest
+
+import live_transcribe
+
+SR = live_transcribe.SAMPLE_RATE
+
+
+def words(*items):
+    """('텍스트', 시작 초) 목록 -> 0.5초 길이 단어 튜플"""
+    return [(start, start + 0.5, text) for text, start in items]
+
+
+def test_first_hypothesis_is_not_committed():
+    buffer = live_transcribe.HypothesisBuffer()
+    buffer.insert(words(('안녕', 0.0), ('하세요', 0.6)))
+    assert buffer.flush() == []
+    assert [word[2] for word in buffer.pending] == ['안녕', '하세요']
+
+
+def test_common_prefix_of_two_hypotheses_is_committed():
+    buffer = live_transcribe.HypothesisBuffer()
+    buffer.insert(words(('오늘', 0.0), ('회의', 0.6), ('는', 1.2)))
+    buffer.flush()
+    buffer.insert(words(('오늘', 0.0), ('회의', 0.6), ('를', 1.2), ('시작', 1.8)))
+    commit = buffer.flush()
+    assert [word[2] for word in commit] == ['오늘', '회의']
+    assert buffer.last_committed_time == 1.1
+    # 달라진 단어부터는 다음 가설과 다시 비교
+    assert [word[2] for word in buffer.pending] == ['를', '시작']
+
+
+def test_words_before_commit_point_and_repeated_tail_are_dropped():
+    buffer = live_transcribe.HypothesisBuffer()
+    for _ in range(2):
+        buffer.insert(words(('가', 0.0), ('나', 0.6)))
+        buffer.flush()
+    assert [word[2] for word in buffer.committed] == ['가', '나']
+    # 버퍼를 자른 뒤 다시 인식하면 확정 지점 근처에서 '나'가 다시 나올 수 있음 -> n-gram 중복 제거
+    buffer.insert(words(('가', 0.2), ('나', 1.05), ('다', 1.7)))
+    assert [word[2] for word in buffer._new] == ['다']
+
+
+def test_force_commit_and_drop_committed_before():
+    buffer = live_transcribe.HypothesisBuffer()
+    buffer.insert(words(('하나', 0.0), ('둘', 1.0)))
+    buffer.flush()
+    assert [word[2] for word in buffer.force_commit()] == ['하나', '둘']
+    assert buffer.pending == []
+    assert buffer.last_committed_time == 1.5
+    buffer.drop_committed_before(0.5)
+    assert [word[2] for word in buffer.committed] == ['둘']
+
+
+def test_online_transcriber_commits_stable_words_in_stream_time():
+    hypotheses = iter([
+        [(0.0, 0.5, 'A'), (0.6, 1.0, 'B')],
+        [(0.0, 0.5, 'A'), (0.6, 1.0, 'B'), (1.2, 1.6, 'C')],
+        [(0.0, 0.5, 'A'), (0.6, 1.0, 'B'), (1.2, 1.6, 'C'), (1.8, 2.0, 'D')],
+    ])
+    online = live_transcribe.OnlineTranscriber(lambda audio, prompt: next(hypotheses), trim_seconds=15)
+    online.insert_audio(np.zeros(SR, dtype=np.float32))
+    assert online.process() == ([], [(0.0, 0.5, 'A'), (0.6, 1.0, 'B')])
+    online.insert_audio(np.zeros(SR, dtype=np.float32))
+    commit, pending = online.process()
+    assert [word[2] for word in commit] == ['A', 'B']
+    assert [word[2] for word in pending] == ['C']
+    online.insert_audio(np.zeros(SR // 2, dtype=np.float32))
+    assert [word[2] for word in online.finish()] == ['C', 'D']
+    assert [word[2] for word in online.committed] == ['A', 'B', 'C', 'D']
+
+
+def test_online_transcriber_trims_buffer_at_last_commit():
+    hypothesis = [(0.0, 0.5, 'A'), (15.5, 16.0, 'B')]
+    online = live_transcribe.OnlineTranscriber(lambda audio, prompt: hypothesis, trim_seconds=15,
+                                               max_buffer_seconds=25)
+    online.insert_audio(np.zeros(17 * SR, dtype=np.float32))
+    online.process()
+    online.insert_audio(np.zeros(SR, dtype=np.float32))
+    commit, _ = online.process()
+    assert [word[2] for word in commit] == ['A', 'B']
+    assert online.buffer_offset == 16.0
+    assert online.buffered_seconds == 2.0
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def receive(self, timeout=None):
+        return None
+
+
+def test_stream_session_slot_is_released_when_setup_fails(app_module, monkeypatch):
+    if 'ws_stream' not in app_module.app.view_functions:
+        pytest.skip('flask-sock 미설치')
+    ws_stream = app_module.app.view_functions['ws_stream'].__wrapped__
+
+    def missing_ffmpeg():
+        raise FileNotFoundError('ffmpeg')
+
+    monkeypatch.setattr(app_module.shutil, 'which', lambda name: '/usr/bin/' + name)
+    monkeypatch.setattr(live_transcribe, 'FfmpegFrameReader', missing_ffmpeg)
+    for _ in range(app_module.STREAM_MAX_SESSIONS + 1):
+        with app_module.app.test_request_context('/ws/stream?model=tiny&format=webm'):
+            with pytest.raises(FileNotFoundError):
+                ws_stream(FakeWebSocket())
+    # 실패한 세션마다 자리가 반납되어 최대 세션 수만큼 다시 받을 수 있음
+    sessions = app_module.stream_sessions
+    assert all(sessions.acquire(blocking=False) for _ in range(app_module.STREAM_MAX_SESSIONS))
+    for _ in range(app_module.STREAM_MAX_SESSIONS):
+        sessions.release()
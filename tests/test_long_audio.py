@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""long_audio: 조각 분할 계획과 겹치는 구간 세그먼트 선택(중앙 시각 기준), 병렬 프로세스 수의 메모리 상한"""
+
+import numpy as np
+
+import long_audio
+
+SR = long_audio.SAMPLE_RATE
+
+
+def noise(seconds):
+    return np.random.default_rng(1).normal(0, 0.1, int(seconds * SR)).astype(np.float32)
+
+
+def segment(start, end, text, **fields):
+    return dict({'id': 0, 'seek': 0, 'start': start, 'end': end, 'text': text}, **fields)
+
+
+def test_plan_chunks_keep_ranges_tile_audio_with_overlap():
+    audio = noise(700)
+    chunks = long_audio.plan_chunks(audio, 300, 2.0)
+    assert [chunk['index'] for chunk in chunks] == list(range(len(chunks)))
+    assert len(chunks) == 3  # 약 300초, 600초 지점에서 분할
+    assert chunks[0]['keep_start'] == 0
+    assert chunks[-1]['keep_end'] == len(audio)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous['keep_end'] == chunk['keep_start']
+    for chunk in chunks:
+        assert chunk['start'] == max(0, chunk['keep_start'] - 2 * SR)
+        assert chunk['end'] == min(len(audio), chunk['keep_end'] + 2 * SR)
+
+
+def test_plan_chunks_short_audio_is_one_chunk():
+    audio = noise(30)
+    assert long_audio.plan_chunks(audio, 300, 2.0) == [
+        {'index': 0, 'start': 0, 'end': len(audio), 'keep_start': 0, 'keep_end': len(audio)}
+    ]
+
+
+def test_chunk_segments_keeps_segments_whose_middle_is_in_range():
+    chunk = {'index': 1, 'start': 8 * SR, 'end': 42 * SR, 'keep_start': 10 * SR, 'keep_end': 40 * SR}
+    result = {'segments': [
+        segment(0.0, 3.0, 'before'),  # 8~11초, 중앙 9.5초 -> 앞 조각 몫
+        segment(1.0, 5.0, 'first'),  # 9~13초, 중앙 11초
+        segment(30.0, 33.0, 'last', words=[{'word': 'last', 'start': 30.5, 'end': 32.0}]),  # 38~41초, 중앙 39.5초
+        segment(31.0, 33.0, 'edge'),  # 39~41초, 중앙 40초 -> 뒤 조각 몫 (끝은 포함하지 않음)
+    ]}
+    segments = long_audio.chunk_segments(chunk, result)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [(9.0, 13.0, 'first'), (38.0, 41.0, 'last')]
+    assert all(s['seek'] == 800 for s in segments)
+    assert segments[1]['words'] == [{'word': 'last', 'start': 38.5, 'end': 40.0}]
+
+
+def test_stitch_results_drops_overlap_duplicates_and_renumbers():
+    chunks = [
+        {'index': 0, 'start': 0, 'end': 12 * SR, 'keep_start': 0, 'keep_end': 10 * SR},
+        {'index': 1, 'start': 8 * SR, 'end': 20 * SR, 'keep_start': 10 * SR, 'keep_end': 20 * SR},
+    ]
+    results = [
+        {'language': 'ko', 'segments': [segment(0.0, 5.0, 'a'), segment(9.0, 12.0, 'b')]},
+        {'language': 'ko', 'segments': [segment(1.0, 4.0, 'b'), segment(4.0, 9.0, 'c')]},
+    ]
+    stitched = long_audio.stitch_results(chunks, results)
+    assert [(s['id'], s['start'], s['text']) for s in stitched['segments']] == [(0, 0.0, 'a'), (1, 9.0, 'b'), (2, 12.0, 'c')]
+    assert stitched['text'] == 'abc'
+    assert stitched['language'] == 'ko'
+
+
+def test_worker_processes_fit_in_memory_budget(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.DEVICE_ENGINES, 'cpu', 'int8')
+    pool = app_module.LongAudioProcessPool('cpu', 4, 3072, idle_timeout=3600)
+    # 프로세스마다 모델을 한 벌씩 올리므로 3GB 안에 들어가는 수만큼 (추정치: small 355MB, turbo 990MB, large-v3 1690MB)
+    assert pool.workers_for('small') == 4
+    assert pool.workers_for('large-v3-turbo') == 3
+    assert pool.workers_for('large-v3') == 1  # 2개 미만이면 병렬 인식하지 않음
+
+    # 상주 풀에서 로딩해 본 모델은 실제 크기 기준
+    model_pool = app_module.WhisperModelPool('cpu', 1024, idle_timeout=3600)
+    model_pool._known_sizes['large-v3'] = 1000 * 1024 * 1024
+    monkeypatch.setitem(app_module.model_pools, 'cpu', model_pool)
+    assert pool.workers_for('large-v3') == 3
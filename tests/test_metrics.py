@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""metrics: Prometheus 텍스트 노출 형식 출력"""
+
+import metrics
+
+
+def rendered_lines(registry):
+    return registry.render().splitlines()
+
+
+def test_counter_renders_help_type_and_sorted_label_sets():
+    registry = metrics.Registry()
+    jobs = registry.counter('jobs_total', '처리한 작업 수', ('model', 'result'))
+    jobs.inc(model='tiny', result='ok')
+    jobs.inc(2, model='small', result='ok')
+    jobs.inc(model='tiny', result='ok')
+    assert rendered_lines(registry) == [
+        '# HELP jobs_total 처리한 작업 수',
+        '# TYPE jobs_total counter',
+        'jobs_total{model="small",result="ok"} 2',
+        'jobs_total{model="tiny",result="ok"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_inf_sum_and_count():
+    registry = metrics.Registry()
+    wait = registry.histogram('wait_seconds', '대기 시간', buckets=(1, 5))
+    for value in (0.5, 3, 3, 10):
+        wait.observe(value)
+    assert rendered_lines(registry)[2:] == [
+        'wait_seconds_bucket{le="1"} 1',
+        'wait_seconds_bucket{le="5"} 3',
+        'wait_seconds_bucket{le="+Inf"} 4',
+        'wait_seconds_sum 16.5',
+        'wait_seconds_count 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = metrics.Registry()
+    registry.counter('files_total', '파일 수', ('name',)).inc(name='a"b\\c\nd')
+    assert rendered_lines(registry)[-1] == 'files_total{name="a\\"b\\\\c\\nd"} 1'
+
+
+def test_callback_values_skip_none_and_failures_do_not_break_render():
+    registry = metrics.Registry()
+    registry.callback('queue_depth', '대기 작업 수', lambda: 3)
+    registry.callback('broken', '계산 실패', lambda: 1 / 0)
+    registry.callback('cache_lookups_total', '캐시 조회 수',
+                      lambda: {('transcript', 'hit'): 5.0, ('pcm', 'hit'): None}, ('cache', 'result'),
+                      type_name='counter')
+    assert rendered_lines(registry) == [
+        '# HELP queue_depth 대기 작업 수',
+        '# TYPE queue_depth gauge',
+        'queue_depth 3',
+        '# HELP cache_lookups_total 캐시 조회 수',
+        '# TYPE cache_lookups_total counter',
+        'cache_lookups_total{cache="transcript",result="hit"} 5',
+    ]
+
+
+def test_metrics_endpoint_serves_exposition_format(client):
+    client.post('/api/upload/init', json={'filename': 'meeting.wav', 'size': 8})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE' in response.get_data(as_text=True)
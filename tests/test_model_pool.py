@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""WhisperModelPool: 모델 재사용, 메모리 상한 LRU 해제, 사용 중 모델 보호, 미사용 해제"""
+
+import pytest
+
+MB = 1024 * 1024
+MODEL_SIZES = {'tiny': 40, 'base': 60, 'small': 70}
+
+
+@pytest.fixture
+def pool(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.DEVICE_ENGINES, 'cpu', 'fp32')
+    monkeypatch.setattr(app_module.whisper_engine, 'model_size_bytes', lambda model: model['size'])
+    pool = app_module.WhisperModelPool('cpu', 100, idle_timeout=3600)
+    pool.loads = []
+
+    def load(name):
+        pool.loads.append(name)
+        return {'name': name, 'size': MODEL_SIZES[name] * MB}
+
+    monkeypatch.setattr(pool, '_load', load)
+    return pool
+
+
+def loaded(pool):
+    return [entry['model'] for entry in pool.stats() if entry['loaded']]
+
+
+def test_model_is_loaded_once_and_reused(pool):
+    for _ in range(2):
+        with pool.acquire('tiny') as model:
+            assert model['name'] == 'tiny'
+    assert pool.loads == ['tiny']
+
+
+def test_least_recently_used_model_is_evicted_over_budget(pool):
+    for name in ('tiny', 'base', 'tiny', 'small'):
+        with pool.acquire(name):
+            pass
+    # tiny(40) + base(60) + small(70) > 100MB -> 가장 오래 쓰지 않은 base, 그다음 tiny 해제
+    assert loaded(pool) == ['small']
+    assert pool.loads == ['tiny', 'base', 'small']
+
+
+def test_model_in_use_is_not_evicted(pool):
+    with pool.acquire('base'):
+        with pool.acquire('small'):
+            assert loaded(pool) == ['base', 'small']
+    with pool.acquire('tiny'):
+        pass
+    assert 'base' not in loaded(pool)
+
+
+def test_idle_models_are_unloaded(pool):
+    with pool.acquire('tiny'):
+        pass
+    pool.idle_timeout = 0
+    pool.unload_idle()
+    assert loaded(pool) == []
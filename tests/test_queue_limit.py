@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""대기열 상한: 가득 차면 429 + Retry-After, 같은 파일은 자리 없이 합류, 대기 순번 표시"""
+
+import io
+import os
+
+from conftest import write_wav
+
+
+def wav_upload(tmp_path, seconds):
+    path = tmp_path / f'{seconds}s.wav'
+    write_wav(path, seconds)
+    return (io.BytesIO(path.read_bytes()), path.name)
+
+
+def transcribe(client, tmp_path, seconds):
+    return client.post('/api/transcribe', data={'model': 'tiny', 'formats': 'txt', 'audio': wav_upload(tmp_path, seconds)},
+                       content_type='multipart/form-data')
+
+
+def test_api_transcribe_returns_429_with_retry_after_when_queue_is_full(app_module, client, tmp_path):
+    first, second = transcribe(client, tmp_path, 1).get_json(), transcribe(client, tmp_path, 2).get_json()
+    assert first['success'] and second['success']
+    assert client.get(first['status_url']).get_json()['queue_position'] in (1, 2)
+
+    response = transcribe(client, tmp_path, 3)
+    body = response.get_json()
+    assert response.status_code == 429 and body['success'] is False
+    assert response.headers['Retry-After'] == str(body['retry_after']) and body['retry_after'] >= 1
+
+    # 같은 파일은 대기열 자리를 쓰지 않고 진행 중인 작업에 합류
+    joined = transcribe(client, tmp_path, 1)
+    assert joined.status_code == 200
+    assert app_module.get_task_status(joined.get_json()['task_id'])['attached_to'] == first['task_id']
+
+
+def test_rejected_upload_is_cleaned_up(app_module, client, tmp_path):
+    transcribe(client, tmp_path, 1)
+    transcribe(client, tmp_path, 2)
+    before = set(os.listdir(app_module.UPLOAD_FOLDER))
+    assert transcribe(client, tmp_path, 3).status_code == 429
+    assert set(os.listdir(app_module.UPLOAD_FOLDER)) == before
+
+
+def test_web_form_returns_429_with_retry_after(client, tmp_path):
+    for seconds in (1, 2):
+        assert client.post('/process', data={'model': 'tiny', 'formats': ['txt'], 'file': wav_upload(tmp_path, seconds)},
+                           content_type='multipart/form-data').get_json()['success']
+    response = client.post('/process', data={'model': 'tiny', 'formats': ['txt'], 'file': wav_upload(tmp_path, 3)},
+                           content_type='multipart/form-data')
+    assert response.status_code == 429 and int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['message']
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""RetentionJanitor: 보존 기한/용량 상한 정리, 고정/진행 중 작업 보호, /api/tasks/<id>/pin"""
+
+import os
+import time
+
+import pytest
+
+from conftest import make_completed_task
+
+DAY = 86400
+
+
+def age(path, seconds):
+    """파일(폴더면 안의 파일까지) 수정 시각을 seconds만큼 과거로"""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            os.utime(os.path.join(root, filename), (mtime, mtime))
+        os.utime(root, (mtime, mtime))
+
+
+@pytest.fixture
+def janitor(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'RESULT_TTL_DAYS', 30)
+    return app_module.RetentionJanitor(3600)
+
+
+def test_expired_results_are_removed_unless_pinned_or_running(app_module, client, janitor):
+    expired = make_completed_task(app_module, 'keep-expired', {'result.txt': 'a'})
+    pinned = make_completed_task(app_module, 'keep-pinned', {'result.txt': 'b'})
+    running = make_completed_task(app_module, 'keep-running', {'result.txt': 'c'})
+    recent = make_completed_task(app_module, 'keep-recent', {'result.txt': 'd'})
+    app_module.update_task_status('keep-running', 'processing', 50, '분석 중...')
+    assert client.post('/api/tasks/keep-pinned/pin').get_json()['pinned'] is True
+    for path in (expired, pinned, running):
+        age(path, 31 * DAY)
+
+    janitor.run_once()
+    assert not os.path.exists(expired)
+    assert app_module.get_task_status('keep-expired')['status'] == 'not_found'
+    assert all(os.path.isdir(path) for path in (pinned, running, recent))
+    stats = janitor.stats()
+    assert stats['runs'] == 1 and stats['reclaimed_items']['outputs'] == 1
+
+    assert client.delete('/api/tasks/keep-pinned/pin').get_json()['pinned'] is False
+    janitor.run_once()
+    assert not os.path.exists(pinned)
+    assert client.post('/api/tasks/keep-pinned/pin').status_code == 404
+
+
+def test_oldest_results_are_removed_over_quota(app_module, janitor, monkeypatch):
+    paths = [make_completed_task(app_module, f'quota-{index}', {'result.txt': 'x' * 1024 * 1024})
+             for index in range(3)]
+    for index, path in enumerate(paths):
+        age(path, (3 - index) * 3600)  # quota-0이 가장 오래됨
+    usage = sum(app_module.directory_usage(os.path.join(app_module.DATA_OUTPUT_PATH, name))[0]
+                for name in os.listdir(app_module.DATA_OUTPUT_PATH) if not name.startswith(('_', 'tasks.db')))
+    # 1MB 결과 하나만 지우면 상한 안으로 들어오도록
+    monkeypatch.setattr(app_module, 'OUTPUT_QUOTA_MB', usage / (1024 * 1024) - 0.5)
+    janitor.run_once()
+    assert [os.path.isdir(path) for path in paths] == [False, True, True]
+
+
+def test_zip_cache_of_removed_task_is_deleted(app_module, client, janitor):
+    output_dir = make_completed_task(app_module, 'zip-orphan', {'result.txt': 'a'})
+    client.get('/download_all/zip-orphan').get_data()
+    cached = [name for name in os.listdir(app_module.ZIP_CACHE_FOLDER) if name.startswith('zip-orphan-')]
+    assert len(cached) == 1
+    age(os.path.join(app_module.ZIP_CACHE_FOLDER, cached[0]), 3600)
+    janitor.run_once()
+    assert os.path.exists(os.path.join(app_module.ZIP_CACHE_FOLDER, cached[0]))
+
+    age(output_dir, 31 * DAY)
+    janitor.run_once()
+    assert not os.path.exists(output_dir)
+    janitor.run_once()
+    assert not os.path.exists(os.path.join(app_module.ZIP_CACHE_FOLDER, cached[0]))
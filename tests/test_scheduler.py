@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""JobScheduler: 예상 처리 시간 순서, 대기 시간 보정(aging), 요청자별 공정 분배"""
+
+import pytest
+
+
+@pytest.fixture
+def app(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'SCHEDULER_AGING', 1.0)
+    monkeypatch.setattr(app_module, 'FAIR_SHARE_WEIGHT', 1.0)
+    return app_module
+
+
+@pytest.fixture
+def scheduler(app):
+    # 장치가 없으므로 워커 스레드 없이 대기열만 동작
+    return app.JobScheduler([], 1, max_queue_size=10, bulk_queue_size=10)
+
+
+def job(task_id, duration, client=None, model='tiny', cache_key=None):
+    return {'task_id': task_id, 'model': model, 'audio_duration': duration, 'client': client,
+            'cache_key': cache_key, 'batchable': False}
+
+
+def order(scheduler, *jobs):
+    positions = scheduler.queue_positions([queued['task_id'] for queued in jobs])
+    return sorted(positions, key=positions.get)
+
+
+def dispatch(scheduler):
+    """워커가 다음 작업을 꺼낼 때처럼 꺼내고 요청자 사용량에 반영"""
+    with scheduler._cond:
+        taken = scheduler._next_job_locked('cpu')
+        scheduler._charge_locked(taken, taken['enqueued_at'])
+    return taken['task_id']
+
+
+def test_shorter_estimated_jobs_run_first(scheduler):
+    jobs = [job('long', 300), job('short', 30), job('medium', 120), job('unknown', None), job('huge', 900)]
+    for queued in jobs:
+        assert scheduler.submit(queued)
+    # 길이를 모르는 작업은 UNKNOWN_AUDIO_SECONDS(600초)로 추정
+    assert order(scheduler, *jobs) == ['short', 'medium', 'long', 'unknown', 'huge']
+    assert dispatch(scheduler) == 'short'
+
+
+def test_estimated_cost_uses_learned_model_speed(scheduler):
+    jobs = [job('large', 100, model='large-v3'), job('tiny', 300, model='tiny')]
+    for queued in jobs:
+        scheduler.submit(queued)
+    scheduler._model_rtf.update({'large-v3': 4.0, 'tiny': 0.1})
+    assert order(scheduler, *jobs) == ['tiny', 'large']
+
+
+def test_aging_lets_long_waiting_job_go_first(app, scheduler, monkeypatch):
+    long_job, short_job = job('long', 300), job('short', 30)
+    scheduler.submit(long_job)
+    scheduler.submit(short_job)
+    long_job['enqueued_at'] -= 400  # 400초 대기 -> 300 - 400 < 30
+    assert order(scheduler, long_job, short_job) == ['long', 'short']
+    monkeypatch.setattr(app, 'SCHEDULER_AGING', 0.0)
+    assert order(scheduler, long_job, short_job) == ['short', 'long']
+
+
+def test_heavy_client_yields_to_other_clients(scheduler):
+    for index in range(3):
+        scheduler.submit(job(f'a{index}', 200, client='ip:a'))
+    assert dispatch(scheduler) == 'a0'
+    scheduler.submit(job('b0', 200, client='ip:b'))
+    # a는 방금 200초 분량을 썼으므로 나중에 들어온 b의 작업이 먼저
+    assert dispatch(scheduler) == 'b0'
+    assert dispatch(scheduler) == 'a1'
+
+
+def test_client_usage_decays_and_stale_clients_are_pruned(app, scheduler):
+    scheduler.submit(job('a0', 200, client='ip:a'))
+    dispatch(scheduler)
+    usage, charged_at = scheduler._client_usage['ip:a']
+    assert scheduler._client_load('ip:a', charged_at + app.FAIR_SHARE_HALF_LIFE) == pytest.approx(usage / 2)
+    # 오래 쓰지 않은 요청자는 다음 과금 때 정리
+    scheduler._client_usage['ip:a'][1] -= app.FAIR_SHARE_HALF_LIFE * 11
+    scheduler.submit(job('b0', 10, client='ip:b'))
+    dispatch(scheduler)
+    assert set(scheduler._client_usage) == {'ip:b'}
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""/api/text 범위 선택/페이지, /api/result 본문 포함 및 업로드 파일 정리 시점"""
+
+import os
+
+from conftest import make_completed_task, write_wav
+
+SEGMENTS = [
+    {'start': 0.0, 'end': 2.0, 'text': ' 첫 문장'},
+    {'start': 2.0, 'end': 4.5, 'text': ' 둘째 문장'},
+    {'start': 4.5, 'end': 7.0, 'text': ' 셋째 문장'},
+]
+FULL_TEXT = '첫 문장\n둘째 문장\n셋째 문장\n'
+
+
+def test_text_pages_with_offset_and_limit(app_module, client):
+    make_completed_task(app_module, 'text-paged', {'result.txt': FULL_TEXT}, SEGMENTS)
+    first = client.get('/api/text/text-paged?limit=6').get_json()
+    assert (first['text'], first['next_offset'], first['total_length']) == ('첫 문장\n둘', 6, len(FULL_TEXT))
+    rest = client.get(f"/api/text/text-paged?offset={first['next_offset']}").get_json()
+    assert first['text'] + rest['text'] == FULL_TEXT
+    assert rest['next_offset'] is None and rest['segment_count'] == 3
+
+
+def test_text_selects_segment_and_time_ranges(app_module, client):
+    make_completed_task(app_module, 'text-range', {'result.txt': FULL_TEXT}, SEGMENTS)
+    by_segment = client.get('/api/text/text-range?segment_start=1&segment_end=2&include_segments=1').get_json()
+    assert by_segment['text'] == '둘째 문장\n' and by_segment['selected_segments'] == [1, 2]
+    assert [segment['id'] for segment in by_segment['segments']] == [1]
+    by_time = client.get('/api/text/text-range?time_start=3&time_end=5').get_json()
+    assert by_time['text'] == '둘째 문장\n셋째 문장\n' and by_time['selected_segments'] == [1, 3]
+
+
+def test_text_errors(app_module, client):
+    make_completed_task(app_module, 'text-errors', {'result.txt': FULL_TEXT}, SEGMENTS)
+    assert client.get('/api/text/text-errors?limit=abc').status_code == 400
+    assert client.get('/api/text/no-such-task').status_code == 404
+    app_module.update_task_status('text-running', 'processing', 40, '분석 중...')
+    response = client.get('/api/text/text-running')
+    assert response.status_code == 409 and response.get_json()['status'] == 'processing'
+
+
+def test_result_includes_text_page(app_module, client):
+    make_completed_task(app_module, 'text-result', {'result.txt': FULL_TEXT}, SEGMENTS)
+    body = client.get('/api/result/text-result?include_text=1&limit=4').get_json()
+    assert [file['name'] for file in body['files']] == ['result.txt']
+    assert body['transcript']['text'] == '첫 문장' and body['transcript']['next_offset'] == 4
+
+
+def test_result_keeps_upload_until_task_finishes(app_module, client):
+    upload_dir = os.path.join(app_module.UPLOAD_FOLDER, 'text-upload')
+    os.makedirs(upload_dir, exist_ok=True)
+    write_wav(os.path.join(upload_dir, 'audio.wav'), 1)
+    app_module.update_task_status('text-upload', 'queued', 0, '대기 중')
+    client.get('/api/result/text-upload')
+    assert os.path.isdir(upload_dir)
+    make_completed_task(app_module, 'text-upload', {'result.txt': FULL_TEXT})
+    client.get('/api/result/text-upload')
+    assert not os.path.exists(upload_dir)
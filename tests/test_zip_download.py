@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""전체 결과 ZIP 다운로드: 스트리밍 후 캐시 재사용, ETag/304, 결과 변경 시 캐시 교체"""
+
+import io
+import os
+import zipfile
+
+from conftest import make_completed_task
+
+FILES = {'result.txt': '안녕하세요\n', 'result.srt': '1\n00:00:00,000 --> 00:00:01,000\n안녕하세요\n'}
+
+
+def cached_zips(app_module, task_id):
+    return sorted(name for name in os.listdir(app_module.ZIP_CACHE_FOLDER) if name.startswith(f'{task_id}-'))
+
+
+def test_zip_is_streamed_then_served_from_cache(app_module, client):
+    make_completed_task(app_module, 'zip-cache', FILES, [{'start': 0.0, 'end': 1.0, 'text': '안녕하세요'}])
+    first = client.get('/download_all/zip-cache')
+    assert first.status_code == 200 and first.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(first.data)) as archive:
+        # 세그먼트 색인은 ZIP에 넣지 않음
+        assert sorted(archive.namelist()) == sorted(FILES)
+        assert archive.read('result.txt').decode('utf-8') == FILES['result.txt']
+    assert len(cached_zips(app_module, 'zip-cache')) == 1
+
+    second = client.get('/download_all/zip-cache')
+    assert second.data == first.data and second.headers['ETag'] == first.headers['ETag']
+    assert client.get('/download_all/zip-cache', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_changed_results_replace_cached_zip(app_module, client, monkeypatch):
+    output_dir = make_completed_task(app_module, 'zip-changed', FILES)
+    first = client.get('/download_all/zip-changed')
+    first.get_data()  # 끝까지 받아야 캐시 파일이 확정됨
+    etag = first.headers['ETag']
+    old_cache = cached_zips(app_module, 'zip-changed')
+    assert len(old_cache) == 1
+    with open(os.path.join(output_dir, 'result.txt'), 'a', encoding='utf-8') as f:
+        f.write('추가\n')
+
+    # 동시 요청이 이전 캐시를 먼저 지운 경우
+    remove = os.remove
+    def remove_twice(path):
+        remove(path)
+        remove(path)
+    monkeypatch.setattr(app_module.os, 'remove', remove_twice)
+    response = client.get('/download_all/zip-changed', headers={'If-None-Match': etag})
+    monkeypatch.undo()
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.read('result.txt').decode('utf-8') == FILES['result.txt'] + '추가\n'
+    new_cache = cached_zips(app_module, 'zip-changed')
+    assert len(new_cache) == 1 and new_cache != old_cache
+
+
+def test_missing_task_returns_json_404(client):
+    response = client.get('/download_all/no-such-task')
+    assert response.status_code == 404 and response.get_json()['success'] is False
@@ -5,20 +5,66 @@ Whisper STT Light Web App with Progress Bar
 기능만 잘 되는 깡통 웹앱 - CSS 최소화, 기능 중심, 진척도 추가
 """
 
-from flask import Flask, request, render_template, send_file, flash, redirect, url_for, jsonify
+from flask import Flask, Response, request, render_template, send_file, jsonify, stream_with_context
 import os
-import subprocess
+import gc
+import math
+import mimetypes
+import time
+import queue
 import uuid
+import wave
 import zipfile
 import threading
 import json
+import gzip
+import hashlib
+import sqlite3
+import subprocess
+import multiprocessing
+import types
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, suppress
 from datetime import datetime
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 import shutil
 
+import batch_decode
+import live_transcribe
+import long_audio
+import metrics
+import model_server
+import whisper_engine
+
+# 실시간 스트리밍(WebSocket)은 flask-sock이 설치된 경우에만 사용
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+
+# 결과 파일 brotli 압축 전송은 brotli가 설치된 경우에만 사용 (없으면 gzip만)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 app.secret_key = 'whisper-stt-webapp-secret-key-2025'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB 제한
+# 앞단 웹서버(nginx/apache)가 파일을 직접 보내도록 X-Sendfile 헤더로 응답 (해당 설정이 된 경우에만 켬)
+app.config['USE_X_SENDFILE'] = os.environ.get('WHISPER_USE_X_SENDFILE', '0') == '1'
+
+# 실행 역할 (분리 배포 모드는 model_server.py 참고)
+# - standalone: 한 프로세스가 HTTP와 모델/작업을 모두 처리 (기본)
+# - frontend: HTTP 전용 워커 (gunicorn 등으로 여러 개 실행), 작업/모델은 모델 서버에 IPC로 요청
+# - model_server: 모델과 스케줄러를 소유하는 프로세스 (model_server.py가 설정)
+APP_ROLE = os.environ.get('WHISPER_ROLE', 'standalone')
+MODEL_SERVER_ADDRESS = os.environ.get('WHISPER_MODEL_SERVER', '127.0.0.1:6010')  # 'host:port' 또는 유닉스 소켓 경로
+MODEL_SERVER_AUTHKEY = os.environ.get('WHISPER_MODEL_SERVER_AUTHKEY', 'whisper-model-server-key').encode('utf-8')
 
 # 디렉토리 경로 설정
 PROJECT_ROOT = os.path.expanduser('~/whisper_project')
@@ -26,9 +72,17 @@ WEBAPP_ROOT = os.path.join(PROJECT_ROOT, 'webapp')
 UPLOAD_FOLDER = os.path.join(WEBAPP_ROOT, 'uploads')
 DATA_OUTPUT_PATH = os.path.join(PROJECT_ROOT, 'data', 'output')
 
+TASK_DB_PATH = os.path.join(DATA_OUTPUT_PATH, 'tasks.db')  # 작업 상태 DB
+CACHE_FOLDER = os.path.join(DATA_OUTPUT_PATH, '_cache')  # 인식 결과 캐시 (오디오 해시 기반)
+PCM_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '_pcm')  # 디코딩된 오디오 캐시 (오디오 해시 기반)
+ZIP_CACHE_FOLDER = os.path.join(CACHE_FOLDER, 'zip')  # 결과 ZIP 캐시 (결과 파일 지문 기반)
+
 # 필요한 디렉토리 생성
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(DATA_OUTPUT_PATH, exist_ok=True)
+os.makedirs(CACHE_FOLDER, exist_ok=True)
+os.makedirs(PCM_CACHE_FOLDER, exist_ok=True)
+os.makedirs(ZIP_CACHE_FOLDER, exist_ok=True)
 
 # Whisper 모델 설정
 WHISPER_MODELS = {
@@ -40,6 +94,134 @@ WHISPER_MODELS = {
     'large-v3-turbo': 'large-v3-turbo (1.6GB) - 보통 속도, 최고 품질 (추천)'
 }
 
+# Whisper 실행 설정
+WHISPER_LANGUAGE = 'Korean'
+WHISPER_DECODE_OPTIONS = {'task': 'transcribe'}  # transcribe()에 전달하는 디코딩 옵션 (캐시 키에 포함)
+# 기본 'auto': GPU가 있으면 모든 GPU, 없으면 CPU (예: 'cuda:0', 'cuda:0,cuda:1', 'cpu')
+# HTTP 전용 워커(frontend)는 장치를 쓰지 않으므로 비워 둠 (torch도 import 하지 않음)
+WHISPER_DEVICES = [] if APP_ROLE == 'frontend' else \
+    whisper_engine.resolve_devices(os.environ.get('WHISPER_DEVICES', 'auto').split(','))
+WHISPER_CPU_INT8 = os.environ.get('WHISPER_CPU_INT8', '1') != '0'  # CPU에서는 Linear 레이어를 int8 동적 양자화
+# 장치별 엔진 (GPU: fp16, CPU: int8/fp32) - 엔진마다 결과가 조금씩 다르므로 캐시 키에 포함
+DEVICE_ENGINES = {device: whisper_engine.device_engine(device, WHISPER_CPU_INT8) for device in WHISPER_DEVICES}
+
+# 모델 풀 설정 (모델을 프로세스에 상주시켜 작업마다 다시 로딩하지 않음)
+MODEL_POOL_MEMORY_MB = int(os.environ.get('WHISPER_MODEL_POOL_MEMORY_MB', '6144'))  # 상주 모델 메모리 상한
+MODEL_IDLE_TIMEOUT = int(os.environ.get('WHISPER_MODEL_IDLE_TIMEOUT', '1800'))  # 미사용 모델 해제 시간(초)
+
+# 작업 큐 설정 (요청마다 스레드를 만들지 않고 장치별 고정 워커로 처리)
+WORKERS_PER_DEVICE = int(os.environ.get('WHISPER_WORKERS_PER_DEVICE', '1'))
+MAX_QUEUE_SIZE = int(os.environ.get('WHISPER_MAX_QUEUE_SIZE', '20'))  # 대기열이 가득 차면 429 응답
+DEFAULT_JOB_SECONDS = 60  # 처리 이력이 없을 때 Retry-After 추정에 쓰는 작업당 소요 시간
+# 대기열 순서: 예상 처리 시간(오디오 길이 x 모델별 처리 배율)이 짧은 작업 먼저 + 대기 시간 보정 + 요청자별 공정 분배
+SCHEDULER_AGING = float(os.environ.get('WHISPER_SCHEDULER_AGING', '1.0'))  # 대기 1초마다 예상 처리 시간에서 빼는 초
+FAIR_SHARE_WEIGHT = float(os.environ.get('WHISPER_FAIR_SHARE_WEIGHT', '1.0'))  # 요청자 최근 사용량 반영 비율 (0: 끔)
+FAIR_SHARE_HALF_LIFE = 600  # 요청자 사용량이 절반으로 줄어드는 시간(초)
+UNKNOWN_AUDIO_SECONDS = 600  # 길이를 알 수 없는 오디오의 예상 길이
+DEFAULT_REALTIME_FACTOR = 1.0  # 처리 이력이 없는 모델의 처리 시간 / 오디오 길이
+
+# 인식 결과 캐시 설정 (같은 파일을 다시 올리면 Whisper를 다시 돌리지 않음)
+CACHE_MAX_MB = int(os.environ.get('WHISPER_CACHE_MAX_MB', '2048'))  # 초과 시 오래 쓰지 않은 결과부터 삭제
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 업로드 저장/해시 계산 단위
+PCM_CACHE_MAX_MB = int(os.environ.get('WHISPER_PCM_CACHE_MAX_MB', '8192'))  # 디코딩된 오디오 캐시 상한 (1시간 = 약 230MB)
+
+# 분할(재개 가능) 업로드 설정 - 요청 하나의 크기는 MAX_CONTENT_LENGTH, 파일 전체는 아래 상한
+CHUNKED_UPLOAD_MAX_MB = int(os.environ.get('WHISPER_CHUNKED_UPLOAD_MAX_MB', '4096'))
+CHUNKED_UPLOAD_CHUNK_MB = 8  # 클라이언트에 권장하는 조각 크기
+# 업로드 중 ffmpeg로 동시 디코딩 - HTTP 워커가 여러 개면 조각이 다른 워커로 갈 수 있어 기본으로 끔
+STREAMING_DECODE = os.environ.get('WHISPER_STREAMING_DECODE', '0' if APP_ROLE == 'frontend' else '1') != '0'
+STREAMING_DECODE_TIMEOUT = 120  # 업로드 완료 후 디코더 마무리를 기다리는 최대 시간(초)
+# 동시에 실행하는 디코더(ffmpeg) 수 상한 - 넘으면 업로드가 끝난 뒤 워커가 디코딩
+STREAMING_DECODE_MAX = int(os.environ.get('WHISPER_STREAMING_DECODE_MAX', '8'))
+STREAMING_DECODE_IDLE_TIMEOUT = 120  # 조각이 이 시간(초) 동안 오지 않으면 디코더 종료 (업로드는 계속 가능)
+
+# 여러 파일 묶음 제출 (/api/batch) - 별도 대기열에서 일반 요청이 없을 때 처리
+BATCH_SUBMIT_MAX_ITEMS = int(os.environ.get('WHISPER_BATCH_SUBMIT_MAX_ITEMS', '500'))  # 한 번에 제출하는 파일 수
+BATCH_SUBMIT_QUEUE_SIZE = int(os.environ.get('WHISPER_BATCH_SUBMIT_QUEUE_SIZE', '2000'))  # 묶음 대기열 상한
+# 서버에 이미 있는 파일을 경로로 제출할 때 허용하는 폴더 (비어 있으면 경로 제출 사용 안 함)
+BATCH_IMPORT_DIR = os.environ.get('WHISPER_BATCH_IMPORT_DIR', '')
+
+# 긴 녹음 병렬 인식 설정 (무음 지점에서 나눈 조각을 프로세스 풀에서 동시에 인식)
+LONG_AUDIO_MIN_SECONDS = int(os.environ.get('WHISPER_LONG_AUDIO_MIN_SECONDS', '600'))  # 이보다 긴 오디오만 분할
+LONG_AUDIO_CHUNK_SECONDS = int(os.environ.get('WHISPER_LONG_AUDIO_CHUNK_SECONDS', '300'))  # 조각 목표 길이
+LONG_AUDIO_OVERLAP_SECONDS = 2.0  # 조각 앞뒤로 더 인식하는 여유 구간 (겹친 세그먼트는 중복 제거)
+# 장치별 병렬 프로세스 수 (0: 자동 - CPU는 코어 2개당 1개(최대 4개), GPU는 1개 = 분할하지 않음)
+LONG_AUDIO_WORKERS = int(os.environ.get('WHISPER_LONG_AUDIO_WORKERS', '0'))
+# 병렬 인식 자식 프로세스들이 함께 쓰는 모델 메모리 상한 - 프로세스마다 모델을 한 벌씩 로딩하므로
+# 장치별 상주 모델 메모리 상한(MODEL_POOL_MEMORY_MB)에서 떼어 쓰고, 이 안에 들어가는 수만큼만 프로세스를 띄움
+LONG_AUDIO_MEMORY_MB = int(os.environ.get('WHISPER_LONG_AUDIO_MEMORY_MB', '3072'))
+
+# 짧은 요청 묶음 처리 (같은 모델의 대기 작업을 잠깐 모아 30초 윈도우들을 한 번에 디코딩)
+BATCH_MAX_SIZE = int(os.environ.get('WHISPER_BATCH_MAX_SIZE', '8'))  # 한 번에 묶는 작업 수 (1: 사용 안 함)
+BATCH_MAX_WAIT_MS = int(os.environ.get('WHISPER_BATCH_MAX_WAIT_MS', '200'))  # 다른 작업을 기다리는 최대 시간
+BATCH_MAX_AUDIO_SECONDS = int(os.environ.get('WHISPER_BATCH_MAX_AUDIO_SECONDS', '180'))  # 이보다 짧은 작업만 묶음
+BATCH_WINDOWS = int(os.environ.get('WHISPER_BATCH_WINDOWS', '16'))  # 인코더/디코더에 한 번에 넣는 윈도우 수
+# 긴 파일 하나의 윈도우 묶음 디코딩 - 이보다 긴 오디오는 윈도우를 미리 나눠 BATCH_WINDOWS 개씩 디코딩 (0: 사용 안 함)
+# 병렬 인식(LONG_AUDIO_*)과 함께 쓰면 각 자식 프로세스가 맡은 조각 안에서 묶음 디코딩
+WINDOW_BATCH_MIN_SECONDS = int(os.environ.get('WHISPER_WINDOW_BATCH_MIN_SECONDS', '300'))
+
+# 실시간 스트리밍 인식 (/ws/stream)
+STREAM_DEFAULT_MODEL = os.environ.get('WHISPER_STREAM_MODEL', 'small')
+STREAM_MAX_SESSIONS = int(os.environ.get('WHISPER_STREAM_MAX_SESSIONS', '2'))  # 동시 스트림 수 (초과 시 거절)
+# 스트리밍 전용 모델 메모리 상한 - 첫 번째 장치의 상주 모델 메모리 상한(MODEL_POOL_MEMORY_MB)에서 떼어 씀
+STREAM_MODEL_MEMORY_MB = int(os.environ.get('WHISPER_STREAM_MODEL_MEMORY_MB', '1024'))
+STREAM_STEP_SECONDS = float(os.environ.get('WHISPER_STREAM_STEP_SECONDS', '1.0'))  # 새 오디오가 이만큼 쌓이면 다시 인식
+STREAM_TRIM_SECONDS = 15  # 버퍼가 이보다 길면 확정 지점에서 자름
+STREAM_MAX_BUFFER_SECONDS = 25  # 확정이 안 돼도 버퍼가 이보다 길어지면 강제 확정 (whisper 윈도우 30초 이내)
+STREAM_IDLE_TIMEOUT = 60  # 오디오가 이 시간 동안 오지 않으면 연결 종료
+
+# 처리 단계별 진행률 구간 (시작 %, 끝 %, 기본 메시지)
+TASK_STAGES = {
+    'decode_audio': (0, 5, '오디오 디코딩 중...'),
+    'load_model': (5, 10, 'Whisper 모델 준비 중...'),
+    'transcribe': (10, 95, '음성 분석 중...'),
+    'write_outputs': (95, 100, '결과 파일 저장 중...')
+}
+SAMPLE_RATE = 16000  # whisper 입력 샘플레이트
+FRAMES_PER_SECOND = 100  # whisper mel 프레임 (10ms 간격)
+
+# 작업별 자원 사용량 측정 (/proc 기준, 리눅스 외 환경에서는 CPU 시간만 기록)
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# 보존 기한/용량 관리 (백그라운드 정리 스레드)
+RETENTION_INTERVAL = int(os.environ.get('WHISPER_RETENTION_INTERVAL', '600'))  # 정리 주기(초)
+RETENTION_GRACE_SECONDS = 600  # 최근 이 시간 안에 바뀐 항목은 지우지 않음 (업로드 직후 작업 등록 전 등)
+UPLOAD_TTL_HOURS = float(os.environ.get('WHISPER_UPLOAD_TTL_HOURS', '24'))  # 끝난 작업의 업로드, 멈춘 분할 업로드
+RESULT_TTL_DAYS = float(os.environ.get('WHISPER_RESULT_TTL_DAYS', '30'))  # 결과 폴더와 작업 기록 (0: 기한 없음)
+UPLOAD_QUOTA_MB = int(os.environ.get('WHISPER_UPLOAD_QUOTA_MB', '20480'))  # 업로드 폴더 상한 (0: 제한 없음)
+OUTPUT_QUOTA_MB = int(os.environ.get('WHISPER_OUTPUT_QUOTA_MB', '10240'))  # 결과 폴더 상한 (0: 제한 없음)
+ZIP_CACHE_MAX_MB = int(os.environ.get('WHISPER_ZIP_CACHE_MAX_MB', '1024'))  # ZIP 캐시 상한
+
+# 운영 지표 (/metrics)
+DISK_USAGE_CACHE_SECONDS = 60  # 업로드/결과 폴더 크기 재계산 간격 (폴더 전체를 훑으므로 수집마다 계산하지 않음)
+
+# 결과 미리보기 (작업 완료 시 한 번 만들어 작업 기록에 저장)
+PREVIEW_CHARS = 500
+PREVIEW_READ_CHARS = 64 * 1024  # 전체 길이 계산 시 한 번에 읽는 글자 수
+PREVIEW_FORMATS = {  # 확장자: (표시 이름, 우선순위)
+    '.txt': ('TXT (순수 텍스트)', 1),
+    '.json': ('JSON (타임스탬프 포함)', 2),
+    '.vtt': ('VTT (웹 자막)', 3),
+    '.srt': ('SRT (영상 자막)', 4),
+    '.tsv': ('TSV (표 형식)', 5)
+}
+
+# 결과 파일 다운로드 압축 (텍스트 형식은 5~10배 줄어듦, 압축본은 결과 폴더의 .compressed에 한 번만 생성)
+COMPRESSIBLE_EXTENSIONS = ('.txt', '.json', '.srt', '.vtt', '.tsv')
+COMPRESS_MIN_BYTES = 1024  # 이보다 작은 파일은 그대로 전송
+COMPRESSED_FOLDER_NAME = '.compressed'
+
+# 결과 ZIP 다운로드
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024  # 압축하면서 클라이언트로 보내는 단위
+
+# 결과 텍스트 조회 (/api/text)
+TRANSCRIPT_INDEX_FILE = '.transcript.json'  # 결과 폴더의 세그먼트 색인 (결과 파일 목록에는 나오지 않음)
+
+# 진행 상황 SSE 설정
+SSE_KEEPALIVE_SECONDS = 15  # 이벤트가 없을 때 연결 유지용 주석 전송 간격
+FINAL_TASK_STATES = ('completed', 'error', 'not_found')
+
 # 출력 형식 설정
 OUTPUT_FORMATS = {
     'txt': 'txt - 순수 텍스트',
@@ -61,124 +243,2130 @@ def allowed_file(filename):
     """허용된 파일 형식 확인"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_status_file_path(task_id):
-    """상태 파일 경로 반환"""
-    return os.path.join(DATA_OUTPUT_PATH, f"{task_id}_status.json")
+class TaskStatusStore:
+    """작업 상태 레지스트리
 
-def update_task_status(task_id, status, progress=0, message=""):
-    """작업 상태 업데이트"""
-    status_file = get_status_file_path(task_id)
-    status_data = {
-        'status': status,  # 'processing', 'completed', 'error'
-        'progress': progress,  # 0-100
-        'message': message,
-        'timestamp': datetime.now().isoformat()
-    }
-    with open(status_file, 'w', encoding='utf-8') as f:
-        json.dump(status_data, f, ensure_ascii=False, indent=2)
+    - 조회는 메모리 딕셔너리에서 바로 처리 (폴링마다 파일을 열지 않음)
+    - 모든 변경은 SQLite(WAL) 한 곳에 원자적으로 기록되어 재시작 후에도 유지
+    - task_id(기본키)와 status(인덱스)로 조회 가능
+    - shared=True(분리 배포 모드)면 다른 프로세스도 같은 DB를 갱신하므로 메모리 캐시 없이 DB에서 읽고,
+      갱신은 BEGIN IMMEDIATE 트랜잭션 안에서 읽기-수정-쓰기
+    """
+
+    def __init__(self, db_path, shared=False):
+        self.shared = shared
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                message TEXT,
+                updated_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)')
+        if multiprocessing.parent_process() is None and APP_ROLE != 'frontend':
+            # 병렬 인식 자식 프로세스(spawn)나 HTTP 전용 워커가 이 모듈을 import 할 때는 진행 중 작업을 건드리지 않음
+            self._recover_interrupted()
+
+    def _recover_interrupted(self):
+        """이전 실행에서 끝나지 못한 작업을 오류 상태로 정리"""
+        for task_id in self.list_by_status('queued') + self.list_by_status('processing'):
+            self.update(task_id, status='error', progress=0, message='서버 재시작으로 작업이 중단되었습니다. 다시 업로드해주세요.')
+
+    def update(self, task_id, **fields):
+        """작업 상태 갱신 (기존 필드는 유지하고 전달된 필드만 덮어씀)"""
+        with self._lock:
+            if self.shared:
+                self._db.execute('BEGIN IMMEDIATE')
+            try:
+                cached = None if self.shared else self._tasks.get(task_id)
+                record = dict(cached or self._load(task_id) or {})
+                record.update(fields)
+                record['timestamp'] = datetime.now().isoformat()
+                self._db.execute(
+                    '''INSERT INTO tasks (task_id, status, progress, message, updated_at, data)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(task_id) DO UPDATE SET
+                           status = excluded.status, progress = excluded.progress, message = excluded.message,
+                           updated_at = excluded.updated_at, data = excluded.data''',
+                    (task_id, record.get('status'), record.get('progress', 0), record.get('message', ''),
+                     record['timestamp'], json.dumps(record, ensure_ascii=False))
+                )
+                if self.shared:
+                    self._db.execute('COMMIT')
+            except Exception:
+                if self.shared:
+                    self._db.execute('ROLLBACK')
+                raise
+            if not self.shared:
+                self._tasks[task_id] = record
+            return dict(record)
+
+    def get(self, task_id):
+        """작업 상태 조회 (메모리에 없으면 DB에서 읽어 캐시)"""
+        with self._lock:
+            record = None if self.shared else self._tasks.get(task_id)
+            if record is None:
+                record = self._load(task_id)
+                if record is None:
+                    return None
+                if not self.shared:
+                    self._tasks[task_id] = record
+            return dict(record)
+
+    def _load(self, task_id):
+        row = self._db.execute('SELECT data FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, task_id):
+        """작업 상태 삭제"""
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            self._db.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+
+    def list_by_status(self, status):
+        """상태별 task_id 목록"""
+        with self._lock:
+            rows = self._db.execute('SELECT task_id FROM tasks WHERE status = ?', (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def retention_info(self):
+        """보존 정책 판단용 {task_id: (status, 고정 여부, 마지막 갱신 시각)} (메모리 캐시에 올리지 않음)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, status, json_extract(data, '$.pinned'), updated_at FROM tasks"
+            ).fetchall()
+        return {task_id: (status, bool(pinned), updated_at) for task_id, status, pinned, updated_at in rows}
+
+
+class TaskEventHub:
+    """작업별 이벤트 구독/발행 (SSE 스트림용)"""
+
+    def __init__(self):
+        self._subscribers = {}  # task_id -> [queue.Queue]
+        self._listeners = []  # 모든 작업의 이벤트를 받는 콜백 (모델 서버가 HTTP 워커로 중계)
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """모든 이벤트를 받을 콜백 등록 - callback(task_id, event, data)"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def subscribe(self, task_id):
+        subscription = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers.setdefault(task_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, task_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(task_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscribers.pop(task_id, None)
+
+    def publish(self, task_id, event, data):
+        """구독 중인 모든 클라이언트에 이벤트 전달 (느린 구독자의 큐가 가득 차면 버림)"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(task_id, []))
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(task_id, event, data)
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+
+task_store = TaskStatusStore(TASK_DB_PATH, shared=APP_ROLE != 'standalone')
+event_hub = TaskEventHub()
+# HTTP 전용 워커에서 작업/모델 요청을 보낼 모델 서버 (그 외 역할은 None -> 같은 프로세스에서 처리)
+model_server_client = model_server.ModelServerClient(MODEL_SERVER_ADDRESS, MODEL_SERVER_AUTHKEY) \
+    if APP_ROLE == 'frontend' else None
+
+def update_task_status(task_id, status, progress=0, message="", **extra):
+    """작업 상태 업데이트 (extra로 추가 필드 저장) 및 구독자에게 이벤트 발행"""
+    previous = task_store.get(task_id)
+    record = task_store.update(
+        task_id,
+        status=status,  # 'queued', 'processing', 'completed', 'error'
+        progress=progress,  # 0-100
+        message=message,
+        **extra
+    )
+    # 상태가 바뀌면 status, 같은 상태에서 진행률만 바뀌면 progress 이벤트
+    status_changed = previous is None or previous.get('status') != status
+    event_hub.publish(task_id, 'status' if status_changed else 'progress', record)
 
 def get_task_status(task_id):
     """작업 상태 조회"""
-    status_file = get_status_file_path(task_id)
-    if os.path.exists(status_file):
-        try:
-            with open(status_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
+    status = task_store.get(task_id)
+    if status is not None:
+        return status
     return {'status': 'not_found', 'progress': 0, 'message': '작업을 찾을 수 없습니다.'}
 
-def run_whisper_background(input_file, model, output_formats, task_id):
-    """백그라운드에서 Whisper 실행"""
+class TranscriptCache:
+    """오디오 내용 해시 + 모델 + 옵션을 키로 하는 인식 결과 캐시
+
+    - 결과는 CACHE_FOLDER/<키>.json.gz 로 저장
+    - 크기/마지막 사용 시각은 작업 DB의 transcript_cache 테이블에 기록
+    - 전체 크기가 상한을 넘으면 마지막 사용 시각이 오래된 것부터 삭제 (LRU)
+    """
+
+    def __init__(self, db_path, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS transcript_cache (
+                cache_key TEXT PRIMARY KEY,
+                audio_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_cache_last_access ON transcript_cache (last_access)')
+
+    def _path(self, cache_key):
+        return os.path.join(self.cache_dir, f'{cache_key}.json.gz')
+
+    def get(self, cache_key):
+        """캐시된 인식 결과 반환 (없으면 None)"""
+        with self._lock:
+            row = self._db.execute('SELECT cache_key FROM transcript_cache WHERE cache_key = ?', (cache_key,)).fetchone()
+            path = self._path(cache_key)
+            if row is None or not os.path.exists(path):
+                self.misses += 1
+                return None
+            self._db.execute(
+                'UPDATE transcript_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                (time.time(), cache_key)
+            )
+            self.hits += 1
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, cache_key, audio_hash, model, result):
+        """인식 결과 저장 후 용량 초과분 정리"""
+        path = self._path(cache_key)
+        temp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                '''INSERT OR REPLACE INTO transcript_cache (cache_key, audio_hash, model, size, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (cache_key, audio_hash, model, os.path.getsize(path), now, now)
+            )
+            self._evict_locked()
+
+    def _evict_locked(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM transcript_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cache_key, size in self._db.execute(
+                'SELECT cache_key, size FROM transcript_cache ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(cache_key))
+            except FileNotFoundError:
+                pass
+            self._db.execute('DELETE FROM transcript_cache WHERE cache_key = ?', (cache_key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """캐시 적중률/용량"""
+        with self._lock:
+            count, total = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': count,
+                'size_mb': round(total / (1024 * 1024), 1),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions
+            }
+
+
+transcript_cache = TranscriptCache(TASK_DB_PATH, CACHE_FOLDER, CACHE_MAX_MB * 1024 * 1024)
+
+class StreamingAudioDecoder:
+    """업로드 중 동시 디코딩 (ffmpeg가 stdin으로 들어오는 원본 바이트를 바로 16kHz mono PCM으로 변환)
+
+    - whisper.load_audio()와 같은 s16le 출력을 <출력 경로>.part에 기록하고, 정상 종료 시에만 이름을 바꿔 확정
+    - 파이프로 읽을 수 없는 형식(moov가 끝에 있는 mp4/m4a 등)이나 재시작으로 끊긴 경우에는
+      결과를 만들지 않으며, 워커가 업로드 파일을 직접 디코딩함
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._part_path = output_path + '.part'
+        self.failed = False
+        self.last_fed = time.time()  # 마지막으로 바이트를 받은 시각 (멈춘 업로드의 디코더 정리용)
+        self._process = subprocess.Popen(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-threads', '0', '-i', 'pipe:0',
+             '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-y', self._part_path],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def feed(self, data):
+        """새로 받은 원본 바이트 전달 (반드시 파일 순서대로)"""
+        if self.failed or self._process.stdin.closed:
+            return
+        self.last_fed = time.time()
+        try:
+            self._process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            self.failed = True  # ffmpeg가 먼저 종료됨 (지원하지 않는 형식 등)
+
+    def close_input(self):
+        """입력 끝 알림 (ffmpeg가 남은 프레임을 마저 출력하고 종료)"""
+        if not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                self.failed = True
+
+    def finish(self, timeout=STREAMING_DECODE_TIMEOUT):
+        """디코딩 완료 대기 후 PCM 파일 경로 반환 (실패 시 None)"""
+        self.close_input()
+        try:
+            returncode = self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.abort()
+            return None
+        if self.failed or returncode != 0 or not os.path.exists(self._part_path) \
+                or os.path.getsize(self._part_path) == 0:
+            self.abort()
+            return None
+        os.replace(self._part_path, self.output_path)
+        return self.output_path
+
+    def active(self):
+        """ffmpeg 프로세스가 아직 실행 중인지"""
+        return self._process.poll() is None
+
+    def input_closed(self):
+        """입력이 끝나 마무리 중이거나 끝났는지 (complete 요청 때 결과를 확정)"""
+        return self._process.stdin.closed
+
+    def abort(self):
+        """디코더 중단 및 중간 결과 삭제"""
+        self.failed = True
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        if os.path.exists(self._part_path):
+            os.remove(self._part_path)
+
+def load_decoded_audio(pcm_path):
+    """StreamingAudioDecoder 결과를 whisper.load_audio()와 같은 float32 배열로 읽기"""
+    import numpy as np
+    return np.fromfile(pcm_path, np.int16).astype(np.float32) / 32768.0
+
+def read_pcm_wav(path):
+    """16kHz mono 16bit PCM WAV면 ffmpeg 없이 샘플을 float32 배열로 읽기 (다른 형식이면 None)"""
+    import numpy as np
     try:
-        # 상태 업데이트: 시작
-        update_task_status(task_id, 'processing', 10, 'STT 처리 시작...')
-        
-        # 출력 디렉토리 생성
-        output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        update_task_status(task_id, 'processing', 20, 'Whisper 모델 로딩 중...')
-        
-        # whisper 명령어 구성
-        cmd = [
-            'whisper', 
-            input_file,
-            '--model', model,
-            '--language', 'Korean',
-            '--device', 'cuda:0',  # GPU 0 강제 사용 (여유 메모리 24GB)
-            '--output_dir', output_dir
-        ]
-        
-        if output_formats:
-            # 선택한 형식만 생성하기 위해 'all'로 실행 후 불필요한 파일 삭제
-            if len(output_formats) > 1:
-                cmd.extend(['--output_format', 'all'])
-                print(f"다중 형식 선택됨 ({len(output_formats)}개) -> 선택한 형식만 유지")
+        with wave.open(path, 'rb') as wav:
+            if wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE \
+                    or wav.getsampwidth() != 2 or wav.getcomptype() != 'NONE':
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError, OSError):
+        return None
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+def wav_duration(path):
+    """WAV 파일 길이(초) (헤더만 읽음, wave 모듈이 읽지 못하는 파일이면 None)"""
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        return None
+
+class DecodedAudioCache:
+    """디코딩된 오디오(16kHz mono float32) 캐시
+
+    - 오디오 내용 해시 기준으로 한 번만 디코딩해 PCM_CACHE_FOLDER/<해시>.f32 로 저장
+    - 다른 모델로 다시 돌리거나 재시도할 때는 파일을 memory-map 해서 바로 사용 (디코딩 없음)
+    - 업로드 중 디코딩된 PCM이나 16kHz mono WAV는 ffmpeg를 거치지 않고 변환만 함
+    - 전체 크기가 상한을 넘으면 오래 사용하지 않은 파일부터 삭제 (파일 수정 시각 기준 LRU)
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._decode_locks = {}  # 오디오 해시 -> 디코딩 잠금 (같은 파일을 동시에 두 번 디코딩하지 않음)
+
+    def _path(self, audio_hash):
+        return os.path.join(self.cache_dir, f'{audio_hash}.f32')
+
+    def has(self, audio_hash):
+        return os.path.exists(self._path(audio_hash))
+
+    def duration(self, audio_hash):
+        """캐시된 오디오 길이(초) (없으면 None)"""
+        path = self._path(audio_hash)
+        return os.path.getsize(path) / 4 / SAMPLE_RATE if os.path.exists(path) else None
+
+    def load(self, audio_hash):
+        """캐시된 오디오를 memory-map으로 반환 (없으면 None)
+
+        mode='c'(copy-on-write)라 whisper가 배열을 수정해도 캐시 파일은 바뀌지 않는다.
+        """
+        import numpy as np
+        path = self._path(audio_hash)
+        try:
+            if os.path.getsize(path) == 0:
+                audio = np.zeros(0, np.float32)
             else:
-                cmd.extend(['--output_format', output_formats[0]])
+                audio = np.memmap(path, dtype=np.float32, mode='c')
+            os.utime(path)  # LRU 기준 시각 갱신
+        except FileNotFoundError:
+            return None
+        return audio
+
+    def get_or_decode(self, audio_hash, input_file, pcm_file=None):
+        """캐시된 오디오 반환, 없으면 디코딩해 저장 -> (오디오, 출처)
+
+        출처: 'cache'(캐시 사용), 'stream'(업로드 중 디코딩 결과), 'wav'(WAV 샘플 그대로), 'ffmpeg'(디코딩)
+        """
+        with self._lock:
+            decode_lock = self._decode_locks.setdefault(audio_hash, threading.Lock())
+        try:
+            with decode_lock:
+                audio = self.load(audio_hash)
+                if audio is not None:
+                    with self._lock:
+                        self.hits += 1
+                    return audio, 'cache'
+                
+                with self._lock:
+                    self.misses += 1
+                if pcm_file and os.path.exists(pcm_file):
+                    samples, source = load_decoded_audio(pcm_file), 'stream'
+                else:
+                    samples, source = read_pcm_wav(input_file), 'wav'
+                    if samples is None:
+                        import whisper
+                        samples, source = whisper.load_audio(input_file), 'ffmpeg'
+                
+                path = self._path(audio_hash)
+                temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+                samples.astype('float32', copy=False).tofile(temp_path)
+                os.replace(temp_path, path)
+                if pcm_file and os.path.exists(pcm_file):
+                    os.remove(pcm_file)  # 캐시로 옮겼으므로 업로드 폴더의 s16 파일은 삭제
+                self._evict(keep=path)
+                return self.load(audio_hash), source
+        finally:
+            with self._lock:
+                self._decode_locks.pop(audio_hash, None)
+
+    def _evict(self, keep):
+        """상한을 넘는 동안 오래 사용하지 않은 파일부터 삭제 (방금 저장한 파일은 유지)"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.f32'):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)  # 이미 memory-map 중인 작업은 계속 읽을 수 있음
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """캐시 현황"""
+        total = 0
+        count = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.f32'):
+                total += os.path.getsize(os.path.join(self.cache_dir, filename))
+                count += 1
+        with self._lock:
+            return {
+                'entries': count,
+                'size_mb': round(total / (1024 * 1024), 1),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+decoded_audio_cache = DecodedAudioCache(PCM_CACHE_FOLDER, PCM_CACHE_MAX_MB * 1024 * 1024)
+
+class ChunkedUploadStore:
+    """분할 업로드 상태 관리 (init -> offset 지정 조각 전송 -> complete)
+
+    - 업로드 ID는 task_id로 사용하며 파일은 UPLOAD_FOLDER/<task_id>/<파일명>에 바로 기록
+    - 받은 바이트 수는 작업 DB의 uploads 테이블에 기록되어 연결이 끊기거나 서버가 재시작돼도 이어서 업로드 가능
+    - 조각이 순서대로 들어오는 동안 전체 SHA-256을 누적 계산 (재시작 등으로 끊기면 complete 때 파일을 다시 읽음)
+    - 같은 바이트를 StreamingAudioDecoder에도 넘겨, 업로드가 끝날 때 오디오 디코딩도 거의 끝나 있도록 함
+      (동시 디코더는 STREAMING_DECODE_MAX 개까지, 조각이 끊긴 업로드의 디코더는 STREAMING_DECODE_IDLE_TIMEOUT 후 종료)
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._upload_locks = {}  # upload_id -> 조각 쓰기 잠금
+        self._digests = {}  # upload_id -> (누적 해시, 해시한 바이트 수)
+        self._decoders = {}  # upload_id -> StreamingAudioDecoder
+        self._ffmpeg_available = shutil.which('ffmpeg') is not None
+        self._janitor = None
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS uploads (
+                upload_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                received INTEGER NOT NULL DEFAULT 0,
+                sha256 TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+    def create(self, filename, size, sha256=None):
+        """업로드 시작: 빈 파일 생성 후 업로드 정보 반환"""
+        upload_id = new_task_id()
+        upload_dir = os.path.join(UPLOAD_FOLDER, upload_id)
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, filename)
+        open(path, 'wb').close()
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO uploads (upload_id, filename, path, size, received, sha256, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, 0, ?, ?, ?)',
+                (upload_id, filename, path, size, sha256, now, now)
+            )
+            self._digests[upload_id] = (hashlib.sha256(), 0)
+        if STREAMING_DECODE and self._ffmpeg_available:
+            self._start_decoder(upload_id, path)
+        return self.get(upload_id)
+
+    def _start_decoder(self, upload_id, path):
+        """동시 디코더 시작 (실행 중인 디코더가 상한이면 시작하지 않고 업로드 후 디코딩)"""
+        with self._lock:
+            if sum(1 for decoder in self._decoders.values() if decoder.active()) >= STREAMING_DECODE_MAX:
+                print(f"동시 디코딩 상한({STREAMING_DECODE_MAX}개) 도달, 업로드 후 디코딩합니다: {upload_id}")
+                return
+            try:
+                self._decoders[upload_id] = StreamingAudioDecoder(self.decoded_path(path))
+            except OSError as e:
+                print(f"동시 디코딩 시작 실패 (업로드 후 디코딩): {e}")
+                return
+            if self._janitor is None:
+                self._janitor = threading.Thread(target=self._janitor_loop, daemon=True)
+                self._janitor.start()
+
+    def stop_idle_decoders(self):
+        """STREAMING_DECODE_IDLE_TIMEOUT 동안 조각을 받지 않은 업로드의 디코더 종료 (complete 때 워커가 디코딩)"""
+        now = time.time()
+        with self._lock:
+            idle = [(upload_id, decoder) for upload_id, decoder in self._decoders.items()
+                    if now - decoder.last_fed > STREAMING_DECODE_IDLE_TIMEOUT
+                    and (decoder.failed or not decoder.input_closed())]
+            for upload_id, _ in idle:
+                del self._decoders[upload_id]
+        for upload_id, decoder in idle:
+            decoder.abort()
+            print(f"동시 디코딩 중단 ({STREAMING_DECODE_IDLE_TIMEOUT}초 동안 조각 없음): {upload_id}")
+
+    def _janitor_loop(self):
+        interval = max(5, STREAMING_DECODE_IDLE_TIMEOUT // 4)
+        while True:
+            time.sleep(interval)
+            try:
+                self.stop_idle_decoders()
+            except Exception as e:
+                print(f"동시 디코더 정리 오류: {e}")
+
+    @staticmethod
+    def decoded_path(path):
+        """업로드 파일의 동시 디코딩 결과(16kHz mono s16le) 경로"""
+        return path + '.pcm'
+
+    def get(self, upload_id):
+        """업로드 상태 (없으면 None)"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT upload_id, filename, path, size, received, sha256, created_at, updated_at '
+                'FROM uploads WHERE upload_id = ?',
+                (upload_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('upload_id', 'filename', 'path', 'size', 'received', 'sha256', 'created_at', 'updated_at'), row))
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def write_chunk(self, upload_id, offset, data):
+        """offset 위치에 조각 기록 후 받은 바이트 수 반환 (그 사이 업로드가 삭제됐으면 None)
+
+        이미 받은 범위를 다시 보내면(재전송) 기록하지 않고 현재 위치를 반환하며,
+        아직 받지 않은 범위를 건너뛰면 ValueError.
+        """
+        with self._upload_lock(upload_id):
+            upload = self.get(upload_id)
+            if upload is None:
+                return None
+            received = upload['received']
+            if offset > received:
+                raise ValueError(f'{received} 바이트 위치부터 보내야 합니다. (요청 위치: {offset})')
+            if offset + len(data) > upload['size']:
+                raise ValueError('선언한 파일 크기를 넘는 조각입니다.')
+            if offset + len(data) <= received:
+                return received
+            
+            # 이미 받은 앞부분은 건너뛰고 나머지만 기록
+            data = data[received - offset:]
+            with open(upload['path'], 'r+b') as f:
+                f.seek(received)
+                f.write(data)
+            received += len(data)
+            
+            with self._lock:
+                decoder = self._decoders.get(upload_id)
+            if decoder is not None:
+                decoder.feed(data)
+                if received == upload['size']:
+                    decoder.close_input()  # complete 요청이 오기 전에 마무리 시작
+            
+            with self._lock:
+                digest, hashed = self._digests.get(upload_id, (None, 0))
+                if digest is not None and hashed == received - len(data):
+                    digest.update(data)
+                    self._digests[upload_id] = (digest, received)
+                else:
+                    self._digests.pop(upload_id, None)  # 순서가 끊긴 경우 complete 때 다시 계산
+                self._db.execute(
+                    'UPDATE uploads SET received = ?, updated_at = ? WHERE upload_id = ?',
+                    (received, time.time(), upload_id)
+                )
+            return received
+
+    def checksum(self, upload_id):
+        """받은 파일 전체의 SHA-256"""
+        with self._upload_lock(upload_id):
+            upload = self.get(upload_id)
+            with self._lock:
+                digest, hashed = self._digests.get(upload_id, (None, 0))
+            if digest is None or hashed != upload['received']:
+                digest = hashlib.sha256()
+                with open(upload['path'], 'rb') as f:
+                    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                with self._lock:
+                    self._digests[upload_id] = (digest, upload['received'])
+            return digest.copy().hexdigest()
+
+    def finish_decoding(self, upload_id):
+        """동시 디코딩 결과 경로 (없거나 실패했으면 None -> 워커가 직접 디코딩)
+
+        대기열 초과로 complete를 다시 호출하는 경우에는 이미 확정된 파일을 그대로 반환한다.
+        """
+        upload = self.get(upload_id)
+        with self._lock:
+            decoder = self._decoders.pop(upload_id, None)
+        if decoder is not None:
+            pcm_path = decoder.finish()
+            if pcm_path is None:
+                print(f"동시 디코딩 실패, 업로드 파일을 직접 디코딩합니다: {upload['filename']}")
+            return pcm_path
+        pcm_path = self.decoded_path(upload['path'])
+        return pcm_path if os.path.exists(pcm_path) else None
+
+    def discard(self, upload_id):
+        """업로드 상태 삭제 (파일과 디코딩 결과는 작업 입력으로 계속 사용)"""
+        with self._lock:
+            self._db.execute('DELETE FROM uploads WHERE upload_id = ?', (upload_id,))
+            self._digests.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+            decoder = self._decoders.pop(upload_id, None)
+        if decoder is not None:
+            decoder.abort()
+
+
+chunked_uploads = ChunkedUploadStore(TASK_DB_PATH)
+
+class BatchSubmissionStore:
+    """묶음 제출 기록 (batch_id -> 공통 옵션 + 항목별 task_id)
+
+    항목별 진행 상태는 작업 기록(tasks)에서 읽으므로 여기에는 제출 시점 정보만 저장
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        ''')
+
+    def create(self, batch_id, model, output_formats, items):
+        """묶음 기록 생성 (items: [{'task_id', 'filename', 'source'}])"""
+        record = {
+            'batch_id': batch_id,
+            'model': model,
+            'output_formats': output_formats,
+            'created_at': datetime.now().isoformat(),
+            'items': items
+        }
+        with self._lock:
+            self._db.execute('INSERT INTO batches (batch_id, created_at, data) VALUES (?, ?, ?)',
+                             (batch_id, time.time(), json.dumps(record, ensure_ascii=False)))
+        return record
+
+    def get(self, batch_id):
+        with self._lock:
+            row = self._db.execute('SELECT data FROM batches WHERE batch_id = ?', (batch_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, batch_id):
+        with self._lock:
+            self._db.execute('DELETE FROM batches WHERE batch_id = ?', (batch_id,))
+
+    def purge_before(self, cutoff):
+        """cutoff(시각) 이전에 만든 묶음 기록 삭제 -> 삭제한 개수"""
+        with self._lock:
+            return self._db.execute('DELETE FROM batches WHERE created_at < ?', (cutoff,)).rowcount
+
+batch_submissions = BatchSubmissionStore(TASK_DB_PATH)
+
+def file_sha256(path):
+    """서버에 있는 파일의 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_upload_with_hash(file, path):
+    """업로드 파일을 저장하면서 SHA-256 해시 계산 (파일을 다시 읽지 않음)"""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        while True:
+            chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+        size = f.tell()
+    record_upload_bytes(size, 'file')
+    return digest.hexdigest()
+
+def make_cache_key(audio_hash, model, engine):
+    """오디오 해시 + 모델 + 엔진 + 언어 + 디코딩 옵션으로 캐시 키 생성"""
+    key_source = json.dumps({
+        'audio': audio_hash,
+        'model': model,
+        'engine': engine,
+        'language': WHISPER_LANGUAGE,
+        'options': WHISPER_DECODE_OPTIONS
+    }, sort_keys=True)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+def find_cached_result(audio_hash, model):
+    """이 서버의 장치들이 쓰는 엔진 중 하나로 만든 캐시 결과 조회 (없으면 None)"""
+    for engine in dict.fromkeys(DEVICE_ENGINES.values()):
+        result = transcript_cache.get(make_cache_key(audio_hash, model, engine))
+        if result is not None:
+            return result
+    return None
+
+def complete_from_cache(task_id, input_file, output_formats, result, upload_seconds=None, client=None):
+    """캐시된 인식 결과로 작업을 즉시 완료 처리"""
+    task = {'task_id': task_id, 'input_file': input_file, 'output_formats': output_formats}
+    accounting = {'stages': {'upload': upload_seconds} if upload_seconds is not None else {}}
+    finish_task_outputs(task, result, '캐시된 결과 사용!', cache_hit=True, accounting=accounting, client=client)
+
+class WhisperModelPool:
+    """프로세스 안에 Whisper 모델을 상주시키는 모델 풀
+
+    - 모델 이름별로 최초 요청 시 로딩 (lazy loading)
+    - 메모리 상한을 넘으면 가장 오래 사용하지 않은 모델부터 해제 (LRU)
+    - 일정 시간 사용하지 않은 모델은 백그라운드에서 해제
+    - 같은 모델 인스턴스는 한 번에 하나의 작업만 사용 (디코딩 중 kv-cache 훅 충돌 방지)
+    - CPU 장치는 int8 양자화한 모델을 상주시킴 (양자화는 모델 로딩 시 1회)
+    """
+
+    def __init__(self, device, memory_budget_mb, idle_timeout):
+        self.device = device
+        self.engine = DEVICE_ENGINES[device]
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self._entries = OrderedDict()  # 모델 이름 -> 엔트리 (뒤쪽일수록 최근 사용)
+        self._known_sizes = {}  # 한 번 로딩했던 모델의 크기 (다시 로딩할 때 미리 공간 확보용)
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    @contextmanager
+    def acquire(self, name):
+        """모델을 빌려 쓰는 컨텍스트 매니저 (필요하면 로딩)"""
+        entry = self._checkout(name)
+        try:
+            with entry['run_lock']:
+                yield entry['model']
+        finally:
+            with self._lock:
+                entry['in_use'] -= 1
+                entry['last_used'] = time.time()
+
+    def _checkout(self, name):
+        """엔트리 사용 카운트를 올리고 모델이 없으면 로딩"""
+        self._start_janitor()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = {
+                    'model': None,
+                    'size': 0,
+                    'in_use': 0,
+                    'loaded_at': None,
+                    'last_used': time.time(),
+                    'load_lock': threading.Lock(),
+                    'run_lock': threading.Lock()
+                }
+                self._entries[name] = entry
+            entry['in_use'] += 1
+            self._entries.move_to_end(name)
+
+        try:
+            with entry['load_lock']:
+                if entry['model'] is None:
+                    with self._lock:
+                        # 이전에 로딩했던 크기를 알면 로딩 전에 미리 공간 확보
+                        self._evict_locked(extra_bytes=self._known_sizes.get(name, 0))
+                    model = self._load(name)
+                    size = whisper_engine.model_size_bytes(model)
+                    with self._lock:
+                        entry['model'] = model
+                        entry['size'] = size
+                        entry['loaded_at'] = time.time()
+                        self._known_sizes[name] = size
+                        self._evict_locked()
+        except Exception:
+            with self._lock:
+                entry['in_use'] -= 1
+                if entry['model'] is None and entry['in_use'] == 0:
+                    self._entries.pop(name, None)
+            raise
+        return entry
+
+    def _load(self, name):
+        """Whisper 모델 로딩 (torch/whisper는 첫 로딩 시점에 import)"""
+        print(f"[모델 풀] {name} 모델 로딩 중... (device: {self.device}, engine: {self.engine})")
+        started = time.time()
+        model = whisper_engine.load_model(name, self.device, self.engine)
+        print(f"[모델 풀] {name} 모델 로딩 완료 ({time.time() - started:.1f}초)")
+        return model
+
+    def _evict_locked(self, extra_bytes=0):
+        """메모리 상한을 넘는 동안 LRU 순서로 사용 중이 아닌 모델 해제 (self._lock 보유 상태에서 호출)"""
+        total = sum(entry['size'] for entry in self._entries.values()) + extra_bytes
+        for name in list(self._entries.keys()):
+            if total <= self.memory_budget:
+                break
+            entry = self._entries[name]
+            if entry['in_use'] > 0 or entry['model'] is None:
+                continue
+            total -= entry['size']
+            self._unload_locked(name, '메모리 상한 초과')
+
+    def _unload_locked(self, name, reason):
+        """모델 해제 (self._lock 보유 상태에서 호출)"""
+        entry = self._entries.pop(name)
+        entry['model'] = None
+        print(f"[모델 풀] {name} 모델 해제 ({reason})")
+        gc.collect()
+        if str(self.device).startswith('cuda'):
+            import torch
+            torch.cuda.empty_cache()
+
+    def known_size(self, name):
+        """한 번 로딩했던 모델의 메모리 크기(바이트) (로딩한 적이 없으면 None)"""
+        with self._lock:
+            return self._known_sizes.get(name)
+
+    def unload_idle(self):
+        """idle_timeout 동안 사용되지 않은 모델 해제"""
+        now = time.time()
+        with self._lock:
+            for name in list(self._entries.keys()):
+                entry = self._entries[name]
+                if entry['in_use'] == 0 and entry['model'] is not None \
+                        and now - entry['last_used'] > self.idle_timeout:
+                    self._unload_locked(name, f'{self.idle_timeout}초 동안 미사용')
+
+    def _start_janitor(self):
+        """미사용 모델 해제 스레드 시작 (최초 1회)"""
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(target=self._janitor_loop, daemon=True)
+            self._janitor.start()
+
+    def _janitor_loop(self):
+        interval = max(5, min(60, self.idle_timeout // 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.unload_idle()
+            except Exception as e:
+                print(f"[모델 풀] 미사용 모델 정리 오류: {e}")
+
+    def stats(self):
+        """현재 상주 중인 모델 정보"""
+        with self._lock:
+            return [{
+                'model': name,
+                'engine': self.engine,
+                'size_mb': round(entry['size'] / (1024 * 1024), 1),
+                'in_use': entry['in_use'],
+                'loaded': entry['model'] is not None,
+                'idle_seconds': round(time.time() - entry['last_used'], 1)
+            } for name, entry in self._entries.items()]
+
+
+# 실시간 스트리밍 전용 모델 풀 (대기열 작업이 모델을 오래 점유해도 스트림 지연이 늘지 않도록 별도 인스턴스 사용)
+# 같은 모델이 두 풀에 함께 올라갈 수 있으므로 첫 번째 장치의 메모리 상한을 두 풀이 나눠 씀
+live_model_memory_mb = min(STREAM_MODEL_MEMORY_MB, MODEL_POOL_MEMORY_MB) if Sock is not None else 0
+live_model_pool = WhisperModelPool(WHISPER_DEVICES[0], live_model_memory_mb, MODEL_IDLE_TIMEOUT) \
+    if WHISPER_DEVICES else None
+
+def long_audio_workers(device):
+    """장치별 긴 녹음 병렬 프로세스 수"""
+    if LONG_AUDIO_WORKERS > 0:
+        return LONG_AUDIO_WORKERS
+    if str(device).startswith('cuda'):
+        return 1  # GPU 하나에 모델을 여러 벌 올리기보다 순차 처리
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+# 긴 녹음 병렬 인식 자식 프로세스의 모델 메모리 (병렬 인식을 쓰는 장치만, 상주 모델 메모리 상한에서 떼어 씀)
+long_audio_memory_mb = {
+    device: min(LONG_AUDIO_MEMORY_MB,
+                MODEL_POOL_MEMORY_MB - (live_model_memory_mb if device == WHISPER_DEVICES[0] else 0))
+    if long_audio_workers(device) >= 2 else 0
+    for device in WHISPER_DEVICES
+}
+
+# 장치별 모델 풀
+model_pools = {
+    device: WhisperModelPool(
+        device,
+        MODEL_POOL_MEMORY_MB - (live_model_memory_mb if device == WHISPER_DEVICES[0] else 0)
+        - long_audio_memory_mb[device],
+        MODEL_IDLE_TIMEOUT)
+    for device in WHISPER_DEVICES
+}
+stream_sessions = threading.BoundedSemaphore(STREAM_MAX_SESSIONS)
+
+class LongAudioProcessPool:
+    """긴 녹음 병렬 인식용 프로세스 풀 (장치별)
+
+    - 자식 프로세스마다 모델을 한 번 로딩해 두고 같은 모델의 다음 긴 작업에 재사용
+    - 다른 모델이 요청되면 풀을 새로 만들고, idle_timeout 동안 쓰지 않으면 종료
+    - 작업 하나가 모든 자식 프로세스를 사용하므로 한 번에 한 작업씩 처리
+    - 풀을 새로 만들면 모든 자식 프로세스의 모델 로딩이 끝난 뒤 인식을 시작 (load_model 단계 시간 측정)
+    - 자식 프로세스마다 모델을 한 벌씩 올리므로 memory_budget_mb 안에 들어가는 수만큼만 프로세스를 띄움
+      (workers_for 참고, 2개 미만이면 그 모델은 병렬 인식하지 않음)
+    """
+
+    def __init__(self, device, workers, memory_budget_mb, idle_timeout):
+        self.device = device
+        self.engine = DEVICE_ENGINES[device]
+        self.workers = workers
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_timeout = idle_timeout
+        self._executor = None
+        self._model = None
+        self._process_count = 0  # 현재 풀의 자식 프로세스 수
+        self._ready = None  # 자식 프로세스가 모델 로딩을 마치면 (pid, 로딩 시간)을 넣는 큐
+        self._last_used = time.time()
+        self._lock = threading.Lock()  # 풀 생성/종료
+        self._run_lock = threading.Lock()  # 작업 직렬화
+        self._janitor = None
+
+    @property
+    def enabled(self):
+        return self.workers >= 2
+
+    def workers_for(self, model):
+        """이 모델로 띄울 자식 프로세스 수 (모델 크기는 상주 풀에서 로딩해 본 값, 없으면 추정치)"""
+        size = model_pools[self.device].known_size(model) if self.device in model_pools else None
+        model_mb = size / (1024 * 1024) if size else whisper_engine.estimated_model_mb(model, self.engine)
+        return max(0, min(self.workers, int(self.memory_budget_mb // model_mb)))
+
+    def transcribe(self, model, audio, chunks, options, on_chunk=None, batch_size=1, on_stage=None):
+        """조각들을 병렬 인식해 병합한 결과 반환
+
+        on_stage(stage): 모델 준비를 시작할 때 'load_model', 인식을 시작할 때 'transcribe'로 호출
+        """
+        self._start_janitor()
+        with self._run_lock:
+            if on_stage is not None:
+                on_stage('load_model')
+            executor, created = self._get_executor(model)
+            try:
+                if created:
+                    self._wait_ready(executor, model)
+                if on_stage is not None:
+                    on_stage('transcribe')
+                return long_audio.transcribe_parallel(executor, audio, chunks, options, on_chunk, batch_size)
+            except BrokenProcessPool:
+                self.shutdown('자식 프로세스 비정상 종료')
+                raise
+            finally:
+                self._last_used = time.time()
+
+    def _get_executor(self, model):
+        """모델을 로딩한 프로세스 풀 -> (풀, 이번에 새로 만들었는지)"""
+        with self._lock:
+            if self._executor is not None and self._model != model:
+                self._shutdown_locked(f'{model} 모델로 교체')
+            if self._executor is not None:
+                return self._executor, False
+            workers = max(1, self.workers_for(model))
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            print(f"[병렬 인식] {model} 모델 프로세스 {workers}개 시작 (device: {self.device}, 프로세스당 스레드 {threads}개)")
+            # CUDA를 쓰는 자식 프로세스는 fork 할 수 없으므로 spawn 사용
+            context = multiprocessing.get_context('spawn')
+            self._ready = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=long_audio.init_worker,
+                initargs=(model, self.device, self.engine, threads, self._ready)
+            )
+            self._model = model
+            self._process_count = workers
+            return self._executor, True
+
+    def _wait_ready(self, executor, model):
+        """새로 만든 풀의 자식 프로세스를 모두 띄우고 모델 로딩이 끝날 때까지 대기"""
+        started = time.time()
+        for future in [executor.submit(long_audio.worker_ready) for _ in range(self._process_count)]:
+            future.result()  # 초기화(모델 로딩)에 실패하면 BrokenProcessPool
+        loaded = 0
+        while loaded < self._process_count:
+            try:
+                self._ready.get(timeout=1)
+                loaded += 1
+            except queue.Empty:
+                if any(not process.is_alive() for process in list((executor._processes or {}).values())):
+                    raise BrokenProcessPool('모델 로딩 중 자식 프로세스가 종료되었습니다.')
+        print(f"[병렬 인식] {model} 모델 프로세스 {self._process_count}개 준비 완료 ({time.time() - started:.1f}초)")
+
+    def shutdown(self, reason):
+        with self._lock:
+            self._shutdown_locked(reason)
+
+    def _shutdown_locked(self, reason):
+        if self._executor is None:
+            return
+        print(f"[병렬 인식] {self._model} 모델 프로세스 종료 ({reason})")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._model = None
+        self._process_count = 0
+
+    def _start_janitor(self):
+        """미사용 프로세스 풀 종료 스레드 시작 (최초 1회)"""
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(target=self._janitor_loop, daemon=True)
+            self._janitor.start()
+
+    def _janitor_loop(self):
+        interval = max(5, min(60, self.idle_timeout // 4))
+        while True:
+            time.sleep(interval)
+            # 실행 중인 작업이 없을 때만 종료
+            if self._run_lock.acquire(blocking=False):
+                try:
+                    if self._executor is not None and time.time() - self._last_used > self.idle_timeout:
+                        self.shutdown(f'{self.idle_timeout}초 동안 미사용')
+                finally:
+                    self._run_lock.release()
+
+    def process_ids(self):
+        """현재 자식 프로세스 pid 목록 (작업 자원 사용량 측정용)"""
+        with self._lock:
+            executor = self._executor
+        return list(executor._processes or ()) if executor is not None else []
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'enabled': self.enabled,
+                'memory_budget_mb': self.memory_budget_mb,
+                'processes': self._process_count,
+                'model': self._model,
+                'running': self._run_lock.locked()
+            }
+
+
+# 장치별 긴 녹음 병렬 인식 풀
+long_audio_pools = {
+    device: LongAudioProcessPool(device, long_audio_workers(device), long_audio_memory_mb[device], MODEL_IDLE_TIMEOUT)
+    for device in WHISPER_DEVICES
+}
+
+class JobScheduler:
+    """STT 작업 큐 + 장치별 고정 워커 스케줄러
+
+    - 대기열 크기를 제한하고, 가득 차면 submit()이 False를 반환 (호출 측에서 429 응답)
+    - 장치마다 workers_per_device 개의 워커 스레드가 대기열에서 작업을 꺼내 처리
+    - 대기 순번과 평균 처리 시간으로 Retry-After를 추정
+    - 같은 캐시 키(파일 내용 + 모델 + 옵션)의 작업이 이미 대기/실행 중이면 새 작업을 따로 돌리지 않고
+      기존 작업(leader)의 followers로 붙여 결과와 진행 상황을 공유 (single-flight)
+    - 짧은 작업(job['batchable'])은 batch_max_wait 동안 같은 모델의 대기 작업을 최대 batch_max_size 개까지
+      모아 한 번에 처리 (run_whisper_batch)
+    - 묶음 제출(/api/batch) 작업은 별도 대기열(bulk)에 쌓아 일반 대기열이 비었을 때만 처리하고,
+      장치마다 직전에 쓴 모델의 작업을 먼저 꺼내 모델 교체를 줄임 (같은 일반 요청이 합류하면 일반 대기열로 올림)
+    - 일반 대기열은 도착 순서가 아니라 점수가 가장 낮은 작업부터 처리 (_score 참고):
+      긴 녹음 하나가 짧은 메모들을 막지 않고, 한 요청자가 워커를 독차지하지 못함
+    """
+
+    def __init__(self, devices, workers_per_device, max_queue_size, batch_max_size=1, batch_max_wait=0.0,
+                 bulk_queue_size=0):
+        self.devices = devices
+        self.workers_per_device = workers_per_device
+        self.max_queue_size = max_queue_size
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait = batch_max_wait
+        self.bulk_queue_size = bulk_queue_size
+        self._pending = deque()
+        self._bulk_pending = deque()  # 묶음 제출 작업 (우선순위 낮음)
+        self._last_model = {}  # 장치 -> 마지막으로 처리한 모델
+        self._model_rtf = {}  # 모델 -> 처리 시간 / 오디오 길이 (이동 평균)
+        self._client_usage = {}  # 요청자 -> [최근 사용량(예상 처리 초), 갱신 시각]
+        self._running = {}  # task_id -> 작업
+        self._inflight = {}  # cache_key -> 대기/실행 중인 leader 작업
+        self._cond = threading.Condition()
+        self._workers = []
+        self._busy_workers = 0
+        self._avg_job_seconds = None
+
+    def _start_workers(self):
+        """워커 스레드 시작 (최초 작업 제출 시 1회)"""
+        with self._cond:
+            if self._workers:
+                return
+            for device in self.devices:
+                for index in range(self.workers_per_device):
+                    worker = threading.Thread(
+                        target=self._worker_loop,
+                        args=(device,),
+                        name=f'whisper-worker-{device}-{index}',
+                        daemon=True
+                    )
+                    worker.start()
+                    self._workers.append(worker)
+
+    def submit(self, job):
+        """작업 제출 (대기열이 가득 차면 False)
+
+        같은 작업이 이미 진행 중이면 대기열 자리를 쓰지 않고 그 작업에 합류하며,
+        이때 job['attached_to']에 leader의 task_id가 기록된다.
+        """
+        self._start_workers()
+        cache_key = job.get('cache_key')
+        with self._cond:
+            if cache_key not in self._inflight and len(self._pending) >= self.max_queue_size:
+                return False
+            if self._add_locked(job, self._pending) is None:
+                # 묶음을 모으는 워커와 쉬고 있는 워커가 모두 새 작업을 확인하도록 전체 알림
+                self._cond.notify_all()
+        return True
+
+    def submit_bulk(self, jobs):
+        """묶음 제출 작업을 주어진 순서대로 한꺼번에 등록 (자리가 모자라면 하나도 등록하지 않고 False)"""
+        self._start_workers()
+        with self._cond:
+            new_keys = set()
+            needed = 0
+            for job in jobs:
+                cache_key = job.get('cache_key')
+                if cache_key is None or (cache_key not in self._inflight and cache_key not in new_keys):
+                    new_keys.add(cache_key)
+                    needed += 1
+            if len(self._bulk_pending) + needed > self.bulk_queue_size:
+                return False
+            for job in jobs:
+                self._add_locked(job, self._bulk_pending)
+            self._cond.notify_all()
+        return True
+
+    def _add_locked(self, job, pending):
+        """pending 대기열에 추가하거나 진행 중인 동일 작업에 합류 (합류하면 leader 반환, self._cond 보유 상태)
+
+        일반 요청이 아직 시작하지 않은 묶음 제출 작업에 합류하면 그 작업을 일반 대기열로 올려
+        묶음 대기열의 지연을 물려받지 않게 한다.
+        """
+        cache_key = job.get('cache_key')
+        leader = self._inflight.get(cache_key) if cache_key else None
+        if leader is not None:
+            if pending is self._pending and leader['bulk'] and any(queued is leader for queued in self._bulk_pending):
+                self._bulk_pending.remove(leader)
+                leader['bulk'] = False
+                self._pending.append(leader)
+                self._cond.notify_all()
+                print(f"[스케줄러] {leader['task_id']} -> 같은 일반 요청이 들어와 묶음 대기열에서 일반 대기열로 이동")
+            job['attached_to'] = leader['task_id']
+            # followers에 보이기 전에 상태를 기록해야 그 사이 leader가 끝나도 완료 상태를 덮어쓰지 않음
+            self._inherit_leader_status(job, leader)
+            leader['followers'].append(job)
+            jobs_total.inc(model=job['model'], result='coalesced')
+            return leader
+        job['enqueued_at'] = time.time()
+        job['followers'] = []
+        job['bulk'] = pending is self._bulk_pending
+        pending.append(job)
+        if cache_key:
+            self._inflight[cache_key] = job
+        return None
+
+    @staticmethod
+    def _inherit_leader_status(job, leader):
+        """합류 시점의 leader 상태를 그대로 이어받음 (이후 갱신은 leader와 함께 전달됨, self._cond 보유 상태)"""
+        leader_status = get_task_status(leader['task_id'])
+        update_task_status(
+            job['task_id'], leader_status['status'], leader_status.get('progress', 0),
+            leader_status.get('message', ''), stage=leader_status.get('stage'),
+            attached_to=leader['task_id']
+        )
+        print(f"[스케줄러] {job['task_id']} -> 진행 중인 동일 작업 {leader['task_id']}에 합류")
+
+    def release_followers(self, job):
+        """작업 종료 시 single-flight 등록 해제 후 합류한 작업 목록 반환
+
+        결과 캐시 저장 후에 호출해야 이후 같은 요청이 캐시에서 바로 처리된다.
+        """
+        with self._cond:
+            if job.get('cache_key') and self._inflight.get(job['cache_key']) is job:
+                del self._inflight[job['cache_key']]
+            return list(job.get('followers', []))
+
+    def queue_position(self, task_id):
+        """대기 순번 (1부터 시작, 대기 중이 아니면 None). 합류한 작업은 leader의 순번"""
+        return self.queue_positions([task_id]).get(task_id)
+
+    def queue_positions(self, task_ids):
+        """여러 작업의 대기 순번을 한 번에 조회 {task_id: 순번} (묶음 제출 작업은 일반 대기열 뒤 순번)"""
+        wanted = set(task_ids)
+        positions = {}
+        with self._cond:
+            for position, job in enumerate(self._ordered_pending_locked(), 1):
+                for queued_task_id in job_task_ids(job):
+                    if queued_task_id in wanted:
+                        positions[queued_task_id] = position
+        return positions
+
+    def retry_after(self):
+        """대기열 자리가 날 때까지 예상 시간(초)"""
+        with self._cond:
+            job_seconds = self._avg_job_seconds or DEFAULT_JOB_SECONDS
+            worker_count = max(1, len(self.devices) * self.workers_per_device)
+            return max(1, int(math.ceil(job_seconds / worker_count)))
+
+    def _take_batch_locked(self, batch):
+        """batch[0]이 있던 대기열에서 같은 모델의 묶을 수 있는 작업을 처리 순서대로 꺼내 batch에 추가 (self._cond 보유 상태)
+
+        일반 작업에는 같은 점수(_score) 순서로 일반 대기열의 작업만, 묶음 제출 작업에는 묶음 대기열의 작업만 묶는다.
+        """
+        if batch[0]['bulk']:
+            pending = self._bulk_pending
+            candidates = list(pending)
+        else:
+            pending = self._pending
+            now = time.time()
+            candidates = sorted(pending, key=lambda job: self._score(job, now))
+        for job in candidates:
+            if len(batch) >= self.batch_max_size:
+                return
+            if job.get('batchable') and job['model'] == batch[0]['model']:
+                pending.remove(job)
+                batch.append(job)
+
+    def _estimated_cost(self, job):
+        """예상 처리 시간(초) = 오디오 길이 x 모델별 처리 배율 (처리할수록 실제 값으로 갱신)"""
+        duration = job['audio_duration'] if job.get('audio_duration') is not None else UNKNOWN_AUDIO_SECONDS
+        return duration * self._model_rtf.get(job['model'], DEFAULT_REALTIME_FACTOR)
+
+    def _client_load(self, client, now):
+        """요청자의 최근 사용량 (FAIR_SHARE_HALF_LIFE 마다 절반으로 줄어듦)"""
+        usage, updated_at = self._client_usage.get(client, (0.0, now))
+        return usage * 0.5 ** ((now - updated_at) / FAIR_SHARE_HALF_LIFE)
+
+    def _charge_locked(self, job, now):
+        """작업을 꺼낼 때 요청자 사용량에 예상 처리 시간을 더함 (실행 중인 작업도 사용량에 포함됨)"""
+        client = job.get('client')
+        self._client_usage[client] = [self._client_load(client, now) + self._estimated_cost(job), now]
+        # 오래 쓰지 않은 요청자 정리 (사용량이 사실상 0)
+        stale = [c for c, (_, updated_at) in self._client_usage.items() if now - updated_at > FAIR_SHARE_HALF_LIFE * 10]
+        for c in stale:
+            del self._client_usage[c]
+
+    def _score(self, job, now):
+        """낮을수록 먼저: 예상 처리 시간 + 요청자 최근 사용량 x FAIR_SHARE_WEIGHT - 대기 시간 x SCHEDULER_AGING
+
+        짧은 작업이 먼저 처리되지만 오래 기다린 작업은 점수가 계속 낮아져 결국 처리되고(기아 방지),
+        많이 쓴 요청자의 작업은 다른 요청자의 작업보다 뒤로 밀림
+        """
+        return (self._estimated_cost(job)
+                + FAIR_SHARE_WEIGHT * self._client_load(job.get('client'), now)
+                - SCHEDULER_AGING * (now - job['enqueued_at']))
+
+    def _ordered_pending_locked(self):
+        """처리될 순서대로 정렬한 대기 작업 (일반 대기열 점수순, 그 뒤 묶음 제출 작업)"""
+        now = time.time()
+        return sorted(self._pending, key=lambda job: self._score(job, now)) + list(self._bulk_pending)
+
+    def _next_job_locked(self, device):
+        """다음 작업: 일반 대기열에서 점수가 가장 낮은 작업, 비었으면 묶음 제출 작업 중 이 장치가 직전에 쓴 모델의 작업 우선"""
+        if self._pending:
+            now = time.time()
+            job = min(self._pending, key=lambda job: self._score(job, now))
+            self._pending.remove(job)
+            return job
+        last_model = self._last_model.get(device)
+        for job in self._bulk_pending:
+            if job['model'] == last_model:
+                self._bulk_pending.remove(job)
+                return job
+        return self._bulk_pending.popleft()
+
+    def _worker_loop(self, device):
+        while True:
+            with self._cond:
+                while not self._pending and not self._bulk_pending:
+                    self._cond.wait()
+                job = self._next_job_locked(device)
+                self._last_model[device] = job['model']
+                batch = [job]
+                if job.get('batchable') and self.batch_max_size > 1:
+                    # 같은 모델의 짧은 작업이 더 들어올 수 있도록 최대 batch_max_wait 동안 모음
+                    deadline = time.time() + self.batch_max_wait
+                    while True:
+                        self._take_batch_locked(batch)
+                        remaining = deadline - time.time()
+                        if len(batch) >= self.batch_max_size or remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                self._busy_workers += 1
+                now = time.time()
+                for batch_job in batch:
+                    self._running[batch_job['task_id']] = batch_job
+                    self._charge_locked(batch_job, now)
+
+            started = time.time()
+            for batch_job in batch:
+                queue_wait_seconds.observe(started - batch_job['enqueued_at'], model=batch_job['model'])
+            try:
+                if len(batch) > 1:
+                    run_whisper_batch(batch, device)
+                else:
+                    run_whisper_background(job, device)
+            except Exception as e:
+                print(f"[스케줄러] 작업 처리 오류 ({', '.join(batch_job['task_id'] for batch_job in batch)}): {e}")
+            finally:
+                total_elapsed = time.time() - started
+                elapsed = total_elapsed / len(batch)
+                # 모델별 처리 배율 학습용: 디코딩 후 기록된 실제 오디오 길이 (실패한 작업이 있으면 학습하지 않음)
+                statuses = [get_task_status(batch_job['task_id']) for batch_job in batch]
+                completed = all(status.get('status') == 'completed' for status in statuses)
+                batch_audio = sum(status.get('audio_duration') or 0 for status in statuses)
+                with self._cond:
+                    self._busy_workers -= 1
+                    for batch_job in batch:
+                        self._running.pop(batch_job['task_id'], None)
+                    if completed and batch_audio > 0:
+                        rtf = total_elapsed / batch_audio
+                        previous = self._model_rtf.get(job['model'])
+                        self._model_rtf[job['model']] = rtf if previous is None else 0.8 * previous + 0.2 * rtf
+                    if self._avg_job_seconds is None:
+                        self._avg_job_seconds = elapsed
+                    else:
+                        self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+
+    def stats(self):
+        """대기열/워커 현황"""
+        with self._cond:
+            return {
+                'queued': len(self._pending),
+                'bulk_queued': len(self._bulk_pending),
+                'running': len(self._running),
+                'busy_workers': self._busy_workers,
+                'coalesced': sum(len(job['followers']) for job in self._inflight.values()),
+                'max_queue_size': self.max_queue_size,
+                'bulk_queue_size': self.bulk_queue_size,
+                'workers': len(self.devices) * self.workers_per_device,
+                'devices': self.devices,
+                'realtime_factors': {model: round(rtf, 3) for model, rtf in self._model_rtf.items()},
+                'clients': len(self._client_usage),
+                'batch_max_size': self.batch_max_size
+            }
+
+
+scheduler = JobScheduler(WHISPER_DEVICES, WORKERS_PER_DEVICE, MAX_QUEUE_SIZE,
+                         batch_max_size=BATCH_MAX_SIZE, batch_max_wait=BATCH_MAX_WAIT_MS / 1000,
+                         bulk_queue_size=BATCH_SUBMIT_QUEUE_SIZE)
+
+# 운영 지표 - 작업을 처리하는 프로세스(단독 실행 또는 모델 서버)에서 누적, HTTP 전용 워커는 모델 서버에 요청
+metrics_registry = metrics.Registry()
+jobs_total = metrics_registry.counter(
+    'whisper_jobs_total', 'STT 작업 수 (result: completed, error, cached, coalesced, rejected)', ('model', 'result'))
+queue_wait_seconds = metrics_registry.histogram(
+    'whisper_queue_wait_seconds', '대기열 등록부터 워커가 꺼낼 때까지 걸린 시간', ('model',))
+stage_seconds = metrics_registry.histogram(
+    'whisper_stage_seconds', '처리 단계별 소요 시간 (decode_audio, load_model, transcribe, write_outputs)',
+    ('model', 'stage'))
+job_duration_seconds = metrics_registry.histogram(
+    'whisper_job_duration_seconds', '대기열 등록부터 결과 파일 생성까지 걸린 시간 (end-to-end)', ('model',))
+realtime_factor = metrics_registry.histogram(
+    'whisper_realtime_factor', '처리 시간 / 오디오 길이 (대기 시간 제외, 1 미만이면 실시간보다 빠름)', ('model',),
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5))
+upload_bytes_total = metrics_registry.counter(
+    'whisper_upload_bytes_total', '받은 업로드 바이트 수 (kind: file, chunk)', ('kind',))
+metrics_registry.callback('whisper_queue_depth', '대기 중인 작업 수', lambda: scheduler.stats()['queued'])
+metrics_registry.callback('whisper_bulk_queue_depth', '대기 중인 묶음 제출(/api/batch) 작업 수',
+                          lambda: scheduler.stats()['bulk_queued'])
+metrics_registry.callback('whisper_jobs_running', '처리 중인 작업 수 (묶음 처리 작업 포함)',
+                          lambda: scheduler.stats()['running'])
+metrics_registry.callback('whisper_workers_busy', '작업을 처리 중인 워커 수', lambda: scheduler.stats()['busy_workers'])
+metrics_registry.callback('whisper_workers', '전체 워커 수', lambda: scheduler.stats()['workers'])
+metrics_registry.callback('whisper_queue_capacity', '대기열 상한', lambda: scheduler.max_queue_size)
+metrics_registry.callback(
+    'whisper_models_loaded', '상주 중인 모델 (pool: jobs, live)',
+    lambda: {(pool_name, pool.device, entry['model']): int(entry['loaded'])
+             for pool_name, pools in (('jobs', model_pools.values()), ('live', [live_model_pool] if live_model_pool else []))
+             for pool in pools for entry in pool.stats()},
+    ('pool', 'device', 'model'))
+metrics_registry.callback(
+    'whisper_cache_lookups_total', '캐시 조회 수 (cache: transcript, pcm / result: hit, miss)',
+    lambda: {(name, result): getattr(cache, attribute)
+             for name, cache in (('transcript', transcript_cache), ('pcm', decoded_audio_cache))
+             for result, attribute in (('hit', 'hits'), ('miss', 'misses'))},
+    ('cache', 'result'), type_name='counter')
+metrics_registry.callback(
+    'whisper_cache_hit_ratio', '캐시 적중률 (조회가 없으면 생략)',
+    lambda: {name: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else None
+             for name, cache in (('transcript', transcript_cache), ('pcm', decoded_audio_cache))},
+    ('cache',))
+metrics_registry.callback('whisper_disk_usage_bytes', '폴더 사용량 (path: uploads, outputs)',
+                          lambda: disk_usage_snapshot(), ('path',))
+
+_disk_usage = {'checked_at': 0, 'values': {}}
+_disk_usage_lock = threading.Lock()
+
+def disk_usage_snapshot():
+    """업로드/결과 폴더 크기 (DISK_USAGE_CACHE_SECONDS 동안 재사용)"""
+    with _disk_usage_lock:
+        if time.time() - _disk_usage['checked_at'] >= DISK_USAGE_CACHE_SECONDS:
+            _disk_usage['values'] = {
+                'uploads': directory_usage(UPLOAD_FOLDER)[0],
+                'outputs': directory_usage(DATA_OUTPUT_PATH)[0]
+            }
+            _disk_usage['checked_at'] = time.time()
+        return dict(_disk_usage['values'])
+
+def record_upload_bytes(nbytes, kind):
+    """업로드 바이트 수 누적 (HTTP 전용 워커면 모델 서버에 전달, 실패해도 업로드는 계속)"""
+    try:
+        on_model_server('record_upload', nbytes, kind)
+    except model_server.ModelServerUnavailable:
+        pass
+
+def new_task_id():
+    """시간 기반 task_id 생성"""
+    now = datetime.now()
+    time_part = now.strftime("%Y%m%d_%H%M%S")
+    uuid_part = str(uuid.uuid4())[:4]
+    return f"{time_part}_{uuid_part}"
+
+def make_job(task_id, input_file, model, output_formats, audio_hash=None, pcm_file=None, upload_seconds=None,
+             client=None):
+    """스케줄러 작업 생성 (업로드 직후 오디오 길이를 확인해 예상 처리 시간 순서에 사용)
+
+    pcm_file: 업로드 중 미리 디코딩된 16kHz mono s16le 파일 (있으면 워커의 디코딩 단계 생략)
+    upload_seconds: 업로드에 걸린 시간 (작업 자원 사용량의 upload 단계로 기록)
+    client: 공정 분배 단위 요청자 (request_client_id)
+    """
+    audio_duration = probe_audio_duration(input_file, pcm_file, audio_hash)
+    return {
+        'task_id': task_id,
+        'input_file': input_file,
+        'model': model,
+        'output_formats': output_formats,
+        'audio_hash': audio_hash,
+        # 같은 파일/모델 작업 합류용 키 (실제 캐시 저장은 실행한 장치의 엔진 기준)
+        'cache_key': make_cache_key(audio_hash, model, DEVICE_ENGINES[WHISPER_DEVICES[0]]) if audio_hash else None,
+        'pcm_file': pcm_file,
+        'upload_seconds': upload_seconds,
+        'client': client,
+        'audio_duration': audio_duration,
+        # 길이를 아는 짧은 작업만 다른 작업과 묶어 처리
+        'batchable': audio_duration is not None and audio_duration <= BATCH_MAX_AUDIO_SECONDS
+    }
+
+def submit_transcription(task_id, input_file, model, output_formats, audio_hash=None, pcm_file=None,
+                         upload_seconds=None, client=None):
+    """STT 작업을 대기열에 등록 (대기열이 가득 차면 False)"""
+    update_task_status(task_id, 'queued', 0, '대기열에 등록되었습니다.', cache_hit=False, client=client)
+    accepted = scheduler.submit(make_job(task_id, input_file, model, output_formats, audio_hash, pcm_file,
+                                         upload_seconds, client))
+    if not accepted:
+        cleanup_status_file(task_id)
+    return accepted
+
+def start_transcription(task_id, input_file, model, output_formats, audio_hash=None, pcm_file=None,
+                        upload_seconds=None, client=None):
+    """STT 시작: 같은 파일/모델/옵션의 결과가 캐시에 있으면 바로 완료('cached'),
+    아니면 대기열에 등록('queued'), 대기열이 가득 차면 None
+    """
+    cached_result = find_cached_result(audio_hash, model) if audio_hash else None
+    if cached_result is not None:
+        complete_from_cache(task_id, input_file, output_formats, cached_result, upload_seconds, client)
+        jobs_total.inc(model=model, result='cached')
+        return 'cached'
+    if submit_transcription(task_id, input_file, model, output_formats, audio_hash, pcm_file, upload_seconds, client):
+        return 'queued'
+    jobs_total.inc(model=model, result='rejected')
+    return None
+
+def start_batch(batch_id, items, model, output_formats, client=None):
+    """묶음 제출 항목 시작 -> {'queued': 개수, 'cached': 개수}, 묶음 대기열 자리가 모자라면 None
+
+    items: [{'task_id', 'path', 'audio_hash', 'upload_seconds'}]
+    캐시에 결과가 있는 항목은 바로 완료하고, 나머지는 오디오가 긴 것부터 등록해 워커 여러 개가 함께 끝나도록 함
+    (길이를 모르는 항목은 맨 앞, 짧은 항목은 뒤쪽에 모여 같은 모델끼리 묶음 디코딩됨)
+    """
+    cached, jobs = [], []
+    for item in items:
+        cached_result = find_cached_result(item['audio_hash'], model)
+        if cached_result is not None:
+            cached.append((item, cached_result))
+            continue
+        update_task_status(item['task_id'], 'queued', 0, '묶음 대기열에 등록되었습니다.', cache_hit=False,
+                           batch_id=batch_id, client=client)
+        jobs.append(make_job(item['task_id'], item['path'], model, output_formats, item['audio_hash'],
+                             upload_seconds=item.get('upload_seconds'), client=client))
+    jobs.sort(key=lambda job: -(job['audio_duration'] if job['audio_duration'] is not None else math.inf))
+    if jobs and not scheduler.submit_bulk(jobs):
+        for job in jobs:
+            cleanup_status_file(job['task_id'])
+        return None
+    for item, cached_result in cached:
+        complete_from_cache(item['task_id'], item['path'], output_formats, cached_result, item.get('upload_seconds'),
+                            client)
+        task_store.update(item['task_id'], batch_id=batch_id)
+        jobs_total.inc(model=model, result='cached')
+    print(f"[묶음 제출] {batch_id}: {len(jobs)}개 대기열 등록, {len(cached)}개 캐시 사용 (모델: {model})")
+    return {'queued': len(jobs), 'cached': len(cached)}
+
+def request_client_id():
+    """공정 분배 단위 요청자: X-API-Key 헤더(해시로 저장), 없으면 접속 IP"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+    return 'ip:' + (request.remote_addr or 'unknown')
+
+def on_model_server(method, *args):
+    """작업/모델 관련 요청 실행 (HTTP 전용 워커면 모델 서버에 IPC로 요청, 아니면 이 프로세스에서 처리)"""
+    if model_server_client is not None:
+        return model_server_client.call(method, *args)
+    return MODEL_SERVER_METHODS[method](*args)
+
+def probe_audio_duration(input_file, pcm_file=None, audio_hash=None):
+    """오디오 길이(초) (디코딩된 오디오가 있으면 크기로 계산, WAV는 헤더, 그 외 ffprobe, 알 수 없으면 None)
+
+    None이면 묶음 처리 대상에서 빠지고 대기열 순서는 UNKNOWN_AUDIO_SECONDS 길이로 추정한다.
+    """
+    if audio_hash and decoded_audio_cache.has(audio_hash):
+        return decoded_audio_cache.duration(audio_hash)
+    if pcm_file and os.path.exists(pcm_file):
+        return os.path.getsize(pcm_file) / 2 / SAMPLE_RATE
+    if input_file.lower().endswith('.wav'):
+        duration = wav_duration(input_file)
+        if duration is not None:
+            return duration
+    try:
+        output = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', input_file],
+            capture_output=True, text=True, timeout=30
+        )
+        return float(output.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        print(f"오디오 길이 확인 실패, 길이를 모르는 작업으로 처리합니다: {os.path.basename(input_file)} ({e})")
+        return None
+
+def job_task_ids(job):
+    """작업과 합류한 작업들의 task_id 목록"""
+    return [job['task_id']] + [follower['task_id'] for follower in list(job.get('followers', []))]
+
+def update_job_status(job, status, progress=0, message="", **extra):
+    """작업과 합류한 작업들의 상태를 함께 갱신"""
+    for task_id in job_task_ids(job):
+        update_task_status(task_id, status, progress, message, **extra)
+
+def queue_full_response(error_key):
+    """대기열 초과 시 429 + Retry-After 응답"""
+    retry_after = on_model_server('retry_after')
+    response = jsonify({
+        'success': False,
+        error_key: f'대기 중인 작업이 너무 많습니다. {retry_after}초 후 다시 시도해주세요.',
+        'retry_after': retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+class _TranscribeProgressBar:
+    """whisper transcribe()의 진행바(tqdm) 자리에 들어가는 클래스
+
+    transcribe()는 30초 윈도우를 디코딩할 때마다 진행바를 디코딩한 프레임 수만큼 갱신하므로,
+    그 누적값을 on_update(decoded_frames, total_frames)로 전달한다. 무음으로 건너뛴 윈도우는 세지 않는다.
+    """
+
+    def __init__(self, on_update, total=None):
+        self.on_update = on_update
+        self.total = total
+        self.n = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1):
+        self.n += n
+        try:
+            self.on_update(self.n, self.total)
+        except Exception as e:
+            print(f"진행 콜백 오류: {e}")
+
+
+def transcribe_with_progress(whisper_model, audio, on_progress, **options):
+    """진행 콜백을 받으면서 whisper transcribe 실행 (결과는 model.transcribe()와 같음)
+
+    on_progress(decoded_frames, total_frames)는 윈도우 디코딩이 끝날 때마다 호출된다.
+    whisper 모듈은 그대로 두고, 진행바(tqdm)만 바꾼 transcribe 함수 사본을 이 호출에서만 사용한다.
+    """
+    function = whisper_model.transcribe.__func__
+    progress_module = types.SimpleNamespace(
+        tqdm=lambda *args, total=None, **kwargs: _TranscribeProgressBar(on_progress, total)
+    )
+    transcribe = types.FunctionType(function.__code__, dict(function.__globals__, tqdm=progress_module),
+                                    function.__name__, function.__defaults__, function.__closure__)
+    transcribe.__kwdefaults__ = function.__kwdefaults__
+    return transcribe(whisper_model, audio, verbose=None, **options)
+
+def read_process_usage(pid):
+    """/proc/<pid>에서 (CPU 초, RSS 바이트) 읽기 ('self' 가능, 리눅스 외 환경이나 종료된 프로세스면 None)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()  # 프로세스 이름에 공백이 있어도 되도록 ')' 뒤부터
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss_pages * PAGE_SIZE
+
+class TaskProgress:
+    """처리 단계와 실제 디코딩 위치로 진행률을 계산해 상태에 반영
+
+    transcribe 단계의 진행률은 디코딩된 세그먼트의 끝 시각 / 전체 오디오 길이로 계산하고,
+    오디오 초 / 경과 초(실시간 배속)와 남은 시간 추정치를 함께 보고한다.
+    단계별 소요 시간, CPU 시간, 최대 메모리도 함께 모아 작업 완료 시 accounting으로 기록한다.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.stage = None
+        self.stage_started_at = None
+        self.started_at = time.time()
+        self.audio_duration = None
+        self.transcribe_started_at = None
+        self.timings = {}  # 단계 -> 소요 시간(초)
+        self.cpu_share = 1.0  # 묶음 처리에서 이 작업 몫 (오디오 길이 비율)
+        self._cpu_started = time.process_time()
+        self._child_pids = None
+        self._child_cpu = {}  # 병렬 인식 자식 프로세스 pid -> [측정 시작 CPU 초, 마지막 CPU 초]
+        self._peak_rss = 0
+        self._sample_usage()
+
+    def watch_processes(self, pids_fn):
+        """병렬 인식 자식 프로세스의 CPU/메모리도 이 작업 사용량에 포함 (pids_fn() -> 현재 pid 목록)"""
+        self._child_pids = pids_fn
+        for pid in pids_fn():
+            usage = read_process_usage(pid)
+            if usage is not None:
+                self._child_cpu[pid] = [usage[0], usage[0]]
+
+    def _sample_usage(self):
+        """현재 메모리 사용량으로 최대값 갱신 (자식 프로세스는 CPU 시간도 기록)"""
+        usage = read_process_usage('self')
+        rss = usage[1] if usage else 0
+        for pid in self._child_pids() if self._child_pids else ():
+            usage = read_process_usage(pid)
+            if usage is None:
+                continue
+            # 작업 중에 새로 뜬 자식 프로세스는 모델 로딩부터 이 작업 몫
+            self._child_cpu.setdefault(pid, [0.0, 0.0])[1] = usage[0]
+            rss += usage[1]
+        self._peak_rss = max(self._peak_rss, rss)
+
+    def _end_stage(self):
+        """진행 중인 단계 소요 시간 기록"""
+        if self.stage is not None:
+            elapsed = time.time() - self.stage_started_at
+            self.timings[self.stage] = self.timings.get(self.stage, 0) + elapsed
+            stage_seconds.observe(elapsed, model=self.job['model'], stage=self.stage)
+
+    def enter(self, stage, message=None):
+        """새 단계 시작"""
+        self._end_stage()
+        self.stage = stage
+        self.stage_started_at = time.time()
+        start, _, default_message = TASK_STAGES[stage]
+        if stage == 'transcribe':
+            self.transcribe_started_at = time.time()
+        self._report(start, message or default_message)
+
+    def on_decode(self, decoded_frames, total_frames):
+        """whisper 윈도우 디코딩 콜백 (transcribe_with_progress의 on_progress)"""
+        self.transcribed(decoded_frames / FRAMES_PER_SECOND)
+
+    def transcribed(self, processed_seconds):
+        """transcribe 단계에서 processed_seconds 만큼 디코딩 완료"""
+        if not self.audio_duration:
+            return
+        processed_seconds = min(processed_seconds, self.audio_duration)
+        elapsed = max(time.time() - self.transcribe_started_at, 1e-6)
+        rate = processed_seconds / elapsed
+        eta = (self.audio_duration - processed_seconds) / rate if rate > 0 else None
+        start, end, _ = TASK_STAGES['transcribe']
+        progress = start + (end - start) * processed_seconds / self.audio_duration
+        self._report(
+            progress,
+            f'음성 분석 중... {processed_seconds:.0f}/{self.audio_duration:.0f}초 (실시간 대비 {rate:.1f}배속)',
+            processed_seconds=round(processed_seconds, 2),
+            realtime_rate=round(rate, 2),
+            eta_seconds=round(eta, 1) if eta is not None else None
+        )
+
+    def accounting(self):
+        """작업 자원 사용량 (진행 중인 단계를 끝내고 계산)
+
+        - stages: 업로드, 대기, 처리 단계별 소요 시간(초)
+        - cpu_seconds: 처리 중 이 프로세스 + 병렬 인식 자식 프로세스의 CPU 시간.
+          묶음 처리는 오디오 길이 비율로 나누며, 워커 여러 개가 동시에 처리하면 다른 작업 몫이 섞일 수 있음
+        - peak_rss_mb: 진행률을 갱신할 때마다 잰 메모리(RSS)의 최대값 (리눅스 외 환경에서는 None)
+        """
+        self._end_stage()
+        self.stage = None
+        self._sample_usage()
+        cpu = time.process_time() - self._cpu_started
+        cpu += sum(last - start for start, last in self._child_cpu.values())
+        stages = {}
+        if self.job.get('upload_seconds') is not None:
+            stages['upload'] = self.job['upload_seconds']
+        if self.job.get('enqueued_at'):
+            stages['queue_wait'] = round(self.started_at - self.job['enqueued_at'], 3)
+        stages.update((stage, round(seconds, 3)) for stage, seconds in self.timings.items())
+        return {
+            'stages': stages,
+            'processing_seconds': round(time.time() - self.started_at, 3),
+            'cpu_seconds': round(cpu * self.cpu_share, 3),
+            'peak_rss_mb': round(self._peak_rss / (1024 * 1024), 1) if self._peak_rss else None,
+            'audio_duration': round(self.audio_duration, 2) if self.audio_duration else None
+        }
+
+    def finish(self):
+        """작업 완료: 자원 사용량 반환 + 전체 소요 시간, 실시간 대비 처리 배율 지표 기록"""
+        accounting = self.accounting()
+        model = self.job['model']
+        jobs_total.inc(model=model, result='completed')
+        job_duration_seconds.observe(time.time() - self.job.get('enqueued_at', self.started_at), model=model)
+        if self.audio_duration:
+            realtime_factor.observe(accounting['processing_seconds'] / self.audio_duration, model=model)
+        return accounting
+
+    def _report(self, progress, message, **extra):
+        self._sample_usage()
+        update_job_status(
+            self.job, 'processing', round(progress, 1), message,
+            stage=self.stage,
+            audio_duration=round(self.audio_duration, 2) if self.audio_duration else None,
+            **extra
+        )
+
+def write_result_files(result, input_file, output_dir, output_formats):
+    """Whisper 결과를 선택한 형식의 파일로 저장 (whisper CLI와 같은 파일명)"""
+    from whisper.utils import get_writer
+    for output_format in output_formats:
+        writer = get_writer(output_format, output_dir)
+        writer(result, input_file)
+
+def write_transcript_index(result, output_dir):
+    """/api/text 조회용 세그먼트 색인 저장 (요청 형식과 관계없이 항상 생성)"""
+    index = {
+        'language': result.get('language'),
+        'segments': [{
+            'id': i,
+            'start': round(segment['start'], 2),
+            'end': round(segment['end'], 2),
+            'text': segment['text'].strip()
+        } for i, segment in enumerate(result['segments'])]
+    }
+    with open(os.path.join(output_dir, TRANSCRIPT_INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+
+def load_transcript_segments(task_id):
+    """작업 결과 세그먼트 목록 (색인이 없는 이전 작업은 JSON/TXT 결과 파일에서 복원, 없으면 None)"""
+    output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
+    index_path = os.path.join(output_dir, TRANSCRIPT_INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['segments']
+    if not os.path.isdir(output_dir):
+        return None
+    for filename in sorted(os.listdir(output_dir)):
+        file_path = os.path.join(output_dir, filename)
+        if filename.endswith('.json'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                segments = json.load(f).get('segments', [])
+            return [{'id': i, 'start': segment['start'], 'end': segment['end'], 'text': segment['text'].strip()}
+                    for i, segment in enumerate(segments)]
+    for filename in sorted(os.listdir(output_dir)):
+        if filename.endswith('.txt'):
+            # 타임스탬프 없는 TXT만 있으면 줄 단위로 세그먼트 구성
+            with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as f:
+                return [{'id': i, 'start': None, 'end': None, 'text': line.strip()}
+                        for i, line in enumerate(f.read().splitlines()) if line.strip()]
+    return None
+
+def transcript_page(segments, args):
+    """세그먼트 범위 선택 + 글자 단위 페이지 (TXT 결과와 같은 '세그먼트당 한 줄' 텍스트 기준)
+
+    args: segment_start/segment_end(세그먼트 번호, end는 미포함), time_start/time_end(초),
+          offset/limit(선택한 텍스트 안의 글자 위치), include_segments(1이면 세그먼트 목록 포함)
+    """
+    def int_arg(name, default=None):
+        value = args.get(name)
+        return int(value) if value not in (None, '') else default
+
+    def float_arg(name):
+        value = args.get(name)
+        return float(value) if value not in (None, '') else None
+
+    first = max(0, int_arg('segment_start', 0))
+    last = int_arg('segment_end', len(segments))
+    selected = segments[first:last]
+    time_start, time_end = float_arg('time_start'), float_arg('time_end')
+    if time_start is not None or time_end is not None:
+        selected = [segment for segment in selected if segment['start'] is not None
+                    and (time_end is None or segment['start'] < time_end)
+                    and (time_start is None or segment['end'] > time_start)]
+
+    text = ''.join(segment['text'] + '\n' for segment in selected)
+    offset = max(0, int_arg('offset', 0))
+    limit = int_arg('limit')
+    end = len(text) if limit is None else min(len(text), offset + max(0, limit))
+    page = {
+        'text': text[offset:end],
+        'offset': offset,
+        'length': max(0, end - offset),
+        'total_length': len(text),
+        'next_offset': end if end < len(text) else None,
+        'segment_count': len(segments),
+        'selected_segments': [selected[0]['id'], selected[-1]['id'] + 1] if selected else None
+    }
+    if args.get('include_segments') in ('1', 'true'):
+        page['segments'] = selected
+    return page
+
+def publish_segments(job, segments):
+    """새로 인식된 세그먼트를 작업(과 합류한 작업)의 SSE 구독자에게 전달"""
+    for segment in segments:
+        for subscriber_task_id in job_task_ids(job):
+            event_hub.publish(subscriber_task_id, 'segment', {
+                'id': segment['id'],
+                'start': round(segment['start'], 2),
+                'end': round(segment['end'], 2),
+                'text': segment['text']
+            })
+
+def transcribe_long_audio(job, pool, audio, progress):
+    """긴 녹음 병렬 인식 (조각이 끝날 때마다 진행률 갱신, 세그먼트는 앞 조각부터 순서대로 발행)"""
+    model = job['model']
+    chunks = long_audio.plan_chunks(audio, LONG_AUDIO_CHUNK_SECONDS, LONG_AUDIO_OVERLAP_SECONDS)
+    
+    def on_stage(stage):
+        # 모델 로딩은 자식 프로세스에서 하므로 풀이 준비될 때까지를 load_model 단계로 기록
+        if stage == 'load_model':
+            progress.enter('load_model', f'{model} 모델 병렬 인식 프로세스 {pool.workers_for(model)}개 준비 중...')
+        else:
+            progress.enter('transcribe', f'{model} 모델로 {len(chunks)}개 구간 동시 분석 중...')
+            print(f"STT 병렬 실행: {job['input_file']}, 모델: {model}, {len(chunks)}개 구간, 프로세스 {pool.workers_for(model)}개")
+    
+    finished = {}
+    state = {'next_index': 0, 'next_id': 0, 'processed': 0.0}
+    
+    def on_chunk(chunk, chunk_result):
+        finished[chunk['index']] = chunk_result
+        state['processed'] += (chunk['keep_end'] - chunk['keep_start']) / SAMPLE_RATE
+        # 앞 조각이 모두 끝난 부분까지만 세그먼트 발행 (전체 기준 id로 번호 부여)
+        while state['next_index'] in finished:
+            index = state['next_index']
+            segments = long_audio.chunk_segments(chunks[index], finished[index])
+            for segment in segments:
+                segment['id'] = state['next_id']
+                state['next_id'] += 1
+            publish_segments(job, segments)
+            state['next_index'] += 1
+        progress.transcribed(state['processed'])
+    
+    options = dict(language=WHISPER_LANGUAGE, **WHISPER_DECODE_OPTIONS, **whisper_engine.transcribe_options(pool.engine))
+    progress.watch_processes(pool.process_ids)  # 인식은 자식 프로세스에서 실행되므로 그 사용량도 포함
+    return pool.transcribe(model, audio, chunks, options, on_chunk,
+                           batch_size=BATCH_WINDOWS if window_batch_enabled(progress.audio_duration) else 1,
+                           on_stage=on_stage)
+
+def window_batch_enabled(audio_duration):
+    """긴 파일 윈도우 묶음 디코딩 대상인지"""
+    return WINDOW_BATCH_MIN_SECONDS > 0 and BATCH_WINDOWS > 1 and audio_duration >= WINDOW_BATCH_MIN_SECONDS
+
+def transcribe_windows_batched(job, device, audio, progress):
+    """긴 파일 하나를 윈도우 묶음 디코딩 (묶음마다 진행률 + 새 세그먼트 발행)"""
+    model = job['model']
+    progress.enter('load_model', f'{model} 모델 준비 중...')
+    with model_pools[device].acquire(model) as whisper_model:
+        progress.enter('transcribe', f'{model} 모델로 음성 분석 중... (윈도우 {BATCH_WINDOWS}개씩 묶음)')
+        print(f"STT 윈도우 묶음 실행: {job['input_file']}, 모델: {model}, 묶음 크기: {BATCH_WINDOWS}")
         
-        print(f"실행 명령어: {' '.join(cmd)}")
-        update_task_status(task_id, 'processing', 30, f'{model} 모델로 음성 분석 중...')
+        def on_batch(index, processed_seconds, new_segments):
+            publish_segments(job, new_segments)
+            progress.transcribed(processed_seconds)
         
-        # whisper 실행
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=PROJECT_ROOT)
+        return batch_decode.transcribe_batched(
+            whisper_model, [audio], language=WHISPER_LANGUAGE, task=WHISPER_DECODE_OPTIONS.get('task', 'transcribe'),
+            fp16=DEVICE_ENGINES[device] == 'fp16', batch_size=BATCH_WINDOWS, on_batch=on_batch
+        )[0]
+
+def load_job_audio(job, progress):
+    """작업 오디오를 16kHz mono로 준비 - 전체 길이를 알아야 실제 진행률 계산 가능
+
+    같은 파일은 한 번만 디코딩해 캐시하고, 이후(다른 모델, 재시도)에는 캐시 파일을 memory-map 해서 사용
+    """
+    if not job.get('audio_hash'):
+        progress.enter('decode_audio')
+        import whisper
+        audio = whisper.load_audio(job['input_file'])
+    elif decoded_audio_cache.has(job['audio_hash']):
+        progress.enter('decode_audio', '디코딩된 오디오 캐시 사용 중...')
+        audio, _ = decoded_audio_cache.get_or_decode(job['audio_hash'], job['input_file'], job.get('pcm_file'))
+    else:
+        if job.get('pcm_file') and os.path.exists(job['pcm_file']):
+            progress.enter('decode_audio', '업로드 중 디코딩된 오디오 불러오는 중...')
+        else:
+            progress.enter('decode_audio')
+        audio, _ = decoded_audio_cache.get_or_decode(job['audio_hash'], job['input_file'], job.get('pcm_file'))
+    progress.audio_duration = len(audio) / SAMPLE_RATE
+    return audio
+
+def complete_job(job, device, result, progress):
+    """인식 결과 캐시 저장 후 작업과 합류한 작업들의 결과 파일 생성"""
+    # 같은 파일이 다시 올라오면 바로 응답할 수 있도록 결과 캐시
+    if job.get('audio_hash'):
+        try:
+            transcript_cache.put(make_cache_key(job['audio_hash'], job['model'], DEVICE_ENGINES[device]),
+                                 job['audio_hash'], job['model'], result)
+        except Exception as e:
+            print(f"결과 캐시 저장 실패: {e}")
+    
+    # 선택한 형식의 파일만 생성 (합류한 작업은 각자 요청한 형식으로 생성)
+    progress.enter('write_outputs')
+    followers = scheduler.release_followers(job)
+    for follower in followers:
+        try:
+            finish_task_outputs(follower, result, f"동일 작업({job['task_id']}) 결과 공유!")
+        except Exception as e:
+            update_task_status(follower['task_id'], 'error', 0, f"결과 파일 생성 실패: {str(e)}")
+    return finish_task_outputs(job, result, 'STT 처리 완료!', progress=progress)
+
+def fail_job(job, error_msg, progress=None):
+    """작업과 합류한 작업들을 오류 처리 (progress가 있으면 실패까지 쓴 자원 사용량도 기록)"""
+    jobs_total.inc(model=job['model'], result='error')
+    scheduler.release_followers(job)
+    extra = {'accounting': progress.accounting()} if progress is not None else {}
+    for task_id in job_task_ids(job):
+        # 자원 사용량은 직접 처리한 작업에만 기록 (합류한 작업은 자원을 쓰지 않음)
+        update_task_status(task_id, 'error', 0, error_msg, **(extra if task_id == job['task_id'] else {}))
+    return False, error_msg
+
+def run_whisper_background(job, device):
+    """워커에서 Whisper 실행"""
+    input_file = job['input_file']
+    model = job['model']
+    output_formats = job['output_formats']
+    progress = TaskProgress(job)
+    try:
+        # 1. 오디오 디코딩
+        audio = load_job_audio(job, progress)
         
-        if result.returncode == 0:
-            update_task_status(task_id, 'processing', 90, '결과 파일 정리 중...')
-            
-            # 선택하지 않은 형식의 파일들 삭제 (다중 형식 선택 시)
-            if len(output_formats) > 1:
-                cleanup_unwanted_files(task_id, output_formats)
-            
-            # 생성된 파일 확인
-            files = get_result_files(task_id)
-            if files:
-                update_task_status(task_id, 'completed', 100, f'STT 처리 완료! {len(files)}개 파일 생성됨')
-                return True, "처리 완료"
-            else:
-                update_task_status(task_id, 'error', 0, '결과 파일이 생성되지 않았습니다.')
-                return False, "결과 파일 없음"
+        long_audio_pool = long_audio_pools[device]
+        if long_audio_pool.enabled and progress.audio_duration >= LONG_AUDIO_MIN_SECONDS \
+                and long_audio_pool.workers_for(model) >= 2:
+            # 긴 녹음: 무음 지점에서 나눠 프로세스 풀에서 동시에 인식
+            result = transcribe_long_audio(job, long_audio_pool, audio, progress)
+        elif window_batch_enabled(progress.audio_duration):
+            # 긴 파일: 윈도우를 미리 나눠 인코더/디코더를 묶음으로 실행
+            result = transcribe_windows_batched(job, device, audio, progress)
         else:
-            error_msg = result.stderr or "알 수 없는 오류"
-            update_task_status(task_id, 'error', 0, f'STT 처리 실패: {error_msg}')
-            return False, error_msg
+            # 2. 상주 모델 풀에서 모델을 빌려 프로세스 안에서 바로 실행 (CLI 실행 시 매번 발생하던 모델 로딩 제거)
+            progress.enter('load_model', f'{model} 모델 준비 중...')
+            with model_pools[device].acquire(model) as whisper_model:
+                # 3. 음성 인식 (윈도우마다 진행률 갱신, 세그먼트는 인식이 끝나면 발행)
+                progress.enter('transcribe', f'{model} 모델로 음성 분석 중...')
+                print(f"STT 실행: {input_file}, 모델: {model}, 형식: {output_formats}")
+                result = transcribe_with_progress(
+                    whisper_model, audio, progress.on_decode, language=WHISPER_LANGUAGE, **WHISPER_DECODE_OPTIONS,
+                    **whisper_engine.transcribe_options(DEVICE_ENGINES[device])
+                )
+            publish_segments(job, result['segments'])
+        
+        # 4. 결과 캐시 + 결과 파일 생성
+        return complete_job(job, device, result, progress)
             
     except Exception as e:
-        error_msg = f"예외 발생: {str(e)}"
-        update_task_status(task_id, 'error', 0, error_msg)
-        return False, error_msg
+        return fail_job(job, f"예외 발생: {str(e)}", progress)
 
-def cleanup_unwanted_files(task_id, selected_formats):
-    """선택하지 않은 형식의 파일들 삭제"""
-    output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
-    if not os.path.exists(output_dir):
-        return
+def run_whisper_batch(jobs, device):
+    """같은 모델의 짧은 작업 여러 개를 한 번에 인식 (작업들의 30초 윈도우를 묶어 디코딩)"""
+    model = jobs[0]['model']
+    engine = DEVICE_ENGINES[device]
     
-    # 모든 가능한 형식
-    all_formats = ['txt', 'json', 'srt', 'vtt', 'tsv']
-    
-    # 삭제할 형식 = 전체 형식 - 선택한 형식
-    formats_to_delete = set(all_formats) - set(selected_formats)
+    # 1. 작업별 오디오 디코딩 (실패한 작업만 제외)
+    # 진행률 객체를 먼저 만들어 두어 CPU 시간 측정 구간이 묶음 전체로 같아지도록 함 (오디오 길이 비율로 나눔)
+    prepared = []  # (작업, 진행률, 오디오)
+    for job, progress in [(job, TaskProgress(job)) for job in jobs]:
+        try:
+            prepared.append((job, progress, load_job_audio(job, progress)))
+        except Exception as e:
+            fail_job(job, f"예외 발생: {str(e)}", progress)
+    if not prepared:
+        return
+    total_audio = sum(progress.audio_duration for _, progress, _ in prepared)
+    for _, progress, _ in prepared:
+        progress.cpu_share = progress.audio_duration / total_audio if total_audio else 1 / len(prepared)
     
-    deleted_count = 0
-    for filename in os.listdir(output_dir):
-        if filename.endswith('_status.json'):
-            continue  # 상태 파일은 건드리지 않음
+    try:
+        # 2. 상주 모델 풀에서 모델을 빌려 묶음 디코딩
+        for _, progress, _ in prepared:
+            progress.enter('load_model', f'{model} 모델 준비 중...')
+        with model_pools[device].acquire(model) as whisper_model:
+            for _, progress, _ in prepared:
+                progress.enter('transcribe', f'{model} 모델로 작업 {len(prepared)}개 묶음 분석 중...')
+            print(f"STT 묶음 실행: 작업 {len(prepared)}개 ({', '.join(job['task_id'] for job, _, _ in prepared)}), 모델: {model}")
             
-        # 파일 확장자 확인
-        for format_ext in formats_to_delete:
-            if filename.endswith(f'.{format_ext}'):
-                file_path = os.path.join(output_dir, filename)
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                    print(f"삭제됨: {filename} (선택되지 않은 형식)")
-                except Exception as e:
-                    print(f"파일 삭제 실패: {filename}, 오류: {e}")
-                break
+            def on_batch(index, processed_seconds, new_segments):
+                job, progress, _ = prepared[index]
+                publish_segments(job, new_segments)
+                progress.transcribed(processed_seconds)
+            
+            results = batch_decode.transcribe_batched(
+                whisper_model, [audio for _, _, audio in prepared],
+                language=WHISPER_LANGUAGE, task=WHISPER_DECODE_OPTIONS.get('task', 'transcribe'),
+                fp16=engine == 'fp16', batch_size=BATCH_WINDOWS, on_batch=on_batch
+            )
+    except Exception as e:
+        for job, progress, _ in prepared:
+            fail_job(job, f"예외 발생: {str(e)}", progress)
+        return
     
-    print(f"총 {deleted_count}개의 불필요한 파일이 삭제되었습니다.")
+    # 3. 작업별 결과 캐시 + 결과 파일 생성
+    for (job, progress, _), result in zip(prepared, results):
+        try:
+            complete_job(job, device, result, progress)
+        except Exception as e:
+            fail_job(job, f"예외 발생: {str(e)}", progress)
+
+def finish_task_outputs(task, result, message, progress=None, **extra):
+    """인식 결과를 작업이 요청한 형식의 파일로 저장하고 완료 처리 (progress: 직접 처리한 작업의 진행률/자원 사용량)"""
+    task_id = task['task_id']
+    output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
+    os.makedirs(output_dir, exist_ok=True)
+    write_result_files(result, task['input_file'], output_dir, task['output_formats'])
+    write_transcript_index(result, output_dir)
+    
+    # 생성된 파일 확인 (파일 정보와 미리보기는 여기서 한 번만 만들어 작업 기록에 저장)
+    files = get_result_files(task_id)
+    if progress is not None:
+        extra['accounting'] = progress.finish() if files else progress.accounting()
+    if files:
+        update_task_status(task_id, 'completed', 100, f'{message} {len(files)}개 파일 생성됨', stage='done',
+                           files=files, previews=build_previews(files, result), **extra)
+        return True, "처리 완료"
+    else:
+        update_task_status(task_id, 'error', 0, '결과 파일이 생성되지 않았습니다.', **extra)
+        return False, "결과 파일 없음"
 
 def get_result_files(task_id):
     """결과 파일 목록 조회"""
@@ -187,7 +2375,7 @@ def get_result_files(task_id):
     
     if os.path.exists(output_dir):
         for filename in os.listdir(output_dir):
-            if not filename.endswith('_status.json'):  # 상태 파일 제외
+            if not filename.endswith('_status.json') and filename != TRANSCRIPT_INDEX_FILE:  # 상태/색인 파일 제외
                 file_path = os.path.join(output_dir, filename)
                 if os.path.isfile(file_path):
                     file_size = os.path.getsize(file_path)
@@ -206,80 +2394,261 @@ def cleanup_temp_files(task_id):
         shutil.rmtree(temp_dir)
 
 def cleanup_status_file(task_id):
-    """상태 파일 삭제"""
-    status_file = get_status_file_path(task_id)
-    if os.path.exists(status_file):
-        os.remove(status_file)
+    """작업 상태 삭제"""
+    task_store.delete(task_id)
 
-def get_all_previews(task_id):
-    """모든 생성된 파일의 미리보기 반환"""
-    output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
+def build_previews(files, result=None):
+    """결과 파일별 미리보기 (앞 PREVIEW_CHARS 글자 + 전체 글자 수)
+
+    JSON은 들여쓰기한 형태로 보여주므로 파일을 다시 파싱하지 않고 인식 결과(result)를 바로 인코딩한다.
+    전체 글자 수는 파일을 조각 단위로 읽어 세므로 결과가 커도 메모리를 많이 쓰지 않는다.
+    """
     previews = []
-    
-    if not os.path.exists(output_dir):
-        return previews
-    
-    # 형식별 우선순위 및 설명
-    format_info = {
-        '.txt': {'name': 'TXT (순수 텍스트)', 'priority': 1},
-        '.json': {'name': 'JSON (타임스탬프 포함)', 'priority': 2}, 
-        '.vtt': {'name': 'VTT (웹 자막)', 'priority': 3},
-        '.srt': {'name': 'SRT (영상 자막)', 'priority': 4},
-        '.tsv': {'name': 'TSV (표 형식)', 'priority': 5}
-    }
-    
-    # 파일 스캔 및 미리보기 생성
-    found_files = []
-    for filename in os.listdir(output_dir):
-        for ext in format_info.keys():
-            if filename.endswith(ext):
-                found_files.append((ext, filename, format_info[ext]))
-                break
-    
-    # 우선순위 정렬
-    found_files.sort(key=lambda x: x[2]['priority'])
-    
-    for ext, filename, info in found_files:
-        file_path = os.path.join(output_dir, filename)
+    for file in sorted(files, key=lambda file: PREVIEW_FORMATS.get(os.path.splitext(file['name'])[1], ('', 99))[1]):
+        ext = os.path.splitext(file['name'])[1]
+        if ext not in PREVIEW_FORMATS:
+            continue
         try:
-            content = extract_text_from_file(file_path, ext)
-            if content:
-                preview_content = content[:500] + "..." if len(content) > 500 else content
+            if ext == '.json':
+                data = result
+                if data is None:
+                    with open(file['path'], 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                pieces = json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(data)
+            else:
+                pieces = iter_file_text(file['path'])
+            head = []
+            head_length = full_length = 0
+            for piece in pieces:
+                if head_length < PREVIEW_CHARS + 1:
+                    head.append(piece)
+                    head_length += len(piece)
+                full_length += len(piece)
+            content = ''.join(head)
+            if full_length:
                 previews.append({
-                    'format': info['name'],
-                    'filename': filename,
-                    'content': preview_content,
-                    'full_length': len(content)
+                    'format': PREVIEW_FORMATS[ext][0],
+                    'filename': file['name'],
+                    'content': content[:PREVIEW_CHARS] + "..." if full_length > PREVIEW_CHARS else content,
+                    'full_length': full_length
                 })
         except Exception as e:
-            print(f"Preview extraction error for {filename}: {e}")
-            continue
-    
+            print(f"Preview extraction error for {file['name']}: {e}")
     return previews
 
-def extract_text_from_file(file_path, ext):
-    """다양한 형식 파일에서 원본 구조 그대로 추출"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            if ext == '.txt':
-                # TXT: 그대로 반환
-                return f.read()
-            elif ext == '.json':
-                # JSON: 포맷팅된 JSON 구조로 반환
-                import json
-                data = json.load(f)
-                return json.dumps(data, ensure_ascii=False, indent=2)
-            elif ext in ['.vtt', '.srt', '.tsv']:
-                # VTT, SRT, TSV: 원본 구조 그대로 반환
-                return f.read()
-    except Exception as e:
-        # 오류 시 파일 읽기 재시도
+def iter_file_text(file_path):
+    """텍스트 파일을 PREVIEW_READ_CHARS 글자씩 읽기"""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            piece = f.read(PREVIEW_READ_CHARS)
+            if not piece:
+                break
+            yield piece
+
+def get_result_outputs(task_id):
+    """완료된 작업의 (파일 목록, 미리보기) - 작업 기록에 저장된 값을 사용
+
+    이전 버전에서 완료되어 기록에 없는 작업만 한 번 계산해 저장한다.
+    """
+    status = task_store.get(task_id)
+    if status is None or status.get('status') != 'completed':
+        return get_result_files(task_id), []
+    if 'previews' not in status:
+        files = get_result_files(task_id)
+        status = task_store.update(task_id, files=files, previews=build_previews(files))
+    return status['files'], status['previews']
+
+def directory_usage(path):
+    """폴더(또는 파일)의 전체 크기와 가장 최근 수정 시각"""
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    size, newest = 0, os.path.getmtime(path)
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(root, filename))
+            except OSError:
+                continue
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return size, newest
+
+class RetentionJanitor:
+    """업로드/결과/ZIP 캐시의 보존 기한(TTL)과 용량 상한 관리
+
+    - 폴더마다 기한이 지난 항목을 지우고, 그래도 상한을 넘으면 가장 오래된 항목부터 삭제
+    - 대기/처리 중인 작업, 고정(pinned)된 작업, RETENTION_GRACE_SECONDS 안에 바뀐 항목은 건드리지 않음
+    - 결과 폴더를 지우면 작업 기록도 함께 삭제하고, 폴더 없이 남은 오래된 기록(오류 작업 등)도 정리
+    - 지운 바이트/항목 수를 누적해 /health(retention)로 노출
+    """
+
+    CATEGORIES = ('uploads', 'outputs', 'zip_cache', 'task_records')
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._metrics = {
+            'runs': 0,
+            'last_run': None,
+            'last_run_seconds': None,
+            'reclaimed_bytes': dict.fromkeys(self.CATEGORIES, 0),
+            'reclaimed_items': dict.fromkeys(self.CATEGORIES, 0),
+            'usage_bytes': dict.fromkeys(self.CATEGORIES[:3], 0)
+        }
+
+    def start(self):
+        """정리 스레드 시작 (최초 1회)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[보존 정리] 오류: {e}")
+            time.sleep(self.interval)
+
+    def run_once(self):
+        """한 번 정리 (모든 정책 적용)"""
+        started = time.time()
+        tasks = task_store.retention_info()
+        self._sweep('uploads', self._upload_entries(tasks), UPLOAD_TTL_HOURS * 3600, UPLOAD_QUOTA_MB, started)
+        self._sweep('outputs', self._output_entries(tasks), RESULT_TTL_DAYS * 86400, OUTPUT_QUOTA_MB, started)
+        self._sweep('zip_cache', self._zip_entries(), RESULT_TTL_DAYS * 86400, ZIP_CACHE_MAX_MB, started)
+        self._purge_task_records(tasks, started)
+        with self._lock:
+            self._metrics['runs'] += 1
+            self._metrics['last_run'] = datetime.now().isoformat()
+            self._metrics['last_run_seconds'] = round(time.time() - started, 3)
+
+    @staticmethod
+    def _protected(tasks, task_id):
+        status, pinned, _ = tasks.get(task_id, (None, False, None))
+        return pinned or status in ('queued', 'processing')
+
+    def _upload_entries(self, tasks):
+        """UPLOAD_FOLDER/<task_id> (디코딩 오디오 캐시 _pcm은 자체 상한으로 관리)"""
+        entries = []
+        for name in os.listdir(UPLOAD_FOLDER):
+            path = os.path.join(UPLOAD_FOLDER, name)
+            if name.startswith('_') or not os.path.isdir(path):
+                continue
+            entries.append({
+                'name': name,
+                'path': path,
+                'protected': self._protected(tasks, name),
+                'on_delete': chunked_uploads.discard  # 멈춘 분할 업로드 기록도 함께 삭제
+            })
+        return entries
+
+    def _output_entries(self, tasks):
+        """DATA_OUTPUT_PATH/<task_id> 결과 폴더와 이전 버전의 <task_id>_status.json"""
+        entries = []
+        for name in os.listdir(DATA_OUTPUT_PATH):
+            path = os.path.join(DATA_OUTPUT_PATH, name)
+            if name.startswith('_') or name.startswith('tasks.db'):
+                continue
+            if os.path.isdir(path):
+                entries.append({'name': name, 'path': path, 'protected': self._protected(tasks, name),
+                                'on_delete': task_store.delete})
+            elif name.endswith('_status.json'):
+                entries.append({'name': name, 'path': path,
+                                'protected': self._protected(tasks, name[:-len('_status.json')])})
+        return entries
+
+    def _zip_entries(self):
+        """ZIP 캐시 파일 (결과 폴더가 없어진 작업, 기록이 없어진 묶음의 ZIP은 바로 삭제 대상)"""
+        entries = []
+        for name in os.listdir(ZIP_CACHE_FOLDER):
+            owner_id = name.rsplit('-', 1)[0]
+            if owner_id.startswith('batch_'):
+                expired = batch_submissions.get(owner_id) is None
+            else:
+                expired = not os.path.isdir(os.path.join(DATA_OUTPUT_PATH, owner_id))
+            entries.append({'name': name, 'path': os.path.join(ZIP_CACHE_FOLDER, name), 'protected': False,
+                            'expired': expired})
+        return entries
+
+    def _sweep(self, category, entries, ttl_seconds, quota_mb, now):
+        """기한이 지난 항목 삭제 후, 상한을 넘으면 오래된 것부터 삭제"""
+        usage = 0
+        candidates = []
+        for entry in entries:
+            try:
+                entry['size'], entry['mtime'] = directory_usage(entry['path'])
+            except OSError:
+                continue
+            usage += entry['size']
+            if not entry['protected'] and now - entry['mtime'] > RETENTION_GRACE_SECONDS:
+                candidates.append(entry)
+
+        quota = quota_mb * 1024 * 1024
+        for entry in sorted(candidates, key=lambda entry: entry['mtime']):
+            expired = entry.get('expired') or (ttl_seconds > 0 and now - entry['mtime'] > ttl_seconds)
+            if expired or (quota > 0 and usage > quota):
+                if self._remove(category, entry):
+                    usage -= entry['size']
+        with self._lock:
+            self._metrics['usage_bytes'][category] = usage
+
+    def _remove(self, category, entry):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except:
-            return f"파일 읽기 오류: {str(e)}"
-    return None
+            if os.path.isdir(entry['path']):
+                shutil.rmtree(entry['path'])
+            else:
+                os.remove(entry['path'])
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            print(f"[보존 정리] 삭제 실패 ({entry['path']}): {e}")
+            return False
+        if entry.get('on_delete'):
+            entry['on_delete'](entry['name'])
+        with self._lock:
+            self._metrics['reclaimed_bytes'][category] += entry['size']
+            self._metrics['reclaimed_items'][category] += 1
+        print(f"[보존 정리] {category}: {entry['name']} 삭제 ({entry['size'] / (1024 * 1024):.1f}MB)")
+        return True
+
+    def _purge_task_records(self, tasks, now):
+        """결과 폴더 없이 기한이 지난 작업 기록 삭제 (오류로 끝난 작업 등)"""
+        if RESULT_TTL_DAYS <= 0:
+            return
+        cutoff = datetime.fromtimestamp(now - RESULT_TTL_DAYS * 86400).isoformat()
+        for task_id, (status, pinned, updated_at) in tasks.items():
+            if status in FINAL_TASK_STATES and not pinned and updated_at < cutoff \
+                    and not os.path.exists(os.path.join(DATA_OUTPUT_PATH, task_id)):
+                task_store.delete(task_id)
+                with self._lock:
+                    self._metrics['reclaimed_items']['task_records'] += 1
+        # 묶음 제출 기록도 같은 기한 (항목 작업 기록과 결과는 위에서 각각 정리됨)
+        purged = batch_submissions.purge_before(now - RESULT_TTL_DAYS * 86400)
+        with self._lock:
+            self._metrics['reclaimed_items']['task_records'] += purged
+
+    def stats(self):
+        with self._lock:
+            stats = json.loads(json.dumps(self._metrics))
+        stats['policy'] = {
+            'upload_ttl_hours': UPLOAD_TTL_HOURS,
+            'result_ttl_days': RESULT_TTL_DAYS,
+            'upload_quota_mb': UPLOAD_QUOTA_MB,
+            'output_quota_mb': OUTPUT_QUOTA_MB,
+            'zip_cache_max_mb': ZIP_CACHE_MAX_MB
+        }
+        return stats
+
+
+retention_janitor = RetentionJanitor(RETENTION_INTERVAL)
+if multiprocessing.parent_process() is None and APP_ROLE != 'frontend':
+    # 병렬 인식 자식 프로세스(spawn)와 HTTP 전용 워커에서는 시작하지 않음 (모델 서버 한 곳에서만 정리)
+    retention_janitor.start()
 
 @app.route('/')
 def index():
@@ -289,6 +2658,7 @@ def index():
 @app.route('/process', methods=['POST'])
 def process_audio():
     """오디오 파일 처리 시작"""
+    upload_started = time.time()  # 요청 본문은 request.files를 처음 읽을 때 받음
     try:
         # 파일 업로드 확인
         if 'file' not in request.files:
@@ -305,88 +2675,250 @@ def process_audio():
         if not model or not output_formats:
             return jsonify({'success': False, 'message': '모델과 출력 형식을 선택해주세요.'})
         
-        # 파일 저장 (시간 기반 task_id 생성)
-        now = datetime.now()
-        time_part = now.strftime("%Y%m%d_%H%M%S")
-        uuid_part = str(uuid.uuid4())[:4]
-        task_id = f"{time_part}_{uuid_part}"
+        # 파일 저장 (시간 기반 task_id 생성, 저장하면서 내용 해시 계산)
+        task_id = new_task_id()
         task_upload_dir = os.path.join(UPLOAD_FOLDER, task_id)
         os.makedirs(task_upload_dir, exist_ok=True)
         
         filename = secure_filename(file.filename)
         input_file_path = os.path.join(task_upload_dir, filename)
-        file.save(input_file_path)
+        audio_hash = save_upload_with_hash(file, input_file_path)
+        upload_seconds = round(time.time() - upload_started, 3)
         
         print(f"파일 저장: {input_file_path}, 모델: {model}, 형식: {output_formats}")
         
-        # 초기 상태 설정
-        update_task_status(task_id, 'processing', 0, '파일 업로드 완료, 처리 준비 중...')
-        
-        # 백그라운드에서 처리 시작
-        thread = threading.Thread(
-            target=run_whisper_background,
-            args=(input_file_path, model, output_formats, task_id)
-        )
-        thread.daemon = True
-        thread.start()
+        # 같은 파일/모델/옵션의 결과가 캐시에 있으면 바로 완료, 아니면 작업 대기열에 등록 (가득 차면 429)
+        outcome = on_model_server('start_transcription', task_id, input_file_path, model, output_formats, audio_hash,
+                                  None, upload_seconds, request_client_id())
+        if outcome == 'cached':
+            return jsonify({'success': True, 'task_id': task_id, 'cache_hit': True, 'message': '캐시된 결과를 사용합니다!'})
+        if outcome is None:
+            cleanup_temp_files(task_id)
+            return queue_full_response('message')
         
         # 진척도 페이지로 리다이렉트
-        return jsonify({'success': True, 'task_id': task_id, 'message': 'STT 처리 시작!'})
+        return jsonify({'success': True, 'task_id': task_id, 'cache_hit': False, 'message': 'STT 처리 시작!'})
             
     except Exception as e:
         return jsonify({'success': False, 'message': f'오류 발생: {str(e)}'})
 
+def describe_task_status(task_id):
+    """작업 상태 + 대기 순번"""
+    status = get_task_status(task_id)
+    if status.get('status') == 'queued':
+        try:
+            status['queue_position'] = on_model_server('queue_position', task_id)
+        except model_server.ModelServerUnavailable:
+            status['queue_position'] = None
+        if status['queue_position']:
+            status['message'] = f"대기 중... (대기 순번: {status['queue_position']}번)"
+    return status
+
+def format_sse(event, data):
+    """SSE 메시지 형식으로 변환"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.route('/api/status/<task_id>')
 def api_status(task_id):
     """작업 상태 API"""
-    status = get_task_status(task_id)
-    return jsonify(status)
+    return jsonify(describe_task_status(task_id))
+
+@app.route('/api/events/<task_id>')
+def api_events(task_id):
+    """작업 진행 상황 SSE 스트림 (status / progress / segment 이벤트)"""
+    def stream():
+        if model_server_client is not None:
+            model_server_client.ensure_event_subscription(event_hub.publish)  # 모델 서버 이벤트 중계 시작
+        # 현재 상태를 보내기 전에 구독해야 그 사이의 이벤트를 놓치지 않음
+        subscription = event_hub.subscribe(task_id)
+        try:
+            status = describe_task_status(task_id)
+            yield format_sse('status', status)
+            if status.get('status') in FINAL_TASK_STATES:
+                return
+            while True:
+                try:
+                    event, data = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    if model_server_client is not None:
+                        # 중계 연결이 끊긴 사이 끝난 작업은 DB 상태로 마무리
+                        status = describe_task_status(task_id)
+                        if status.get('status') in FINAL_TASK_STATES:
+                            yield format_sse('status', status)
+                            return
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_sse(event, data)
+                if data.get('status') in FINAL_TASK_STATES and event != 'segment':
+                    return
+        finally:
+            event_hub.unsubscribe(task_id, subscription)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/result/<task_id>')
 def api_result(task_id):
-    """결과 API"""
-    files = get_result_files(task_id)
-    previews = get_all_previews(task_id)
+    """결과 API (include_text=1이면 /api/text와 같은 옵션으로 본문도 함께 반환)"""
+    files, previews = get_result_outputs(task_id)
+    status = get_task_status(task_id)
     
-    # 처리 완료 후 정리
-    cleanup_temp_files(task_id)
+    # 처리가 끝난 작업만 정리 (대기/처리 중인 작업의 업로드 파일은 워커가 아직 사용함)
+    if status.get('status') in ('completed', 'error'):
+        cleanup_temp_files(task_id)
     
-    return jsonify({
+    response = {
         'files': files,
         'previews': previews,
+        'accounting': status.get('accounting'),
         'task_id': task_id
-    })
+    }
+    if request.args.get('include_text') in ('1', 'true'):
+        segments = load_transcript_segments(task_id)
+        if segments is not None:
+            try:
+                response['transcript'] = transcript_page(segments, request.args)
+            except ValueError:
+                return jsonify({'success': False, 'error': '페이지/범위 값은 숫자여야 합니다.'}), 400
+    return jsonify(response)
+
+@app.route('/api/text/<task_id>')
+def api_text(task_id):
+    """결과 텍스트 조회 (세그먼트/시간 범위 선택, offset/limit 글자 단위 페이지)
+
+    긴 녹음에서도 필요한 구간만 파일 다운로드 없이 한 번에 받을 수 있다.
+    """
+    status = get_task_status(task_id)
+    if status.get('status') == 'not_found':
+        return jsonify({'success': False, 'error': status['message']}), 404
+    if status.get('status') != 'completed':
+        return jsonify({'success': False, 'error': '아직 완료되지 않은 작업입니다.', 'status': status.get('status')}), 409
+    segments = load_transcript_segments(task_id)
+    if segments is None:
+        return jsonify({'success': False, 'error': '결과 파일을 찾을 수 없습니다.'}), 404
+    try:
+        page = transcript_page(segments, request.args)
+    except ValueError:
+        return jsonify({'success': False, 'error': '페이지/범위 값은 숫자여야 합니다.'}), 400
+    return jsonify(dict(page, success=True, task_id=task_id))
+
+def file_etag(path):
+    """파일 이름/크기/수정 시각 기반 강한 ETag 값"""
+    stat = os.stat(path)
+    return hashlib.sha256(f'{path}\0{stat.st_size}\0{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()[:32]
+
+def compressed_variant(file_path, encoding):
+    """결과 파일의 gzip/brotli 압축본 경로 (없거나 원본보다 오래됐으면 생성, 이득이 없으면 None)"""
+    output_dir, filename = os.path.split(file_path)
+    compressed_dir = os.path.join(output_dir, COMPRESSED_FOLDER_NAME)
+    compressed_path = os.path.join(compressed_dir, f"{filename}.{'br' if encoding == 'br' else 'gz'}")
+    source_mtime = os.path.getmtime(file_path)
+    if not os.path.exists(compressed_path) or os.path.getmtime(compressed_path) < source_mtime:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=9)
+        else:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        os.makedirs(compressed_dir, exist_ok=True)
+        part_path = f'{compressed_path}.{uuid.uuid4().hex[:8]}.part'
+        with open(part_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(part_path, compressed_path)
+    if os.path.getsize(compressed_path) >= os.path.getsize(file_path):
+        return None
+    return compressed_path
 
 @app.route('/download/<task_id>/<filename>')
 def download_file(task_id, filename):
-    """개별 파일 다운로드"""
+    """개별 파일 다운로드
+
+    - 결과 폴더 밖 경로는 거부 (safe_join)
+    - 강한 ETag + If-None-Match(304), Range 요청(이어받기)은 send_file의 조건부 응답으로 처리
+    - 텍스트 형식은 Accept-Encoding에 따라 미리 압축해 둔 br/gzip 본을 전송 (압축본마다 별도 ETag)
+    """
     try:
-        output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
-        file_path = os.path.join(output_dir, filename)
+        file_path = safe_join(DATA_OUTPUT_PATH, task_id, filename)
+        if not file_path or filename.startswith('.'):
+            return jsonify({'success': False, 'error': '잘못된 파일 경로입니다.'}), 400
         
-        if os.path.exists(file_path):
-            return send_file(file_path, as_attachment=True)
+        if os.path.isfile(file_path):
+            encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+            encoding = request.accept_encodings.best_match(encodings)
+            if encoding and filename.endswith(COMPRESSIBLE_EXTENSIONS) \
+                    and os.path.getsize(file_path) >= COMPRESS_MIN_BYTES:
+                compressed_path = compressed_variant(file_path, encoding)
+                if compressed_path:
+                    response = send_file(compressed_path, as_attachment=True, download_name=filename,
+                                         mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                                         etag=f'{file_etag(file_path)}-{encoding}', conditional=True)
+                    response.headers['Content-Encoding'] = encoding
+                    response.vary.add('Accept-Encoding')
+                    return response
+            response = send_file(file_path, as_attachment=True, etag=file_etag(file_path), conditional=True)
+            if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                response.vary.add('Accept-Encoding')
+            return response
         else:
-            flash('파일을 찾을 수 없습니다.')
-            return redirect(url_for('show_result', task_id=task_id))
+            return jsonify({'success': False, 'error': '파일을 찾을 수 없습니다.'}), 404
     except Exception as e:
-        flash(f'다운로드 오류: {str(e)}')
-        return redirect(url_for('show_result', task_id=task_id))
+        return jsonify({'success': False, 'error': f'다운로드 오류: {str(e)}'}), 500
 
 @app.route('/health')
 def health_check():
     """MCP 도구에서 웹앱 상태 확인용 헬스체크 엔드포인트"""
+    try:
+        stats = on_model_server('server_stats')
+    except model_server.ModelServerUnavailable as e:
+        return jsonify({
+            "status": "error",
+            "message": f"모델 서버에 연결할 수 없습니다. ({e})",
+            "timestamp": datetime.now().isoformat(),
+            "role": APP_ROLE
+        }), 503
     return jsonify({
         "status": "ok", 
         "message": "웹앱이 정상 작동 중입니다.",
         "timestamp": datetime.now().isoformat(),
+        "role": APP_ROLE,
         "available_models": list(WHISPER_MODELS.keys()),
-        "available_formats": list(OUTPUT_FORMATS.keys())
+        "available_formats": list(OUTPUT_FORMATS.keys()),
+        "streaming": {
+            "enabled": Sock is not None,
+            "max_sessions": STREAM_MAX_SESSIONS,
+            "models": stats.pop('streaming_models')
+        },
+        **stats
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 수집용 지표 (텍스트 노출 형식)"""
+    try:
+        text = on_model_server('metrics_text')
+    except model_server.ModelServerUnavailable as e:
+        return Response(f'# 모델 서버에 연결할 수 없습니다: {e}\n', status=503, mimetype='text/plain')
+    return Response(text, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def server_stats():
+    """모델/작업 처리 현황 (모델 서버가 가진 정보)"""
+    return {
+        "loaded_models": {device: pool.stats() for device, pool in model_pools.items()},
+        "long_audio": {device: pool.stats() for device, pool in long_audio_pools.items()},
+        "queue": scheduler.stats(),
+        "cache": transcript_cache.stats(),  # 조회 횟수는 캐시를 조회하는 이 프로세스에만 쌓임
+        "pcm_cache": decoded_audio_cache.stats(),
+        "retention": retention_janitor.stats(),
+        "streaming_models": live_model_pool.stats()
+    }
+
 @app.route('/api/transcribe', methods=['POST'])
 def api_transcribe():
     """MCP 도구용 STT 처리 API 엔드포인트"""
+    upload_started = time.time()  # 요청 본문은 request.files를 처음 읽을 때 받음
     try:
         # 파일 업로드 확인
         if 'audio' not in request.files:
@@ -397,77 +2929,581 @@ def api_transcribe():
             return jsonify({'success': False, 'error': '올바른 오디오 파일을 업로드해주세요.'})
         
         # 옵션 확인 (기본값 설정)
-        model = request.form.get('model', 'small')
-        formats_str = request.form.get('formats', 'txt')
-        output_formats = formats_str.split(',') if formats_str else ['txt']
-        
-        if model not in WHISPER_MODELS:
-            return jsonify({'success': False, 'error': f'지원하지 않는 모델입니다: {model}'})
+        model, output_formats = parse_api_options(request.form)
+        if model is None:
+            return jsonify({'success': False, 'error': f"지원하지 않는 모델입니다: {request.form.get('model')}"})
         
-        # 파일 저장 (시간 기반 task_id 생성)
-        now = datetime.now()
-        time_part = now.strftime("%Y%m%d_%H%M%S")
-        uuid_part = str(uuid.uuid4())[:4]
-        task_id = f"{time_part}_{uuid_part}"
+        # 파일 저장 (시간 기반 task_id 생성, 저장하면서 내용 해시 계산)
+        task_id = new_task_id()
         
         task_upload_dir = os.path.join(UPLOAD_FOLDER, task_id)
         os.makedirs(task_upload_dir, exist_ok=True)
         
         filename = secure_filename(file.filename)
         filepath = os.path.join(task_upload_dir, filename)
-        file.save(filepath)
+        audio_hash = save_upload_with_hash(file, filepath)
         
-        # 백그라운드 STT 처리 시작
-        output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
-        os.makedirs(output_dir, exist_ok=True)
+        return start_api_transcription(task_id, filepath, audio_hash, model, output_formats,
+                                       upload_seconds=round(time.time() - upload_started, 3))
         
-        # 초기 상태 파일 생성
-        update_task_status(task_id, "processing", 0, "STT 처리를 시작합니다...")
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'처리 중 오류가 발생했습니다: {str(e)}'})
+
+def parse_api_options(values):
+    """API 요청의 모델/형식 옵션 파싱 (잘못된 모델이면 model이 None)"""
+    model = values.get('model', 'small')
+    formats_str = values.get('formats', 'txt')
+    output_formats = formats_str.split(',') if formats_str else ['txt']
+    return (model if model in WHISPER_MODELS else None), output_formats
+
+def start_api_transcription(task_id, filepath, audio_hash, model, output_formats, keep_upload_on_reject=False,
+                            pcm_file=None, upload_seconds=None):
+    """저장이 끝난 업로드 파일로 STT 시작 (캐시 적중 시 즉시 완료, 대기열이 가득 차면 429)"""
+    outcome = on_model_server('start_transcription', task_id, filepath, model, output_formats, audio_hash, pcm_file,
+                              upload_seconds, request_client_id())
+    if outcome == 'cached':
+        message = f'캐시된 결과를 사용합니다. (모델: {model}, 형식: {", ".join(output_formats)})'
+    elif outcome == 'queued':
+        message = f'STT 처리가 시작되었습니다. (모델: {model}, 형식: {", ".join(output_formats)})'
+    else:
+        if not keep_upload_on_reject:
+            cleanup_temp_files(task_id)
+        return queue_full_response('error')
+    
+    return jsonify({
+        'success': True,
+        'task_id': task_id,
+        'cache_hit': outcome == 'cached',
+        'message': message,
+        'status_url': f'/api/status/{task_id}',
+        'events_url': f'/api/events/{task_id}',
+        'result_url': f'/api/result/{task_id}'
+    })
+
+@app.route('/api/tasks/<task_id>/pin', methods=['POST', 'DELETE'])
+def api_task_pin(task_id):
+    """작업 고정(POST)/해제(DELETE) - 고정된 작업은 보존 기한/용량 정리에서 제외"""
+    if task_store.get(task_id) is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    pinned = request.method == 'POST'
+    task_store.update(task_id, pinned=pinned)
+    return jsonify({'success': True, 'task_id': task_id, 'pinned': pinned})
+
+@app.route('/api/upload/init', methods=['POST'])
+def api_upload_init():
+    """분할 업로드 시작 (filename, size, 선택: sha256)"""
+    values = request.get_json(silent=True) or request.form
+    filename = values.get('filename', '')
+    if filename == '' or not allowed_file(filename):
+        return jsonify({'success': False, 'error': '올바른 오디오 파일을 업로드해주세요.'}), 400
+    
+    try:
+        size = int(values.get('size', -1))
+    except (TypeError, ValueError):
+        size = -1
+    if size <= 0 or size > CHUNKED_UPLOAD_MAX_MB * 1024 * 1024:
+        return jsonify({'success': False, 'error': f'파일 크기가 올바르지 않습니다. (최대 {CHUNKED_UPLOAD_MAX_MB}MB)'}), 400
+    
+    upload = chunked_uploads.create(secure_filename(filename), size, values.get('sha256'))
+    return jsonify({
+        'success': True,
+        'upload_id': upload['upload_id'],
+        'size': size,
+        'received': 0,
+        'chunk_size': CHUNKED_UPLOAD_CHUNK_MB * 1024 * 1024,
+        'upload_url': f"/api/upload/{upload['upload_id']}"
+    })
+
+@app.route('/api/upload/<upload_id>', methods=['GET'])
+def api_upload_status(upload_id):
+    """분할 업로드 진행 상태 (재개할 위치 확인용)"""
+    upload = chunked_uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'success': False, 'error': '업로드를 찾을 수 없습니다.'}), 404
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'size': upload['size'],
+        'received': upload['received'],
+        'complete': upload['received'] == upload['size']
+    })
+
+@app.route('/api/upload/<upload_id>', methods=['PUT'])
+def api_upload_chunk(upload_id):
+    """분할 업로드 조각 전송 (?offset=시작 위치, 선택 헤더: X-Chunk-SHA256)"""
+    upload = chunked_uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'success': False, 'error': '업로드를 찾을 수 없습니다.'}), 404
+    
+    offset = request.args.get('offset', type=int)
+    if offset is None or offset < 0:
+        return jsonify({'success': False, 'error': 'offset이 필요합니다.'}), 400
+    
+    data = request.get_data(cache=False)
+    chunk_hash = request.headers.get('X-Chunk-SHA256')
+    if chunk_hash and hashlib.sha256(data).hexdigest() != chunk_hash.lower():
+        return jsonify({'success': False, 'error': '조각 해시가 일치하지 않습니다. 다시 전송해주세요.',
+                        'received': upload['received']}), 400
+    
+    record_upload_bytes(len(data), 'chunk')
+    try:
+        received = chunked_uploads.write_chunk(upload_id, offset, data)
+    except ValueError as e:
+        current = chunked_uploads.get(upload_id) or upload
+        return jsonify({'success': False, 'error': str(e), 'received': current['received']}), 409
+    if received is None:
+        # 조각을 받는 사이 완료/만료 정리로 업로드가 삭제된 경우
+        return jsonify({'success': False, 'error': '업로드를 찾을 수 없습니다.'}), 404
+    
+    return jsonify({'success': True, 'upload_id': upload_id, 'received': received, 'size': upload['size']})
+
+@app.route('/api/upload/<upload_id>/complete', methods=['POST'])
+def api_upload_complete(upload_id):
+    """분할 업로드 완료 후 STT 시작 (model, formats)"""
+    try:
+        upload = chunked_uploads.get(upload_id)
+        if upload is None:
+            return jsonify({'success': False, 'error': '업로드를 찾을 수 없습니다.'}), 404
+        if upload['received'] != upload['size']:
+            return jsonify({'success': False, 'error': f"업로드가 끝나지 않았습니다. ({upload['received']}/{upload['size']} 바이트)",
+                            'received': upload['received']}), 409
         
-        # 백그라운드 스레드로 처리
-        thread = threading.Thread(
-            target=run_whisper_background,
-            args=(filepath, model, output_formats, task_id)
-        )
-        thread.daemon = True
-        thread.start()
+        model, output_formats = parse_api_options(request.get_json(silent=True) or request.form)
+        if model is None:
+            return jsonify({'success': False, 'error': '지원하지 않는 모델입니다.'}), 400
+        
+        # 전체 파일 해시 검증
+        audio_hash = chunked_uploads.checksum(upload_id)
+        if upload['sha256'] and upload['sha256'].lower() != audio_hash:
+            chunked_uploads.discard(upload_id)
+            cleanup_temp_files(upload_id)
+            return jsonify({'success': False, 'error': '파일 해시가 일치하지 않습니다. 다시 업로드해주세요.'}), 400
+        
+        # 업로드와 함께 진행된 디코딩 결과 (캐시 적중이면 쓰이지 않음)
+        pcm_file = chunked_uploads.finish_decoding(upload_id)
+        
+        # 대기열이 가득 차 거절되면 업로드는 유지되므로 Retry-After 후 complete만 다시 호출하면 됨
+        # 업로드 시작부터 마지막 조각까지 걸린 시간 (조각 사이 클라이언트 대기 포함)
+        upload_seconds = round(upload['updated_at'] - upload['created_at'], 3)
+        response = start_api_transcription(upload_id, upload['path'], audio_hash, model, output_formats,
+                                           keep_upload_on_reject=True, pcm_file=pcm_file,
+                                           upload_seconds=upload_seconds)
+        if response.status_code != 429:
+            chunked_uploads.discard(upload_id)
+        return response
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'처리 중 오류가 발생했습니다: {str(e)}'})
+
+def new_batch_task_id(used):
+    """묶음 안에서 겹치지 않는 task_id (같은 초에 여러 개를 만들므로 기존 업로드 폴더와도 비교)"""
+    while True:
+        task_id = new_task_id()
+        if task_id not in used and not os.path.exists(os.path.join(UPLOAD_FOLDER, task_id)):
+            used.add(task_id)
+            return task_id
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch_submit():
+    """여러 녹음을 공통 옵션(model, formats)으로 한 번에 제출
+
+    - multipart: 'audio' 파일 여러 개 (+ 'paths' 여러 개)
+    - JSON: {"paths": [...], "model": ..., "formats": ...} - BATCH_IMPORT_DIR 기준 상대 경로 (서버에 있는 파일)
+    지원하지 않는 항목은 건너뛰고 skipped로 알려주며, 묶음 대기열 자리가 모자라면 전체를 거절(429)
+    """
+    upload_started = time.time()  # 요청 본문은 request.files를 처음 읽을 때 받음
+    try:
+        values = request.get_json(silent=True) or request.form
+        model, output_formats = parse_api_options(values)
+        if model is None:
+            return jsonify({'success': False, 'error': f"지원하지 않는 모델입니다: {values.get('model')}"}), 400
+        
+        files = request.files.getlist('audio')
+        paths = (values.get('paths') or []) if request.is_json else request.form.getlist('paths')
+        if not isinstance(paths, list):
+            return jsonify({'success': False, 'error': 'paths는 목록이어야 합니다.'}), 400
+        if not files and not paths:
+            return jsonify({'success': False, 'error': "'audio' 파일 또는 paths가 필요합니다."}), 400
+        if len(files) + len(paths) > BATCH_SUBMIT_MAX_ITEMS:
+            return jsonify({'success': False,
+                            'error': f'한 번에 제출할 수 있는 파일은 최대 {BATCH_SUBMIT_MAX_ITEMS}개입니다.'}), 400
+        if paths and not BATCH_IMPORT_DIR:
+            return jsonify({'success': False, 'error': '서버 경로 제출이 설정되지 않았습니다. (WHISPER_BATCH_IMPORT_DIR)'}), 400
+        
+        batch_id = f'batch_{new_task_id()}'
+        used = set()
+        items, skipped = [], []
+        
+        # 1. 업로드 파일 저장 (저장하면서 내용 해시 계산)
+        for file in files:
+            if file.filename == '' or not allowed_file(file.filename):
+                skipped.append({'source': file.filename, 'error': '지원하지 않는 파일 형식입니다.'})
+                continue
+            task_id = new_batch_task_id(used)
+            task_upload_dir = os.path.join(UPLOAD_FOLDER, task_id)
+            os.makedirs(task_upload_dir, exist_ok=True)
+            filepath = os.path.join(task_upload_dir, secure_filename(file.filename))
+            audio_hash = save_upload_with_hash(file, filepath)
+            items.append({'task_id': task_id, 'filename': file.filename, 'source': 'upload', 'path': filepath,
+                          'audio_hash': audio_hash, 'size': os.path.getsize(filepath)})
+        # 업로드 시간은 파일 크기 비율로 나눔 (요청 본문 하나로 함께 받음)
+        uploaded_bytes = sum(item['size'] for item in items) or 1
+        upload_seconds = time.time() - upload_started
+        for item in items:
+            item['upload_seconds'] = round(upload_seconds * item.pop('size') / uploaded_bytes, 3)
+        
+        # 2. 서버 경로 (BATCH_IMPORT_DIR 밖은 거부, 파일은 복사하지 않고 그 자리에서 읽음)
+        for path in paths:
+            filepath = safe_join(BATCH_IMPORT_DIR, str(path)) if BATCH_IMPORT_DIR else None
+            if not filepath or not os.path.isfile(filepath) or not allowed_file(filepath):
+                skipped.append({'source': path, 'error': '파일을 찾을 수 없거나 지원하지 않는 형식입니다.'})
+                continue
+            items.append({'task_id': new_batch_task_id(used), 'filename': os.path.basename(filepath), 'source': 'path',
+                          'path': filepath, 'audio_hash': file_sha256(filepath)})
+        
+        if not items:
+            return jsonify({'success': False, 'error': '처리할 수 있는 파일이 없습니다.', 'skipped': skipped}), 400
+        
+        # 3. 묶음 기록 후 스케줄러에 한꺼번에 등록 (항목 상태는 /api/batch/<batch_id>에서 함께 조회)
+        batch_submissions.create(batch_id, model, output_formats,
+                                 [{key: item[key] for key in ('task_id', 'filename', 'source')} for item in items])
+        outcome = on_model_server('start_batch', batch_id, items, model, output_formats, request_client_id())
+        if outcome is None:
+            batch_submissions.delete(batch_id)
+            for item in items:
+                cleanup_temp_files(item['task_id'])
+            return queue_full_response('error')
         
         return jsonify({
             'success': True,
-            'task_id': task_id,
-            'message': f'STT 처리가 시작되었습니다. (모델: {model}, 형식: {", ".join(output_formats)})',
-            'status_url': f'/api/status/{task_id}',
-            'result_url': f'/api/result/{task_id}'
+            'batch_id': batch_id,
+            'message': f"{len(items)}개 파일 묶음 처리가 시작되었습니다. (모델: {model}, 형식: {', '.join(output_formats)})",
+            'total': len(items),
+            'queued': outcome['queued'],
+            'cached': outcome['cached'],
+            'skipped': skipped,
+            'items': [{'task_id': item['task_id'], 'filename': item['filename']} for item in items],
+            'status_url': f'/api/batch/{batch_id}',
+            'download_url': f'/api/batch/{batch_id}/download'
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': f'처리 중 오류가 발생했습니다: {str(e)}'})
 
+@app.route('/api/batch/<batch_id>')
+def api_batch_status(batch_id):
+    """묶음 전체 진행 상황 + 항목별 상태 (한 번의 요청으로 조회)"""
+    batch = batch_submissions.get(batch_id)
+    if batch is None:
+        return jsonify({'success': False, 'error': '묶음을 찾을 수 없습니다.'}), 404
+    
+    statuses = [get_task_status(item['task_id']) for item in batch['items']]
+    queued = [item['task_id'] for item, status in zip(batch['items'], statuses) if status.get('status') == 'queued']
+    try:
+        positions = on_model_server('queue_positions', queued) if queued else {}
+    except model_server.ModelServerUnavailable:
+        positions = {}
+    
+    items = []
+    counts = dict.fromkeys(('queued', 'processing', 'completed', 'error'), 0)
+    for item, status in zip(batch['items'], statuses):
+        state = status.get('status')
+        counts[state] = counts.get(state, 0) + 1
+        items.append({
+            'task_id': item['task_id'],
+            'filename': item['filename'],
+            'status': state,
+            'progress': status.get('progress', 0),
+            'message': status.get('message', ''),
+            'queue_position': positions.get(item['task_id']),
+            'cache_hit': status.get('cache_hit', False),
+            'audio_duration': status.get('audio_duration'),
+            'result_url': f"/api/result/{item['task_id']}"
+        })
+    total = len(items)
+    finished = sum(1 for item in items if item['status'] in FINAL_TASK_STATES)
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'model': batch['model'],
+        'formats': batch['output_formats'],
+        'created_at': batch['created_at'],
+        'total': total,
+        'counts': counts,
+        'progress': round(sum(item['progress'] for item in items) / total, 1) if total else 100,
+        'done': finished == total,
+        'items': items,
+        'download_url': f'/api/batch/{batch_id}/download'
+    })
+
+@app.route('/api/batch/<batch_id>/download')
+def api_batch_download(batch_id):
+    """묶음의 완료된 결과 파일 전체 ZIP (항목별 <task_id>/ 폴더)"""
+    batch = batch_submissions.get(batch_id)
+    if batch is None:
+        return jsonify({'success': False, 'error': '묶음을 찾을 수 없습니다.'}), 404
+    sources = []
+    for item in batch['items']:
+        output_dir = safe_join(DATA_OUTPUT_PATH, item['task_id'])
+        if output_dir and os.path.isdir(output_dir):
+            sources.extend((f"{item['task_id']}/{filename}", path) for filename, path in zip_source_files(output_dir))
+    if not sources:
+        return jsonify({'success': False, 'error': '아직 완료된 결과가 없습니다.'}), 409
+    return zip_response(batch_id, sources, f'{batch_id}_results.zip')
+
+def live_transcribe_words(model, audio, prompt):
+    """스트리밍 버퍼 오디오 인식 -> 버퍼 시작 기준 (시작 초, 끝 초, 단어) 목록"""
+    options = dict(WHISPER_DECODE_OPTIONS, **whisper_engine.transcribe_options(live_model_pool.engine))
+    with live_model_pool.acquire(model) as whisper_model:
+        # 가설을 빠르게 여러 번 만드는 용도이므로 온도 폴백 없이 한 번만 디코딩
+        result = whisper_model.transcribe(
+            audio, language=WHISPER_LANGUAGE, verbose=None, initial_prompt=prompt or None,
+            word_timestamps=True, condition_on_previous_text=False, temperature=0.0, **options
+        )
+    return [(word['start'], word['end'], word['word'])
+            for segment in result['segments'] for word in segment.get('words', [])]
+
+def preload_live_model(model):
+    """스트리밍용 모델 미리 로딩"""
+    with live_model_pool.acquire(model):
+        pass
+
+def live_transcribe_fn(model):
+    """스트리밍 세션용 인식 함수 (HTTP 전용 워커면 모델 서버에서 인식)"""
+    def transcribe(audio, prompt):
+        return on_model_server('live_transcribe', model, audio, prompt)
+    return transcribe
+
+def stream_message(message_type, words=None, **extra):
+    """스트리밍 응답 메시지 (words: (시작 초, 끝 초, 단어) 목록)"""
+    message = {'type': message_type}
+    if words is not None:
+        message.update({
+            'text': ''.join(word[2] for word in words).strip(),
+            'start': round(words[0][0], 2) if words else None,
+            'end': round(words[-1][1], 2) if words else None
+        })
+    message.update(extra)
+    return json.dumps(message, ensure_ascii=False)
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/ws/stream')
+    def ws_stream(ws):
+        """실시간 스트리밍 인식 (WebSocket)
+
+        쿼리: model (기본 STREAM_DEFAULT_MODEL),
+              format ('pcm': s16le 16kHz mono, 'webm'/'ogg': opus 등을 담은 연속 압축 스트림 - ffmpeg 필요)
+        클라이언트 -> 서버: 오디오 바이너리 프레임, 끝낼 때 텍스트 {"type": "stop"}
+        서버 -> 클라이언트: ready, partial(아직 바뀔 수 있는 뒷부분), final(확정 세그먼트), done(전체 텍스트), error
+        final의 latency는 세그먼트 끝 오디오를 받은 뒤 확정되기까지 걸린 시간(초)
+        """
+        model = request.args.get('model', STREAM_DEFAULT_MODEL)
+        audio_format = request.args.get('format', 'pcm')
+        if model not in WHISPER_MODELS:
+            ws.send(stream_message('error', error=f'지원하지 않는 모델입니다: {model}'))
+            return
+        if audio_format != 'pcm' and shutil.which('ffmpeg') is None:
+            ws.send(stream_message('error', error='압축 스트림을 디코딩할 ffmpeg가 없습니다. format=pcm으로 보내주세요.'))
+            return
+        if not stream_sessions.acquire(blocking=False):
+            ws.send(stream_message('error', error='동시 스트리밍 수를 초과했습니다. 잠시 후 다시 시도해주세요.'))
+            return
+
+        reader = online = None
+        arrivals = deque()  # (수신 후 스트림 길이(초), 수신 시각) - 확정 지연 계산용
+        latencies = []
+        started_at = time.time()
+
+        def send_final(words):
+            if not words:
+                return
+            received_at = next((at for seconds, at in arrivals if seconds >= words[-1][1]), time.time())
+            latency = time.time() - received_at
+            latencies.append(latency)
+            ws.send(stream_message('final', words, latency=round(latency, 2)))
+
+        try:
+            # 세션 자리를 받은 뒤의 준비 과정은 모두 try 안에서 해야 실패해도 자리가 반납됨 (ffmpeg 실행 실패 등)
+            reader = live_transcribe.PcmFrameReader() if audio_format == 'pcm' else live_transcribe.FfmpegFrameReader()
+            online = live_transcribe.OnlineTranscriber(live_transcribe_fn(model), STREAM_TRIM_SECONDS,
+                                                       STREAM_MAX_BUFFER_SECONDS)
+            on_model_server('preload_live_model', model)  # 첫 인식이 모델 로딩을 기다리지 않도록 미리 로딩
+            ws.send(stream_message('ready', model=model, format=audio_format, sample_rate=SAMPLE_RATE))
+            print(f"[스트리밍] 세션 시작 (model: {model}, format: {audio_format})")
+
+            stopping = False
+            last_audio_at = time.time()
+            while not stopping:
+                # 인식하는 동안 쌓인 프레임을 모두 받은 뒤 다음 인식 여부 결정
+                message = ws.receive(timeout=0.05)
+                while message is not None:
+                    if isinstance(message, str):
+                        try:
+                            stopping = json.loads(message).get('type') == 'stop'
+                        except (ValueError, AttributeError):
+                            stopping = message.strip() == 'stop'
+                        if stopping:
+                            break
+                    else:
+                        reader.feed(message)
+                    message = ws.receive(timeout=0)
+
+                samples = reader.read()
+                if len(samples):
+                    online.insert_audio(samples)
+                    arrivals.append((online.stream_seconds, time.time()))
+                    last_audio_at = time.time()
+                elif time.time() - last_audio_at > STREAM_IDLE_TIMEOUT:
+                    ws.send(stream_message('error', error='오디오가 들어오지 않아 스트림을 종료합니다.'))
+                    break
+
+                if online.unprocessed_seconds >= STREAM_STEP_SECONDS:
+                    committed, pending = online.process()
+                    send_final(committed)
+                    ws.send(stream_message('partial', pending))
+                    while arrivals and arrivals[0][0] < online.buffer_offset:
+                        arrivals.popleft()
+
+            reader.drain()
+            online.insert_audio(reader.read())
+            send_final(online.finish())
+            ws.send(stream_message('done', online.committed, duration=round(online.stream_seconds, 2)))
+        except ConnectionClosed:
+            pass  # 클라이언트가 stop 없이 연결을 끊음
+        finally:
+            if reader is not None:
+                reader.close()
+            stream_sessions.release()
+            average = sum(latencies) / len(latencies) if latencies else 0
+            stream_seconds = online.stream_seconds if online is not None else 0
+            print(f"[스트리밍] 세션 종료: 오디오 {stream_seconds:.1f}초, 처리 {time.time() - started_at:.1f}초, "
+                  f"평균 확정 지연 {average:.2f}초")
+
+class ZipStreamWriter:
+    """zipfile이 쓰는 바이트를 모아 두었다가 조각 단위로 꺼내는 출력 스트림
+
+    seek/tell이 없으므로 zipfile은 파일마다 데이터 디스크립터를 붙이는 스트리밍 모드로 기록한다.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def zip_source_files(output_dir):
+    """ZIP에 넣을 결과 파일 (이름순)"""
+    return [
+        (filename, os.path.join(output_dir, filename)) for filename in sorted(os.listdir(output_dir))
+        if not filename.endswith('.zip') and not filename.endswith('_status.json')
+        and filename != TRANSCRIPT_INDEX_FILE and os.path.isfile(os.path.join(output_dir, filename))
+    ]
+
+def zip_fingerprint(task_id, sources):
+    """결과 파일 이름/크기/수정 시각 기반 지문 (파일이 바뀌면 달라짐, 내용을 다시 읽지 않음)"""
+    digest = hashlib.sha256(task_id.encode('utf-8'))
+    for filename, path in sources:
+        stat = os.stat(path)
+        digest.update(f'{filename}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def stream_zip(sources, cache_path):
+    """결과 파일을 압축하면서 바로 내보내고, 끝까지 만들어지면 캐시 파일로 확정"""
+    part_path = f'{cache_path}.{uuid.uuid4().hex[:8]}.part'
+    output = ZipStreamWriter()
+    completed = False
+    try:
+        with open(part_path, 'wb') as cache_file:
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for filename, path in sources:
+                    info = zipfile.ZipInfo.from_file(path, filename)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with open(path, 'rb') as source, zipf.open(info, 'w') as entry:
+                        while True:
+                            data = source.read(ZIP_STREAM_CHUNK_SIZE)
+                            if not data:
+                                break
+                            entry.write(data)
+                            chunk = output.take()
+                            if chunk:
+                                cache_file.write(chunk)
+                                yield chunk
+            chunk = output.take()  # 중앙 디렉터리
+            cache_file.write(chunk)
+            yield chunk
+        os.replace(part_path, cache_path)
+        completed = True
+    finally:
+        # 클라이언트가 중간에 끊으면 만들던 캐시 파일 삭제
+        if not completed and os.path.exists(part_path):
+            os.remove(part_path)
+
+def zip_response(owner_id, sources, download_name):
+    """ZIP 다운로드 응답 (owner_id: ZIP 캐시 파일 이름 앞부분 - task_id 또는 batch_id)
+
+    결과 파일 지문을 ETag로 사용해 같은 결과는 304로 응답하고, 캐시된 ZIP이 있으면 그대로 보낸다.
+    처음 요청은 압축하면서 바로 전송하고 동시에 캐시 파일로 저장한다.
+    """
+    fingerprint = zip_fingerprint(owner_id, sources)
+    if request.if_none_match.contains(fingerprint):
+        response = Response(status=304)
+        response.set_etag(fingerprint)
+        return response
+    
+    cache_path = os.path.join(ZIP_CACHE_FOLDER, f'{owner_id}-{fingerprint}.zip')
+    if os.path.exists(cache_path):
+        return send_file(cache_path, as_attachment=True, download_name=download_name,
+                         mimetype='application/zip', etag=fingerprint)
+    
+    # 결과가 바뀌어 지문이 달라졌으면 이전 ZIP 캐시는 삭제 (동시 요청이 먼저 지웠을 수 있음)
+    for filename in os.listdir(ZIP_CACHE_FOLDER):
+        if filename.startswith(f'{owner_id}-') and filename.endswith('.zip'):
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(ZIP_CACHE_FOLDER, filename))
+    
+    response = Response(stream_with_context(stream_zip(sources, cache_path)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    response.set_etag(fingerprint)
+    return response
+
 @app.route('/download_all/<task_id>')
 def download_all_files(task_id):
-    """모든 결과 파일 ZIP 다운로드"""
+    """모든 결과 파일 ZIP 다운로드 (zip_response 참고)"""
     try:
-        output_dir = os.path.join(DATA_OUTPUT_PATH, task_id)
-        
-        if not os.path.exists(output_dir):
-            flash('결과 디렉토리를 찾을 수 없습니다.')
-            return redirect(url_for('show_result', task_id=task_id))
+        output_dir = safe_join(DATA_OUTPUT_PATH, task_id)
         
-        # ZIP 파일 생성
-        zip_path = os.path.join(output_dir, f'{task_id}_results.zip')
+        if not output_dir or not os.path.isdir(output_dir):
+            return jsonify({'success': False, 'error': '결과 디렉토리를 찾을 수 없습니다.'}), 404
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in os.listdir(output_dir):
-                if not filename.endswith('.zip') and not filename.endswith('_status.json'):
-                    file_path = os.path.join(output_dir, filename)
-                    if os.path.isfile(file_path):
-                        zipf.write(file_path, filename)
-        
-        return send_file(zip_path, as_attachment=True)
+        return zip_response(task_id, zip_source_files(output_dir), f'{task_id}_results.zip')
         
     except Exception as e:
-        flash(f'ZIP 생성 오류: {str(e)}')
-        return redirect(url_for('show_result', task_id=task_id))
+        return jsonify({'success': False, 'error': f'ZIP 생성 오류: {str(e)}'}), 500
+
+# 모델 서버가 HTTP 전용 워커에 제공하는 요청 (on_model_server / model_server.serve)
+MODEL_SERVER_METHODS = {
+    'start_transcription': start_transcription,
+    'start_batch': start_batch,
+    'queue_position': scheduler.queue_position,
+    'queue_positions': scheduler.queue_positions,
+    'retry_after': scheduler.retry_after,
+    'server_stats': server_stats,
+    'metrics_text': metrics_registry.render,
+    'record_upload': lambda nbytes, kind: upload_bytes_total.inc(nbytes, kind=kind),
+    'live_transcribe': live_transcribe_words,
+    'preload_live_model': preload_live_model
+}
 
 if __name__ == '__main__':
     print("=== Whisper STT Light Web App with Progress ===")
@@ -476,4 +3512,5 @@ if __name__ == '__main__':
     print(f"결과 저장: {DATA_OUTPUT_PATH}")
     print("브라우저에서 http://localhost:5000 접속")
     print("===============================================")
-    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
+    # 디버그 모드(리로더 포함)는 개발할 때만 환경 변수로 켬 - 운영은 model_server.py + gunicorn(frontend) 참고
+    app.run(debug=os.environ.get('WHISPER_DEBUG', '0') == '1', host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Whisper 윈도우 묶음(batch) 디코딩
+여러 오디오를 30초 이하 윈도우로 나눠 인코더/디코더를 한 번에 실행하고 오디오별 결과로 되돌림
+
+whisper transcribe()는 윈도우를 하나씩 순서대로 처리하므로, 짧은 요청이 몰리거나 긴 파일을 처리할 때
+인코더가 놀게 된다. 윈도우는 무음 지점에서 나누고 이전 윈도우 텍스트로 조건화하지 않고 한 번에 디코딩하며,
+품질이 낮은 윈도우만 앞 윈도우 텍스트를 프롬프트로 주고 transcribe()의 온도 폴백으로 다시 인식한다.
+"""
+
+import long_audio
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 24  # 목표 윈도우 길이 (무음 지점 탐색 범위 포함 최대 30초)
+TIME_PRECISION = 0.02  # 타임스탬프 토큰 간격(초)
+
+# whisper transcribe() 기본값과 같은 품질 기준
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+PROMPT_SEGMENTS = 5  # 폴백 시 프롬프트로 넘기는 앞 세그먼트 수
+
+
+def split_windows(audio, window_seconds=WINDOW_SECONDS):
+    """오디오를 무음 지점 기준 30초 이하 윈도우로 분할 -> [(시작 샘플, 끝 샘플)]"""
+    bounds = [0] + long_audio.find_split_points(audio, window_seconds) + [len(audio)]
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def language_code(language):
+    """'Korean' 같은 언어 이름을 whisper 언어 코드로 변환"""
+    from whisper.tokenizer import TO_LANGUAGE_CODE
+    if language is None:
+        return None
+    return TO_LANGUAGE_CODE.get(language.lower(), language)
+
+
+def window_segments(tokenizer, result, offset_seconds, window_seconds):
+    """DecodingResult의 타임스탬프 토큰으로 세그먼트 생성 (whisper transcribe()와 같은 규칙)
+
+    윈도우 끝에서 닫히지 않은 세그먼트는 다음 윈도우로 넘기지 않고 윈도우 끝까지로 처리한다.
+    """
+    tokens = list(result.tokens)
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+    slices = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+    pieces = []  # (시작 초, 끝 초, 토큰)
+    if slices:
+        if is_timestamp[-2:] == [False, True]:
+            slices.append(len(tokens))
+        last_slice = 0
+        for current_slice in slices:
+            sliced = tokens[last_slice:current_slice]
+            pieces.append(((sliced[0] - timestamp_begin) * TIME_PRECISION,
+                           (sliced[-1] - timestamp_begin) * TIME_PRECISION, sliced))
+            last_slice = current_slice
+        rest = tokens[last_slice:]
+        if any(not timestamp for timestamp in is_timestamp[last_slice:]):
+            rest_start = rest[0] if is_timestamp[last_slice] else tokens[last_slice - 1]
+            pieces.append(((rest_start - timestamp_begin) * TIME_PRECISION, window_seconds, rest))
+    else:
+        duration = window_seconds
+        timestamps = [token for token in tokens if token >= timestamp_begin]
+        if timestamps and timestamps[-1] != timestamp_begin:
+            duration = (timestamps[-1] - timestamp_begin) * TIME_PRECISION
+        pieces.append((0.0, duration, tokens))
+
+    segments = []
+    for start, end, piece_tokens in pieces:
+        text_tokens = [token for token in piece_tokens if token < tokenizer.eot]
+        segments.append({
+            'seek': int(round(offset_seconds * 100)),
+            'start': offset_seconds + start,
+            'end': offset_seconds + min(max(end, start), window_seconds),
+            'text': tokenizer.decode(text_tokens),
+            'tokens': piece_tokens,
+            'temperature': result.temperature,
+            'avg_logprob': result.avg_logprob,
+            'compression_ratio': result.compression_ratio,
+            'no_speech_prob': result.no_speech_prob
+        })
+    return [segment for segment in segments if segment['text'].strip()]
+
+
+def needs_fallback(result):
+    """온도 0 묶음 디코딩 결과가 transcribe()라면 다시 시도했을 품질인지
+
+    transcribe()처럼 음성이 없을 가능성이 높은 윈도우는 다시 시도하지 않는다.
+    """
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def shift_segments(segments, start_seconds, end_seconds):
+    """윈도우 기준 세그먼트를 전체 오디오 기준으로 옮기고 윈도우 [start, end] 범위로 자름
+
+    폴백 transcribe()는 윈도우 뒤쪽 패딩까지 타임스탬프를 낼 수 있으므로, 범위를 벗어난 부분은 잘라
+    다음 윈도우와 겹치거나 오디오 길이를 넘지 않게 하고 윈도우 끝 이후에 시작하는 세그먼트는 버린다.
+    """
+    shifted = []
+    for segment in segments:
+        start = max(segment['start'] + start_seconds, start_seconds)
+        if start >= end_seconds:
+            continue
+        end = min(max(segment['end'] + start_seconds, start), end_seconds)
+        shifted.append(dict(segment, start=start, end=end,
+                            seek=segment['seek'] + int(round(start_seconds * 100))))
+    return shifted
+
+
+def is_silence(result):
+    """transcribe()가 건너뛰는 무음 윈도우인지"""
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def transcribe_batched(model, audios, language=None, task='transcribe', fp16=False, batch_size=16,
+                       window_seconds=WINDOW_SECONDS, on_batch=None):
+    """여러 오디오의 윈도우를 batch_size 개씩 묶어 디코딩
+
+    audios: 16kHz mono float32 배열 목록
+    on_batch(audio_index, processed_seconds, new_segments): 묶음 하나가 끝날 때마다 오디오별로 호출
+    Returns: 오디오별 결과 목록 (whisper transcribe() 결과와 같은 형태)
+    """
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    code = language_code(language)
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages, language=code, task=task)
+    options = whisper.DecodingOptions(task=task, language=code, temperature=0.0, fp16=fp16)
+
+    # 오디오 순서 -> 시간 순서로 윈도우 나열 (오디오별 세그먼트가 항상 시간 순으로 쌓이도록)
+    windows = [(index, start, end) for index, audio in enumerate(audios)
+               for start, end in split_windows(audio, window_seconds)]
+    segments = [[] for _ in audios]
+
+    for batch_start in range(0, len(windows), batch_size):
+        batch = windows[batch_start:batch_start + batch_size]
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audios[index][start:end]), model.dims.n_mels)
+            for index, start, end in batch
+        ]).to(model.device)
+        results = model.decode(mel, options)
+
+        touched = {}
+        for (index, start, end), result in zip(batch, results):
+            if is_silence(result):
+                new_segments = []
+            elif needs_fallback(result):
+                # 품질이 낮은 윈도우만 앞 윈도우 텍스트로 조건화해 transcribe()의 온도 폴백으로 다시 인식
+                prompt = ''.join(segment['text'] for segment in segments[index][-PROMPT_SEGMENTS:]).strip()
+                retry = model.transcribe(audios[index][start:end], language=language, task=task, fp16=fp16,
+                                         verbose=None, initial_prompt=prompt or None)
+                new_segments = shift_segments(retry['segments'], start / SAMPLE_RATE, end / SAMPLE_RATE)
+            else:
+                new_segments = window_segments(tokenizer, result, start / SAMPLE_RATE, (end - start) / SAMPLE_RATE)
+            for segment in new_segments:
+                segment['id'] = len(segments[index])
+                segments[index].append(segment)
+            processed, added = touched.get(index, (0, []))
+            touched[index] = (end / SAMPLE_RATE, added + new_segments)
+
+        if on_batch is not None:
+            for index, (processed, new_segments) in touched.items():
+                on_batch(index, processed, new_segments)
+
+    return [{
+        'text': ''.join(segment['text'] for segment in audio_segments),
+        'segments': audio_segments,
+        'language': code
+    } for audio_segments in segments]
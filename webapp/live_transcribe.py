@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+실시간 스트리밍 인식
+들어오는 오디오를 슬라이딩 윈도우 버퍼에 쌓아 일정 간격마다 다시 인식하고,
+연속된 두 번의 인식 결과가 앞부분에서 일치하는 단어만 확정하는 LocalAgreement 방식으로 안정된 텍스트를 내보냄
+
+- 확정된 단어는 다시 바뀌지 않으며, 확정 지점 이전 오디오는 버퍼에서 잘라내 윈도우 길이를 제한한다.
+- 확정되지 않은 뒷부분은 부분 결과(partial)로 전달한다.
+"""
+
+import subprocess
+import threading
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # whisper 입력 샘플레이트
+PROMPT_CHARS = 200  # 윈도우 밖으로 밀려난 확정 텍스트 중 프롬프트로 넘기는 길이
+DEDUP_MAX_WORDS = 5  # 확정 텍스트 끝과 새 가설 앞의 중복 검사 단어 수
+
+
+def _normalize(word):
+    return word.strip()
+
+
+class HypothesisBuffer:
+    """LocalAgreement-2: 직전 가설과 새 가설의 공통 앞부분을 확정
+
+    단어는 (시작 초, 끝 초, 텍스트) 튜플이며 시각은 스트림 시작 기준이다.
+    """
+
+    def __init__(self):
+        self.committed = []  # 버퍼 안에서 확정된 단어 (중복 검사용)
+        self.pending = []  # 직전 가설 중 아직 확정되지 않은 단어
+        self._new = []
+        self.last_committed_time = 0.0
+
+    def insert(self, words):
+        """새 가설 등록 (이미 확정된 시각 이전 단어와 확정 텍스트 끝과 겹치는 단어 제거)"""
+        new = [word for word in words if word[0] > self.last_committed_time - 0.1]
+        if new and self.committed and abs(new[0][0] - self.last_committed_time) < 1:
+            # 윈도우가 확정 지점 앞에서 시작하면 같은 단어가 다시 인식되므로 n-gram 단위로 잘라냄
+            for n in range(min(len(self.committed), len(new), DEDUP_MAX_WORDS), 0, -1):
+                tail = [_normalize(word[2]) for word in self.committed[-n:]]
+                head = [_normalize(word[2]) for word in new[:n]]
+                if tail == head:
+                    new = new[n:]
+                    break
+        self._new = new
+
+    def flush(self):
+        """직전 가설과 새 가설이 앞에서부터 같은 단어를 확정해 반환"""
+        commit = []
+        while self._new and self.pending and _normalize(self._new[0][2]) == _normalize(self.pending[0][2]):
+            word = self._new.pop(0)
+            self.pending.pop(0)
+            commit.append(word)
+            self.last_committed_time = word[1]
+        self.pending = self._new
+        self._new = []
+        self.committed.extend(commit)
+        return commit
+
+    def force_commit(self):
+        """남은 가설을 그대로 확정 (스트림 종료, 버퍼 상한 초과 시)"""
+        commit = self.pending
+        self.pending = []
+        if commit:
+            self.last_committed_time = commit[-1][1]
+        self.committed.extend(commit)
+        return commit
+
+    def drop_committed_before(self, time):
+        """버퍼에서 잘려 나간 구간의 확정 단어는 중복 검사 대상에서 제외"""
+        while self.committed and self.committed[0][1] <= time:
+            self.committed.pop(0)
+
+
+class OnlineTranscriber:
+    """슬라이딩 윈도우 증분 인식
+
+    transcribe_fn(audio, prompt) -> [(시작 초, 끝 초, 단어)]: 버퍼 시작 기준 단어 타임스탬프
+    trim_seconds: 버퍼가 이보다 길어지면 마지막 확정 단어 끝에서 자름
+    max_buffer_seconds: 확정이 계속 안 돼도 버퍼가 이보다 길어지지 않도록 남은 가설을 강제로 확정
+    """
+
+    def __init__(self, transcribe_fn, trim_seconds=15, max_buffer_seconds=25):
+        self.transcribe_fn = transcribe_fn
+        self.trim_seconds = trim_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0  # 버퍼 첫 샘플의 스트림 시각(초)
+        self.hypothesis = HypothesisBuffer()
+        self.committed = []  # 스트림 전체 확정 단어
+        self._unprocessed = 0  # 마지막 인식 이후 들어온 샘플 수
+
+    @property
+    def buffered_seconds(self):
+        return len(self.audio) / SAMPLE_RATE
+
+    @property
+    def unprocessed_seconds(self):
+        return self._unprocessed / SAMPLE_RATE
+
+    @property
+    def stream_seconds(self):
+        return self.buffer_offset + self.buffered_seconds
+
+    def insert_audio(self, samples):
+        if len(samples):
+            self.audio = np.concatenate([self.audio, samples])
+            self._unprocessed += len(samples)
+
+    def _prompt(self):
+        """버퍼 밖으로 밀려난 확정 텍스트 (문맥 유지용)"""
+        outside = [word[2] for word in self.committed if word[1] <= self.buffer_offset]
+        return ''.join(outside)[-PROMPT_CHARS:].strip()
+
+    def process(self):
+        """버퍼 전체를 다시 인식 -> (새로 확정된 단어, 미확정 단어)"""
+        self._unprocessed = 0
+        words = self.transcribe_fn(self.audio, self._prompt())
+        offset = self.buffer_offset
+        self.hypothesis.insert([(start + offset, end + offset, text) for start, end, text in words])
+        commit = self.hypothesis.flush()
+
+        if self.buffered_seconds > self.max_buffer_seconds:
+            # 말이 길게 이어지거나 가설이 흔들려 확정이 안 되는 경우: 지연 상한을 위해 강제로 확정
+            commit += self.hypothesis.force_commit()
+            self._trim(commit[-1][1] if commit else self.stream_seconds - 1.0)
+        elif self.buffered_seconds > self.trim_seconds and commit:
+            self._trim(commit[-1][1])
+        elif self.buffered_seconds > self.trim_seconds and not self.hypothesis.pending:
+            # 말이 없는 구간은 확정할 단어가 없으므로 끝 1초만 남기고 버림
+            self._trim(self.stream_seconds - 1.0)
+
+        self.committed.extend(commit)
+        return commit, list(self.hypothesis.pending)
+
+    def finish(self):
+        """스트림 종료: 남은 오디오를 마지막으로 인식하고 미확정 단어까지 모두 확정"""
+        commit = []
+        if self._unprocessed:
+            commit, _ = self.process()
+        rest = self.hypothesis.force_commit()
+        self.committed.extend(rest)
+        return commit + rest
+
+    def _trim(self, time):
+        cut = int(round((time - self.buffer_offset) * SAMPLE_RATE))
+        if cut <= 0:
+            return
+        self.audio = self.audio[cut:]
+        self.buffer_offset += cut / SAMPLE_RATE
+        self.hypothesis.drop_committed_before(self.buffer_offset)
+
+
+class PcmFrameReader:
+    """s16le 16kHz mono PCM 프레임 -> float32 샘플 (프레임 경계가 샘플 중간에 걸려도 처리)"""
+
+    def __init__(self):
+        self._rest = b''
+        self._chunks = []
+
+    def feed(self, data):
+        data = self._rest + data
+        usable = len(data) - len(data) % 2
+        self._rest = data[usable:]
+        if usable:
+            self._chunks.append(np.frombuffer(data[:usable], dtype=np.int16))
+
+    def read(self):
+        """지금까지 받은 샘플을 꺼냄"""
+        chunks, self._chunks = self._chunks, []
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+    def drain(self, timeout=5):
+        """입력 끝 처리 (PCM은 받은 즉시 샘플이 되므로 할 일 없음)"""
+
+    def close(self):
+        pass
+
+
+class FfmpegFrameReader(PcmFrameReader):
+    """압축 스트림(WebM/Ogg 컨테이너의 opus 등) -> ffmpeg 파이프 -> float32 샘플
+
+    브라우저 MediaRecorder 조각처럼 컨테이너 헤더가 앞에 한 번만 오는 연속 스트림을 받는다.
+    ffmpeg 출력은 별도 스레드에서 읽어 PCM 조각으로 쌓는다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-fflags', 'nobuffer', '-probesize', '4096',
+             '-analyzeduration', '0', '-i', 'pipe:0', '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le',
+             '-ar', str(SAMPLE_RATE), '-flush_packets', '1', 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        while True:
+            data = self._process.stdout.read1(SAMPLE_RATE)
+            if not data:
+                break
+            with self._lock:
+                PcmFrameReader.feed(self, data)
+
+    def feed(self, data):
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            pass  # ffmpeg가 먼저 종료됨 (지원하지 않는 형식 등) -> 더 이상 샘플이 나오지 않음
+
+    def read(self):
+        with self._lock:
+            return super().read()
+
+    def drain(self, timeout=5):
+        """입력 끝을 알리고 ffmpeg가 남은 프레임을 모두 출력할 때까지 대기"""
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self._reader.join(timeout)
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
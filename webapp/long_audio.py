@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+긴 녹음 병렬 인식
+무음 구간 기준으로 오디오를 나누고 프로세스 풀에서 동시에 인식한 뒤 타임스탬프를 보정해 병합
+
+프로세스 풀(spawn)의 자식 프로세스가 이 모듈만 import 하면 되도록 웹앱 코드와 분리해 둠
+"""
+
+import os
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+
+import whisper_engine
+
+SAMPLE_RATE = 16000  # whisper 입력 샘플레이트
+VAD_FRAME_SECONDS = 0.03  # 에너지 계산 프레임 길이
+VAD_MIN_SILENCE_SECONDS = 0.3  # 분할 지점으로 볼 최소 조용한 구간 길이
+SPLIT_SEARCH_RATIO = 0.2  # 목표 분할 위치 앞뒤로 (조각 길이 x 비율) 범위에서 가장 조용한 지점 탐색
+
+# 자식 프로세스 전역 상태 (init_worker에서 한 번 로딩)
+_worker_model = None
+
+
+def find_split_points(audio, chunk_seconds):
+    """chunk_seconds 간격 근처의 가장 조용한 지점(샘플 위치) 목록
+
+    프레임별 RMS 에너지를 VAD_MIN_SILENCE_SECONDS 길이로 이동 평균한 뒤,
+    목표 위치 주변에서 평균 에너지가 가장 낮은 구간의 중앙을 분할 지점으로 고른다.
+    말이 끊기지 않는 구간에서도 가장 조용한 지점을 고르므로 분할 지점은 항상 존재한다.
+    """
+    frame = int(SAMPLE_RATE * VAD_FRAME_SECONDS)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    window = max(1, int(VAD_MIN_SILENCE_SECONDS / VAD_FRAME_SECONDS))
+    smoothed = np.convolve(energy, np.ones(window) / window, mode='same')
+
+    frames_per_chunk = chunk_seconds / VAD_FRAME_SECONDS
+    search = max(1, int(frames_per_chunk * SPLIT_SEARCH_RATIO))
+    splits = []
+    target = frames_per_chunk
+    while target + search < n_frames:
+        lo = max(int(target) - search, (splits[-1] // frame if splits else 0) + window)
+        hi = min(int(target) + search, n_frames - window)
+        if lo >= hi:
+            break
+        quietest = lo + int(np.argmin(smoothed[lo:hi]))
+        # 같은 정도로 조용한 구간이 이어지면 그 구간의 가운데에서 자름
+        quiet_level = smoothed[quietest] * 1.5 + 1e-6
+        left, right = quietest, quietest
+        while left > lo and smoothed[left - 1] <= quiet_level:
+            left -= 1
+        while right < hi - 1 and smoothed[right + 1] <= quiet_level:
+            right += 1
+        quietest = (left + right) // 2
+        splits.append(quietest * frame + frame // 2)
+        target = quietest + frames_per_chunk
+    return splits
+
+
+def plan_chunks(audio, chunk_seconds, overlap_seconds):
+    """분할 계획: [{'index', 'start', 'end', 'keep_start', 'keep_end'}] (단위: 샘플)
+
+    start~end 구간을 인식하고, 세그먼트 중앙이 keep_start~keep_end 안에 있는 것만 결과에 남긴다.
+    겹치는 구간(overlap)은 분할 지점에서 말이 잘리는 경우를 대비한 여유분이다.
+    """
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    bounds = [0] + find_split_points(audio, chunk_seconds) + [len(audio)]
+    return [{
+        'index': i,
+        'start': max(0, keep_start - overlap),
+        'end': min(len(audio), keep_end + overlap),
+        'keep_start': keep_start,
+        'keep_end': keep_end
+    } for i, (keep_start, keep_end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+
+def init_worker(model_name, device, engine, num_threads, ready=None):
+    """자식 프로세스 초기화: 모델을 한 번만 로딩해 이후 조각에서 재사용
+
+    ready: 로딩이 끝나면 (pid, 로딩 시간)을 넣는 큐 (부모가 모델 준비 시간을 기록)
+    """
+    global _worker_model
+    import torch
+    torch.set_num_threads(max(1, num_threads))
+    started = time.time()
+    _worker_model = whisper_engine.load_model(model_name, device, engine)
+    load_seconds = time.time() - started
+    print(f"[병렬 인식] 프로세스 {os.getpid()}: {model_name} 모델 로딩 완료 "
+          f"({load_seconds:.1f}초, device: {device}, engine: {engine})")
+    if ready is not None:
+        ready.put((os.getpid(), load_seconds))
+
+
+def worker_ready():
+    """빈 작업 - 프로세스 풀은 작업이 들어올 때 자식 프로세스를 띄우므로 미리 띄울 때 사용"""
+    return os.getpid()
+
+
+def transcribe_chunk(audio, options, batch_size=1):
+    """자식 프로세스에서 조각 하나 인식 (batch_size > 1이면 조각 안의 윈도우를 묶어 디코딩)"""
+    if batch_size > 1:
+        import batch_decode
+        return batch_decode.transcribe_batched(
+            _worker_model, [audio], language=options.get('language'), task=options.get('task', 'transcribe'),
+            fp16=options.get('fp16', False), batch_size=batch_size
+        )[0]
+    return _worker_model.transcribe(audio, verbose=None, **options)
+
+
+def chunk_segments(chunk, result):
+    """조각 결과에서 담당 구간 세그먼트만 골라 전체 기준 시각으로 보정"""
+    offset = chunk['start'] / SAMPLE_RATE
+    keep_start = chunk['keep_start'] / SAMPLE_RATE
+    keep_end = chunk['keep_end'] / SAMPLE_RATE
+    segments = []
+    for segment in result['segments']:
+        start = segment['start'] + offset
+        end = segment['end'] + offset
+        middle = (start + end) / 2
+        if not keep_start <= middle < keep_end:
+            continue  # 옆 조각과 겹치는 구간 -> 옆 조각의 세그먼트를 사용
+        segment = dict(segment, start=start, end=end)
+        segment['seek'] = segment['seek'] + chunk['start'] * 100 // SAMPLE_RATE
+        if 'words' in segment:
+            segment['words'] = [dict(word, start=word['start'] + offset, end=word['end'] + offset)
+                                for word in segment['words']]
+        segments.append(segment)
+    return segments
+
+
+def stitch_results(chunks, results):
+    """조각별 결과를 whisper transcribe() 결과와 같은 형태로 병합"""
+    segments = []
+    for chunk, result in zip(chunks, results):
+        segments.extend(chunk_segments(chunk, result))
+    for i, segment in enumerate(segments):
+        segment['id'] = i
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': results[0].get('language') if results else None
+    }
+
+
+def transcribe_parallel(executor, audio, chunks, options, on_chunk=None, batch_size=1):
+    """조각들을 executor(init_worker로 초기화된 프로세스 풀)에서 동시에 인식
+
+    on_chunk(chunk, result): 조각 하나가 끝날 때마다 (끝난 순서대로) 호출
+    """
+    futures = {
+        executor.submit(transcribe_chunk, audio[chunk['start']:chunk['end']], options, batch_size): chunk
+        for chunk in chunks
+    }
+    results = [None] * len(chunks)
+    try:
+        for future in as_completed(futures):
+            chunk = futures[future]
+            results[chunk['index']] = future.result()
+            if on_chunk is not None:
+                on_chunk(chunk, results[chunk['index']])
+    except BaseException:
+        for future in futures:
+            future.cancel()  # 아직 시작하지 않은 조각은 취소
+        raise
+    return stitch_results(chunks, results)
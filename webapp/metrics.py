@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus 텍스트 형식 지표
+카운터/히스토그램을 프로세스 메모리에 누적하고 /metrics 요청 때 텍스트로 출력
+
+- 작업을 처리하는 프로세스(단독 실행 또는 모델 서버) 한 곳에서만 누적하므로 별도 집계가 필요 없다.
+- 대기열 길이처럼 조회 시점의 값이나 다른 객체가 세는 값은 Registry.callback()으로 등록해 출력할 때 읽는다.
+"""
+
+import math
+import threading
+
+# 초 단위 히스토그램 기본 구간 (짧은 API 응답부터 긴 녹음 처리까지)
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """증가만 하는 값 (레이블 조합별)"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    """관측값 분포 (누적 구간 개수 + 합계 + 개수)"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._values = {}  # 레이블 -> [구간별 개수..., 합계, 개수]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield self.name + '_bucket', _format_labels(self.labels, key, [('le', _format_value(float(bound)))]), cumulative
+            yield self.name + '_sum', _format_labels(self.labels, key), round(state[-2], 6)
+            yield self.name + '_count', _format_labels(self.labels, key), state[-1]
+
+
+class _Callback:
+    """출력할 때 callback()으로 값을 읽는 지표 (게이지, 또는 다른 객체가 세는 카운터)
+
+    callback() -> 숫자 또는 {레이블 값(튜플): 숫자}, None인 값은 생략
+    """
+
+    def __init__(self, name, help_text, callback, labels=(), type_name='gauge'):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.callback = callback
+        self.type_name = type_name
+
+    def samples(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if value is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Registry:
+    """지표 목록 + 텍스트 출력"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def callback(self, name, help_text, callback, labels=(), type_name='gauge'):
+        return self._register(_Callback(name, help_text, callback, labels, type_name))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식 (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # 한 지표 계산 실패로 전체 수집이 끊기지 않도록 해당 지표만 생략
+                print(f"[지표] {metric.name} 계산 실패: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
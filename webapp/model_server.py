@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+모델 서버 (분리 배포 모드)
+모델과 작업 스케줄러를 한 프로세스가 소유하고, 여러 HTTP 워커 프로세스(WHISPER_ROLE=frontend)는
+로컬 IPC(multiprocessing.connection)로 작업 등록/대기 순번/상태 조회/실시간 인식을 요청한다.
+
+- HTTP 워커는 모델을 로딩하지 않으므로 워커 수를 늘려도 모델 메모리가 늘지 않고,
+  추론이 GIL을 오래 잡아도 업로드/상태/다운로드 응답은 영향을 받지 않는다.
+- 작업 진행 이벤트는 구독 연결로 HTTP 워커에 중계되어 각 워커의 SSE 스트림으로 전달된다.
+- 작업 상태/캐시/업로드 기록은 기존처럼 SQLite(WAL)와 파일을 함께 사용한다. (같은 서버에서 실행)
+
+실행 예:
+    python model_server.py
+    WHISPER_ROLE=frontend gunicorn -w 4 --threads 8 -b 0.0.0.0:5000 app:app
+"""
+
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+RECONNECT_SECONDS = 1.0  # 이벤트 구독 연결이 끊겼을 때 다시 연결하기 전 대기 시간
+EVENT_QUEUE_SIZE = 10000  # HTTP 워커별 미전송 이벤트 상한 (느린 워커는 이벤트를 버림)
+CALL_TIMEOUT = 300  # 응답을 기다리는 최대 시간(초)
+
+
+class ModelServerUnavailable(Exception):
+    """모델 서버에 연결할 수 없음"""
+
+
+class ModelServerError(Exception):
+    """모델 서버에서 요청 처리 중 오류"""
+
+
+def parse_address(address):
+    """'host:port'는 TCP, 그 외('/tmp/whisper.sock' 등)는 유닉스 소켓 경로"""
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return address
+
+
+class ModelServerClient:
+    """HTTP 워커 쪽 IPC 클라이언트
+
+    연결은 요청이 끝나면 재사용하도록 모아 두며, gunicorn이 fork 한 뒤에는 부모의 연결을 쓰지 않는다.
+    """
+
+    def __init__(self, address, authkey):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = os.getpid()
+        self._subscriber = None
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._subscriber = None
+
+    def _connect(self):
+        try:
+            return Client(self.address, authkey=self.authkey)
+        except OSError as e:
+            raise ModelServerUnavailable(f'모델 서버에 연결할 수 없습니다: {e}')
+
+    def call(self, method, *args):
+        """모델 서버의 method(*args) 실행 결과 반환"""
+        with self._lock:
+            self._check_fork()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            conn.send((method, args))
+            if not conn.poll(CALL_TIMEOUT):
+                raise OSError('응답 시간 초과')
+            status, value = conn.recv()
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise ModelServerUnavailable(f'모델 서버 연결이 끊겼습니다: {e}')
+        with self._lock:
+            self._idle.append(conn)
+        if status == 'error':
+            raise ModelServerError(value)
+        return value
+
+    def ensure_event_subscription(self, callback):
+        """작업 이벤트 구독 스레드 시작 (프로세스당 1회) - callback(task_id, event, data)"""
+        with self._lock:
+            self._check_fork()
+            if self._subscriber is not None:
+                return
+            self._subscriber = threading.Thread(target=self._event_loop, args=(callback,), daemon=True)
+            self._subscriber.start()
+
+    def _event_loop(self, callback):
+        while True:
+            try:
+                conn = self._connect()
+                conn.send(('subscribe', ()))
+                while True:
+                    task_id, event, data = conn.recv()
+                    callback(task_id, event, data)
+            except (ModelServerUnavailable, EOFError, OSError) as e:
+                print(f"[모델 서버] 이벤트 구독 연결 끊김, 다시 연결합니다: {e}")
+                time.sleep(RECONNECT_SECONDS)
+
+
+class _EventSubscriber:
+    """HTTP 워커 한 곳으로 이벤트를 보내는 전송 스레드 (발행하는 작업 스레드를 막지 않음)"""
+
+    def __init__(self, conn, on_close):
+        self.conn = conn
+        self.events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._on_close = on_close
+        threading.Thread(target=self._send_loop, daemon=True).start()
+
+    def publish(self, task_id, event, data):
+        try:
+            self.events.put_nowait((task_id, event, data))
+        except queue.Full:
+            pass
+
+    def _send_loop(self):
+        try:
+            while True:
+                self.conn.send(self.events.get())
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.conn.close()
+            self._on_close(self)
+
+
+def serve(address, authkey, methods, event_hub):
+    """IPC 요청 처리 루프 (연결마다 스레드 하나)
+
+    methods: {이름: 함수} - HTTP 워커가 호출할 수 있는 함수 목록
+    event_hub: 발행되는 작업 이벤트를 구독 중인 HTTP 워커로 중계
+    """
+    subscribers = []
+    subscribers_lock = threading.Lock()
+
+    def remove_subscriber(subscriber):
+        with subscribers_lock:
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+    def broadcast(task_id, event, data):
+        with subscribers_lock:
+            targets = list(subscribers)
+        for subscriber in targets:
+            subscriber.publish(task_id, event, data)
+
+    def handle(conn):
+        try:
+            while True:
+                method, args = conn.recv()
+                if method == 'subscribe':
+                    subscriber = _EventSubscriber(conn, remove_subscriber)
+                    with subscribers_lock:
+                        subscribers.append(subscriber)
+                    return  # 이후 이 연결은 이벤트 전송 전용
+                func = methods.get(method)
+                if func is None:
+                    conn.send(('error', f'알 수 없는 요청입니다: {method}'))
+                    continue
+                try:
+                    conn.send(('ok', func(*args)))
+                except Exception as e:
+                    conn.send(('error', f'{type(e).__name__}: {e}'))
+        except (EOFError, OSError):
+            conn.close()
+
+    event_hub.add_listener(broadcast)
+    address = parse_address(address)
+    if isinstance(address, str) and os.path.exists(address):
+        os.remove(address)  # 이전 실행이 남긴 유닉스 소켓 파일
+    listener = Listener(address, authkey=authkey)
+    print(f"[모델 서버] IPC 대기 중: {address}")
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:  # 인증 실패 등
+            print(f"[모델 서버] 연결 거부: {e}")
+            continue
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def main():
+    os.environ['WHISPER_ROLE'] = 'model_server'
+    import app
+    print("=== Whisper STT 모델 서버 ===")
+    print(f"장치: {', '.join(app.WHISPER_DEVICES)} (엔진: {app.DEVICE_ENGINES})")
+    serve(app.MODEL_SERVER_ADDRESS, app.MODEL_SERVER_AUTHKEY, app.MODEL_SERVER_METHODS, app.event_hub)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Whisper 실행 엔진 선택
+장치 자동 감지, CPU용 int8 동적 양자화, 장치별 엔진(fp16/fp32/int8) 결정
+
+웹앱(모델 풀)과 병렬 인식 자식 프로세스(long_audio)가 같은 방식으로 모델을 로딩하도록 분리해 둠
+"""
+
+
+# 로딩 전 모델 메모리 추정치(MB) - 엔진별 (int8은 Linear 레이어만 양자화되고 임베딩/합성곱은 fp32로 남음)
+MODEL_MEMORY_MB = {
+    'tiny': {'fp32': 144, 'fp16': 72, 'int8': 97},
+    'base': {'fp32': 277, 'fp16': 139, 'int8': 151},
+    'small': {'fp32': 922, 'fp16': 461, 'int8': 355},
+    'medium': {'fp32': 2940, 'fp16': 1470, 'int8': 920},
+    'large-v3': {'fp32': 5910, 'fp16': 2960, 'int8': 1690},
+    'large-v3-turbo': {'fp32': 3090, 'fp16': 1545, 'int8': 990},
+}
+
+
+def resolve_devices(devices):
+    """장치 목록의 'auto'를 실제 장치로 변환 (GPU가 있으면 모든 GPU, 없으면 CPU)"""
+    resolved = []
+    for device in devices:
+        device = device.strip()
+        if device == 'auto':
+            import torch
+            if torch.cuda.is_available():
+                resolved.extend(f'cuda:{i}' for i in range(torch.cuda.device_count()))
+            else:
+                resolved.append('cpu')
+        elif device:
+            resolved.append(device)
+    # 중복 제거 (순서 유지)
+    return list(dict.fromkeys(resolved)) or ['cpu']
+
+
+def device_engine(device, cpu_int8=True):
+    """장치에서 사용할 엔진 이름 (GPU: fp16, CPU: int8 또는 fp32)"""
+    if str(device).startswith('cuda'):
+        return 'fp16'
+    return 'int8' if cpu_int8 else 'fp32'
+
+
+def quantize_int8(model):
+    """Whisper 모델의 Linear 레이어를 int8 동적 양자화 (CPU 전용)
+
+    whisper.model.Linear는 nn.Linear 하위 클래스라 quantize_dynamic이 찾지 못하므로,
+    같은 가중치의 nn.Linear로 바꾼 뒤 양자화한다. (kv-cache 훅은 바뀐 모듈에 설치됨)
+    """
+    import torch
+    from torch import nn
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+                linear = nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.load_state_dict(child.state_dict())
+                setattr(module, name, linear)
+    return torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_model(name, device, engine):
+    """엔진에 맞춰 Whisper 모델 로딩"""
+    import whisper
+    model = whisper.load_model(name, device=device)
+    if engine == 'int8':
+        model = quantize_int8(model)
+    return model
+
+
+def transcribe_options(engine):
+    """엔진별 transcribe() 추가 옵션 (CPU에서 fp16 경고 방지)"""
+    return {'fp16': engine == 'fp16'}
+
+
+def model_size_bytes(model):
+    """모델 메모리 크기 (양자화된 레이어의 packed 가중치 포함)"""
+    import torch
+
+    def tensor_bytes(value):
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(item) for item in value)
+        return 0
+
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
+
+
+def estimated_model_mb(name, engine):
+    """로딩 전 모델 메모리 추정치(MB) (모르는 모델은 가장 큰 모델 기준)"""
+    sizes = MODEL_MEMORY_MB.get(name, MODEL_MEMORY_MB['large-v3'])
+    return sizes.get(engine, sizes['fp32'])